@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Lag alignment of FRED series
+
+Finds, for every observation of any set of series (daily, weekly, monthly,
+quarterly and annual mixed freely), the earlier observations it is compared
+with:
+- offset lags: the latest observation at least a calendar offset earlier
+  (YEAR_AGO: a year)
+- step lags: the observation a fixed number of observations earlier
+  (PREVIOUS: the one before)
+
+All series are laid end to end, sorted by series and date, under one integer
+key of (series code, day). Every lag of every series is then found with one
+searchsorted, a sorted as-of join over all series at once, so aligning n
+observations is O(n log n) with no loop over series or dates.
+
+A lag only counts when it is close enough to its target: an offset lag may
+fall at most the series' tolerance short of its target date, and a step lag
+may lie at most that many days per step behind the observation. Tolerances
+are set per update frequency (LAG_TOLERANCE_DAYS). Lags outside them are
+missing, like lags before a series' first observation; lag_report counts
+both per series and lag.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+@dataclass(frozen=True)
+class Lag:
+    """An earlier observation to compare each observation with"""
+    name: str
+    offset: Optional[pd.DateOffset] = None
+    steps: int = 0
+
+YEAR_AGO = Lag('year_ago', offset=pd.DateOffset(years=1))
+PREVIOUS = Lag('previous', steps=1)
+
+# Days a lagged observation may be off its target, by schema update_frequency
+LAG_TOLERANCE_DAYS = {'daily': 7, 'weekly': 7, 'monthly': 31, 'quarterly': 92, 'annually': 366, 'annual': 366}
+DEFAULT_LAG_TOLERANCE_DAYS = 31
+
+def clean_observations(observations: pd.DataFrame) -> pd.DataFrame:
+    """Numeric observation rows sorted by series and date, missing values and duplicates dropped"""
+    df = observations[['series_id', 'date', 'value']].copy()
+    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+    df = df.dropna(subset=['value']).drop_duplicates(['series_id', 'date'], keep='last')
+    return df.sort_values(['series_id', 'date'], kind='stable')
+
+def tolerance_days(frequency: Optional[str], tolerances: Optional[Dict[str, int]] = None) -> int:
+    """Lag tolerance in days for a series' update frequency"""
+    tolerances = tolerances if tolerances is not None else LAG_TOLERANCE_DAYS
+    return tolerances.get((frequency or '').lower(), DEFAULT_LAG_TOLERANCE_DAYS)
+
+def _as_days(dates: np.ndarray) -> np.ndarray:
+    return dates.astype('datetime64[D]').astype(np.int64)
+
+class AlignedSeries:
+    """Observations of several series laid end to end, with the position of each lag of each observation"""
+    
+    def __init__(self, series_ids: Sequence[str], codes: np.ndarray, dates: np.ndarray, values: np.ndarray):
+        self.series_ids = np.asarray(series_ids, dtype=object)
+        self.codes = codes
+        self.dates = dates
+        self.values = values
+        self.counts = np.bincount(codes, minlength=len(self.series_ids))
+        self.starts = np.cumsum(self.counts) - self.counts
+        # Lag name -> position of the lagged observation (-1 when missing), and whether a
+        # missing lag was only outside the tolerance
+        self.lags: Dict[str, np.ndarray] = {}
+        self.outside_tolerance: Dict[str, np.ndarray] = {}
+        
+        days = _as_days(dates)
+        self._base = int(days.min()) if len(days) else 0
+        self._span = int(days.max()) - self._base + 2 if len(days) else 1
+        self._key = self._search_key(codes, days)
+    
+    def _search_key(self, codes: np.ndarray, days: np.ndarray) -> np.ndarray:
+        # Days outside the observed range clip to just before the first or after the last one,
+        # which keeps every search inside its own series' range of keys
+        return codes.astype(np.int64) * self._span + np.clip(days - self._base, -1, self._span - 1)
+    
+    def search(self, codes: np.ndarray, days: np.ndarray) -> np.ndarray:
+        """Position of each series' latest observation on or before a day, -1 when there is none"""
+        positions = np.searchsorted(self._key, self._search_key(codes, days), side='right') - 1
+        return np.where(positions >= self.starts[codes], positions, -1)
+    
+    def add_lag(self, lag: Lag, tolerance: np.ndarray):
+        """Find a lag of every observation, given each observation's tolerance in days"""
+        days = _as_days(self.dates)
+        if lag.offset is not None:
+            targets = _as_days((pd.DatetimeIndex(self.dates) - lag.offset).to_numpy())
+            positions = self.search(self.codes, targets)
+            earliest = targets - tolerance
+        else:
+            positions = np.arange(len(days)) - lag.steps
+            positions[positions < self.starts[self.codes]] = -1
+            earliest = days - lag.steps * tolerance
+        
+        close = days[np.maximum(positions, 0)] >= earliest
+        self.outside_tolerance[lag.name] = (positions >= 0) & ~close
+        self.lags[lag.name] = np.where(close, positions, -1)
+    
+    def latest(self, as_of: np.datetime64) -> np.ndarray:
+        """Position of each series' latest observation on or before as_of, -1 when there is none"""
+        codes = np.arange(len(self.series_ids))
+        return self.search(codes, np.full(len(codes), _as_days(np.datetime64(as_of, 'D'))))
+    
+    def values_at(self, positions: np.ndarray) -> np.ndarray:
+        """Values at observation positions, NaN for -1"""
+        return np.where(positions >= 0, self.values[np.maximum(positions, 0)], np.nan)
+    
+    def dates_at(self, positions: np.ndarray) -> np.ndarray:
+        """Dates at observation positions, NaT for -1"""
+        return np.where(positions >= 0, self.dates[np.maximum(positions, 0)], np.datetime64('NaT', 'D'))
+    
+    def to_frame(self, positions: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Observations (all, or at positions) with the date and value of each lag"""
+        positions = np.arange(len(self.values)) if positions is None else positions
+        valid = positions[positions >= 0]
+        frame = pd.DataFrame({
+            'series_id': self.series_ids[self.codes[valid]],
+            'date': self.dates[valid],
+            'value': self.values[valid]
+        })
+        for name, lagged in self.lags.items():
+            frame[f"{name}_date"] = self.dates_at(lagged[valid])
+            frame[f"{name}_value"] = self.values_at(lagged[valid])
+        return frame
+
+def align_series(observations: pd.DataFrame, lags: Iterable[Lag] = (YEAR_AGO, PREVIOUS),
+                 frequencies: Optional[Dict[str, str]] = None, tolerances: Optional[Dict[str, int]] = None,
+                 series_ids: Optional[Iterable[str]] = None) -> AlignedSeries:
+    """
+    Align the observations of every series with their lags
+    
+    Args:
+        observations: Stored observation rows (series_id, date, value)
+        lags: Lags to find for every observation
+        frequencies: Series id -> schema update_frequency, which selects the tolerance
+        tolerances: Tolerance in days per frequency (default: LAG_TOLERANCE_DAYS)
+        series_ids: Series to align (default: every series in observations)
+    
+    Returns:
+        The aligned series; series without observations have none
+    """
+    frequencies = frequencies or {}
+    df = clean_observations(observations)
+    series_ids = sorted(set(series_ids) if series_ids is not None else set(df['series_id']))
+    df = df[df['series_id'].isin(series_ids)]
+    
+    codes = np.searchsorted(np.asarray(series_ids, dtype=object), df['series_id'].to_numpy()).astype(np.intp)
+    dates = pd.to_datetime(df['date']).to_numpy().astype('datetime64[D]')
+    aligned = AlignedSeries(series_ids, codes, dates, df['value'].to_numpy(dtype=np.float64))
+    
+    series_tolerance = np.array([tolerance_days(frequencies.get(series_id), tolerances) for series_id in series_ids],
+                                dtype=np.int64)
+    for lag in lags:
+        aligned.add_lag(lag, series_tolerance[codes])
+    return aligned
+
+def lag_report(aligned: AlignedSeries) -> pd.DataFrame:
+    """
+    Missing lags per series and lag
+    
+    Returns:
+        Rows of (series_id, lag, observations, missing, outside_tolerance,
+        latest_date, latest_missing): how many observations lack the lag, how
+        many of those only because the lagged observation is too far from its
+        target, and whether the series' latest observation lacks it
+    """
+    series_count = len(aligned.series_ids)
+    has_data = aligned.counts > 0
+    latest = aligned.starts + aligned.counts - 1
+    
+    rows = []
+    for name, positions in aligned.lags.items():
+        missing = np.bincount(aligned.codes, weights=positions < 0, minlength=series_count).astype(np.int64)
+        outside = np.bincount(aligned.codes, weights=aligned.outside_tolerance[name],
+                              minlength=series_count).astype(np.int64)
+        rows.append(pd.DataFrame({
+            'series_id': aligned.series_ids[has_data],
+            'lag': name,
+            'observations': aligned.counts[has_data],
+            'missing': missing[has_data],
+            'outside_tolerance': outside[has_data],
+            'latest_date': aligned.dates[latest[has_data]],
+            'latest_missing': positions[latest[has_data]] < 0
+        }))
+    
+    if not rows:
+        return pd.DataFrame(columns=['series_id', 'lag', 'observations', 'missing', 'outside_tolerance',
+                                     'latest_date', 'latest_missing'])
+    return pd.concat(rows, ignore_index=True).sort_values(['series_id', 'lag'], kind='stable', ignore_index=True)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Crash-safe file writes
+
+Every file the refresh writes goes through one of these helpers so that a
+crash or preemption at any point leaves either the old or the new contents,
+never a mix:
+- atomic_write: write to a temporary file in the same directory, fsync it,
+  rename it over the target and fsync the directory
+- file_lock: serialize the read-modify-write of a file between writers;
+  readers need no lock, since they only ever see a complete file
+"""
+
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+def _default_mode(path: Path) -> int:
+    """Permissions for a replacement file: the target's, or the umask default"""
+    try:
+        return path.stat().st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+def fsync_directory(path: Union[str, Path]):
+    """Flush a directory entry change (create, rename) to disk"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+@contextmanager
+def atomic_write(path: Union[str, Path], mode: str = 'w', **open_kwargs):
+    """
+    Open a temporary file that replaces path when the block exits cleanly
+    
+    If the block raises, the temporary file is removed and path is untouched.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        # mkstemp creates the file private to the owner
+        os.fchmod(fd, _default_mode(path))
+        with os.fdopen(fd, mode, **open_kwargs) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    
+    fsync_directory(path.parent)
+
+@contextmanager
+def atomic_path(path: Union[str, Path], suffix: str = ''):
+    """
+    Yield a temporary path for writers that take a file name (e.g. Parquet)
+    
+    The file written there is fsynced and renamed over path when the block
+    exits cleanly.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=suffix)
+    os.chmod(tmp_path, _default_mode(path))
+    os.close(fd)
+    try:
+        yield tmp_path
+        fd = os.open(tmp_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    
+    fsync_directory(path.parent)
+
+@contextmanager
+def file_lock(path: Union[str, Path]):
+    """
+    Hold an exclusive lock for writing path, across processes
+    
+    The lock is taken on a `<name>.lock` file next to path, because path
+    itself is replaced by every atomic write. Where file locks are not
+    available the block runs unlocked.
+    """
+    path = Path(path)
+    if fcntl is None:  # pragma: no cover - Windows
+        yield
+        return
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path.with_name(f"{path.name}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+def read_complete_lines(path: Union[str, Path]) -> bytes:
+    """
+    Read a line-oriented file up to the end of its last complete line
+    
+    A torn last line (left by an older version that appended in place) is
+    skipped, never removed: only writers change the file.
+    """
+    path = Path(path)
+    data = path.read_bytes()
+    keep = data.rfind(b'\n') + 1
+    if keep < len(data):
+        logger.warning(f"Ignoring a partial last line ({len(data) - keep} bytes) in {path}")
+    return data[:keep]
@@ -7,17 +7,21 @@ Quick utility to check the status of your local FRED data including:
 - Missing value counts
 - Data coverage statistics
 - Recent data points
+- Series whose latest observation has no year-ago or previous observation
+  to compare with (see alignment)
 
 Usage:
-    python scripts/check_data_status.py [--csv-file PATH]
+    python scripts/check_data_status.py [--csv-file PATH] [--store BACKEND]
 """
 
 import argparse
 import pandas as pd
-from pathlib import Path
 from datetime import datetime, timedelta
 import json
 
+from alignment import align_series, lag_report
+from fred_store import STORE_BACKENDS, load_series_metadata, open_store, series_metadata_path
+
 def load_schema(schema_file: str = "schema.json") -> dict:
     """Load the schema configuration"""
     try:
@@ -27,18 +31,20 @@ def load_schema(schema_file: str = "schema.json") -> dict:
         print(f"Warning: Could not load schema file: {e}")
         return {}
 
-def check_data_status(csv_file: str = "data/fred_data.csv"):
+def check_data_status(csv_file: str = "data/fred_data.csv", store_backend: str = None):
     """Check and display data status"""
+    store = open_store(csv_file, store_backend)
+    csv_file = store.path
     
     # Check if file exists
-    if not Path(csv_file).exists():
+    if not store.exists():
         print(f"❌ Data file not found: {csv_file}")
         print("Run the refresh script first: python scripts/refresh_fred_data.py")
         return
     
     # Load data
     try:
-        df = pd.read_csv(csv_file)
+        df = store.load()
         print(f"✅ Loaded {len(df)} records from {csv_file}")
     except Exception as e:
         print(f"❌ Error loading data: {e}")
@@ -48,6 +54,18 @@ def check_data_status(csv_file: str = "data/fred_data.csv"):
         print("❌ No data found in CSV file")
         return
     
+    # Series metadata (category, frequency, ...) lives in a separate table
+    metadata = load_series_metadata(series_metadata_path(csv_file))
+    if 'category' not in df.columns and not metadata.empty:
+        df = df.merge(metadata[['series_id', 'category']], on='series_id', how='left')
+    frequencies = {
+        row['series_id']: row['update_frequency']
+        for row in metadata.to_dict('records') if row.get('update_frequency')
+    }
+    
+    # Year-ago and previous observations, aligned before the dates are converted below
+    lags = lag_report(align_series(df, frequencies=frequencies))
+    
     # Convert date column to datetime
     df['date'] = pd.to_datetime(df['date'])
     
@@ -122,6 +140,26 @@ def check_data_status(csv_file: str = "data/fred_data.csv"):
         if len(missing_counts) > 5:
             print(f"   ... and {len(missing_counts) - 5} more metrics with missing values")
     
+    # Lags the mood scores compare with
+    print("\n⏪ YEAR-AGO ALIGNMENT")
+    latest_missing = lags[lags['latest_missing']]
+    if latest_missing.empty:
+        print("   ✅ Every series' latest observation has a year-ago and previous observation")
+    else:
+        print(f"   Latest observation without a lagged observation in {latest_missing['series_id'].nunique()} metrics:")
+        for row in latest_missing.head(10).itertuples():
+            reason = "too far from its target" if row.outside_tolerance else "no earlier data"
+            print(f"   ❌ {row.series_id}: no {row.lag.replace('_', '-')} observation for "
+                  f"{pd.Timestamp(row.latest_date).strftime('%Y-%m-%d')} ({reason})")
+        
+        if len(latest_missing) > 10:
+            print(f"   ... and {len(latest_missing) - 10} more")
+    
+    gaps = lags[lags['outside_tolerance'] > 0]
+    for row in gaps.head(5).itertuples():
+        print(f"   ⚠️  {row.series_id}: {row.outside_tolerance}/{row.observations} {row.lag.replace('_', '-')} "
+              f"observations outside the tolerance (gaps in the data)")
+    
     # Data freshness by category
     print(f"\n📂 FRESHNESS BY CATEGORY")
     if 'category' in df.columns:
@@ -170,10 +208,12 @@ def main():
     """Main function"""
     parser = argparse.ArgumentParser(description='Check FRED data status')
     parser.add_argument('--csv-file', type=str, default='data/fred_data.csv',
-                       help='Path to CSV file containing FRED data')
+                       help='Path to the data store containing FRED data')
+    parser.add_argument('--store', type=str, choices=sorted(STORE_BACKENDS),
+                       help='Storage backend; overrides the extension of --csv-file')
     
     args = parser.parse_args()
-    check_data_status(args.csv_file)
+    check_data_status(args.csv_file, args.store)
 
 if __name__ == "__main__":
     main() 
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+Frontend Data Exporter
+
+Writes the compact files the web app loads into `public/data`, so the browser
+no longer downloads and parses the observations CSV:
+- fred_observations.<hash>.json: one entry per series with its observations
+  sorted by date, as parallel `days` and `values` arrays. `days` holds the
+  first date as days since 1970-01-01 followed by the gap in days to each
+  next date; missing values are left out
+- fred_metadata.<hash>.json: per-series name, category, units, frequency,
+  FRED title and observation range
+- fred_scores.<hash>.json: the precomputed mood score of every question and
+  its series, with the thresholds of mood_rules.json (see mood_scoring), so
+  the app only needs the raw series for charts
+- fred_mood_history.<hash>.json: the mood of every question and of each of
+  its series over time (see mood_history), as the dates the score changes
+  and the score from that date on
+- shards/fred_observations.<hash>.json: the observations of one question in
+  src/data/questions.ts, in the same format, so a question page (the app's
+  /category/<question id> route) can load only the series it shows
+- manifest.json: the names of the current files, each shard's file, hash and
+  series, and the content hash of every series
+
+The hash in the file names changes with their content, so they can be cached
+indefinitely; only the small manifest has to be revalidated. The files of
+the previous export are kept until the next one, so a client that still holds
+the previous manifest can load what it references; older files are removed.
+
+Exports are incremental: the series whose content hash differs from the
+previous manifest select the questions to score and backfill again and the
+shards to rewrite; everything
+else is carried over from the previous export. A change to the rule table,
+the questions or the series frequencies rescores everything.
+
+Questions with the same series share one shard file. Series shared between
+different shards (CUSR0000SETB is in two questions) are stored in each, but the manifest's per-series hashes let the
+app skip a shard whose series it already holds and decode each series once.
+
+Every file also gets precompressed `.gz` and `.br` siblings (gzip level 9,
+brotli quality 11), so a static host can serve compressed bytes without
+compressing per request. Brotli needs the optional `brotli` package; without
+it only `.gz` files are written.
+
+Usage:
+    python scripts/export_frontend_data.py [--csv-file PATH] [--store BACKEND] [--output-dir DIR]
+                                           [--questions-file PATH] [--rules-file PATH] [--full]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import brotli
+except ImportError:  # Optional: only .gz siblings are written
+    brotli = None
+
+from atomic_io import atomic_write
+from fred_store import STORE_BACKENDS, ObservationStore, load_series_metadata, open_store, series_metadata_path
+from mood_history import backfill_mood_history
+from mood_scoring import DEFAULT_RULES_FILE, compile_rules, load_questions, score_questions
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_VERSION = 1
+MANIFEST_FILENAME = 'manifest.json'
+OBSERVATIONS_STEM = 'fred_observations'
+METADATA_STEM = 'fred_metadata'
+SCORES_STEM = 'fred_scores'
+HISTORY_STEM = 'fred_mood_history'
+SHARDS_DIRNAME = 'shards'
+HASH_LENGTH = 12
+
+# Precompressed sibling suffix -> compressor, at maximum compression
+COMPRESSORS = {'.gz': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+if brotli is not None:
+    COMPRESSORS['.br'] = lambda data: brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+# Every precompressed suffix an export may have written, whether or not its compressor is available now
+COMPRESSED_SUFFIXES = ('.gz', '.br')
+
+# Series metadata table columns copied into the metadata file
+EXPORTED_METADATA_FIELDS = ['name', 'category', 'units', 'update_frequency', 'fred_title', 'fred_units',
+                            'fred_last_updated']
+
+def build_observations_payload(observations: pd.DataFrame) -> Dict:
+    """Build the columnar observations document from stored observation rows"""
+    df = observations[['series_id', 'date', 'value']].copy()
+    df['value'] = pd.to_numeric(df['value'], errors='coerce')
+    df = df.dropna(subset=['value'])
+    df = df.drop_duplicates(['series_id', 'date'], keep='last')
+    df = df.sort_values(['series_id', 'date'], kind='stable')
+    if df.empty:
+        return {'version': ARTIFACT_VERSION, 'series': {}}
+    
+    days = pd.to_datetime(df['date']).to_numpy().astype('datetime64[D]').astype(np.int64)
+    values = df['value'].to_numpy(dtype=np.float64)
+    series_ids = df['series_id'].to_numpy()
+    
+    series = {}
+    # Rows are sorted by series, so each series is one contiguous slice
+    boundaries = np.flatnonzero(series_ids[1:] != series_ids[:-1]) + 1
+    for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(df)]):
+        series_days = days[start:end]
+        series[str(series_ids[start])] = {
+            'days': np.diff(series_days, prepend=0).tolist(),
+            'values': values[start:end].tolist()
+        }
+    
+    return {'version': ARTIFACT_VERSION, 'series': series}
+
+def build_shard_payloads(observations_payload: Dict, groups: Dict[str, List[str]]) -> Dict[str, Dict]:
+    """Split the observations document into one document per group of series"""
+    all_series = observations_payload['series']
+    return {
+        group_id: {
+            'version': ARTIFACT_VERSION,
+            'series': {series_id: all_series[series_id] for series_id in series_ids if series_id in all_series}
+        }
+        for group_id, series_ids in groups.items()
+    }
+
+def build_metadata_payload(metadata: pd.DataFrame, observations_payload: Dict) -> Dict:
+    """Build the series metadata document for every exported series"""
+    rows = {row['series_id']: row for row in metadata.to_dict('records')}
+    
+    series = {}
+    for series_id, columns in observations_payload['series'].items():
+        row = rows.get(series_id, {})
+        days = np.cumsum(columns['days']).astype('datetime64[D]')
+        entry = {field: row.get(field, '') for field in EXPORTED_METADATA_FIELDS}
+        entry.update({
+            'first_date': str(days[0]),
+            'last_date': str(days[-1]),
+            'count': len(days)
+        })
+        series[series_id] = entry
+    
+    return {'version': ARTIFACT_VERSION, 'series': series}
+
+def _score_changes(history: pd.DataFrame, keys: List[str]) -> Dict:
+    """Delta-coded days and scores of the rows where each group's score changes"""
+    history = history.sort_values(keys + ['date'], kind='stable')
+    key_columns = [history[key].to_numpy() for key in keys]
+    score = history['score'].to_numpy()
+    
+    # A row starts a group when any key differs from the row before it
+    new_group = np.zeros(len(history), dtype=bool)
+    new_group[:1] = True
+    for column in key_columns:
+        new_group[1:] |= column[1:] != column[:-1]
+    changed = new_group.copy()
+    changed[1:] |= score[1:] != score[:-1]
+    
+    days = pd.to_datetime(history['date']).to_numpy().astype('datetime64[D]').astype(np.int64)[changed]
+    scores = score[changed]
+    key_columns = [column[changed] for column in key_columns]
+    
+    changes = {}
+    starts = np.flatnonzero(new_group[changed])
+    for start, end in zip(starts, np.r_[starts[1:], len(scores)]):
+        group = tuple(column[start] for column in key_columns) if len(keys) > 1 else key_columns[0][start]
+        changes[group] = {
+            'days': np.diff(days[start:end], prepend=0).tolist(),
+            'scores': scores[start:end].tolist()
+        }
+    return changes
+
+def build_history_payload(indicators: pd.DataFrame, questions: pd.DataFrame) -> Dict:
+    """Build the mood history document from the backfilled series and question scores"""
+    payload = {'version': ARTIFACT_VERSION, 'questions': {}}
+    if questions.empty:
+        return payload
+    
+    series_changes = _score_changes(indicators, ['question', 'series_id'])
+    for question_id, changes in _score_changes(questions, ['question']).items():
+        payload['questions'][question_id] = dict(changes, series={
+            series_id: series_history
+            for (question, series_id), series_history in series_changes.items() if question == question_id
+        })
+    return payload
+
+def encode_payload(payload: Dict) -> bytes:
+    """Serialize a document compactly and deterministically"""
+    return json.dumps(payload, separators=(',', ':'), sort_keys=True, allow_nan=False).encode('utf-8')
+
+def content_hash(data: bytes) -> str:
+    """Short content hash used in artifact file names"""
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+def write_artifact(path: Path, data: bytes, overwrite: bool = False):
+    """Write a file and its precompressed siblings, skipping files that already exist"""
+    variants = [(path, lambda data: data)]
+    variants += [(path.with_name(path.name + suffix), compress) for suffix, compress in COMPRESSORS.items()]
+    for variant_path, encode in variants:
+        if overwrite or not variant_path.exists():
+            with atomic_write(variant_path, 'wb') as f:
+                f.write(encode(data))
+
+def write_hashed(output_dir: Path, stem: str, data: bytes) -> str:
+    """Write a content-addressed file and return its path relative to output_dir"""
+    filename = f"{stem}.{content_hash(data)}.json"
+    write_artifact(output_dir / filename, data)
+    return filename
+
+def write_shards(output_dir: Path, payloads: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Write one shard per group and return the manifest entries (file, hash, series)"""
+    entries = {}
+    for group_id, payload in sorted(payloads.items()):
+        data = encode_payload(payload)
+        entries[group_id] = {
+            'file': write_hashed(output_dir, f"{SHARDS_DIRNAME}/{OBSERVATIONS_STEM}", data),
+            'hash': content_hash(data),
+            'series': sorted(payload['series'])
+        }
+    return entries
+
+def update_shards(output_dir: Path, observations_payload: Dict, groups: Dict[str, List[str]],
+                  previous: Dict[str, Dict], changed: Set[str]) -> Dict[str, Dict]:
+    """
+    Manifest entries of every group's shard, writing only the shards whose
+    series changed and reusing the previous entries of the others
+    """
+    all_series = observations_payload['series']
+    entries = {}
+    stale = {}
+    for group_id, series_ids in groups.items():
+        present = sorted(series_id for series_id in series_ids if series_id in all_series)
+        entry = previous.get(group_id)
+        if entry is not None and entry['series'] == present and not changed.intersection(present) and \
+                (output_dir / entry['file']).exists():
+            entries[group_id] = entry
+        else:
+            stale[group_id] = series_ids
+    
+    entries.update(write_shards(output_dir, build_shard_payloads(observations_payload, stale)))
+    return dict(sorted(entries.items()))
+
+def merge_questions(question_ids: List[str], rescored: Iterable[str], current: Dict, previous: Dict) -> Dict:
+    """Per-question entries in question order, from current for rescored questions and previous for the rest"""
+    merged = {}
+    for question_id in question_ids:
+        entry = current.get(question_id) if question_id in rescored else previous.get(question_id)
+        if entry is not None:
+            merged[question_id] = entry
+    return merged
+
+def load_manifest(output_dir: Path) -> Optional[Dict]:
+    """The manifest of the last export, or None if there is none"""
+    try:
+        return json.loads((output_dir / MANIFEST_FILENAME).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+def load_previous_export(output_dir: Path, manifest: Optional[Dict]) -> Optional[Dict]:
+    """The manifest, scores and mood history of the last export, or None if they cannot be reused"""
+    if manifest is None or manifest.get('version') != ARTIFACT_VERSION:
+        return None
+    try:
+        return {
+            'manifest': manifest,
+            'scores': json.loads((output_dir / manifest['scores']).read_text(encoding='utf-8')),
+            'history': json.loads((output_dir / manifest['history']).read_text(encoding='utf-8'))
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+
+def manifest_files(manifest: Dict) -> List[str]:
+    """Every data file a manifest references"""
+    files = [manifest[key] for key in ('observations', 'metadata', 'scores', 'history') if manifest.get(key)]
+    for entries in manifest.get('shards', {}).values():
+        files.extend(entry['file'] for entry in entries.values())
+    return files
+
+def prune_stale_artifacts(output_dir: Path, manifest: Dict, previous_manifest: Optional[Dict] = None) -> int:
+    """
+    Remove files of earlier exports (and their compressed siblings) that no manifest references
+    
+    Files of the previous manifest are kept for one more export, so clients
+    that loaded it before the new one was written can still fetch them.
+    """
+    current = set(manifest_files(manifest))
+    if previous_manifest is not None:
+        current.update(manifest_files(previous_manifest))
+    removed = 0
+    stems = (OBSERVATIONS_STEM, METADATA_STEM, SCORES_STEM, HISTORY_STEM)
+    for pattern in [f"{stem}.*.json*" for stem in stems] + [f"{SHARDS_DIRNAME}/*.json*"]:
+        for path in output_dir.glob(pattern):
+            filename = path.relative_to(output_dir).as_posix()
+            for suffix in COMPRESSED_SUFFIXES:
+                filename = filename[:-len(suffix)] if filename.endswith(suffix) else filename
+            if filename not in current:
+                path.unlink()
+                removed += 1
+    return removed
+
+def size_report(output_dir: Path, filenames: List[str]) -> Dict[str, Dict[str, int]]:
+    """Byte size of each file and of its precompressed siblings"""
+    report = {}
+    for filename in dict.fromkeys(filenames):
+        path = output_dir / filename
+        sizes = {'raw': path.stat().st_size}
+        for suffix in COMPRESSORS:
+            sibling = path.with_name(path.name + suffix)
+            if sibling.exists():
+                sizes[suffix] = sibling.stat().st_size
+        report[filename] = sizes
+    return report
+
+def format_size_report(report: Dict[str, Dict[str, int]]) -> List[str]:
+    """Lines of a size and compression ratio table"""
+    suffixes = list(COMPRESSORS)
+    lines = [f"{'file':<48} {'raw':>9}" + ''.join(f" {suffix:>17}" for suffix in suffixes)]
+    totals = {key: 0 for key in ['raw'] + suffixes}
+    
+    def row(name: str, sizes: Dict[str, int]) -> str:
+        line = f"{name:<48} {sizes['raw'] / 1024:>7.1f}KB"
+        for suffix in suffixes:
+            size = sizes.get(suffix)
+            line += f" {size / 1024:>7.1f}KB ({sizes['raw'] / max(size, 1):>4.1f}x)" if size else f" {'-':>17}"
+        return line
+    
+    for filename, sizes in report.items():
+        lines.append(row(filename, sizes))
+        for key in totals:
+            totals[key] += sizes.get(key, 0)
+    lines.append(row('total', totals))
+    return lines
+
+def export_frontend_data(store: ObservationStore, output_dir: Union[str, Path],
+                         questions_file: Optional[Union[str, Path]] = None,
+                         rules_file: Union[str, Path] = DEFAULT_RULES_FILE,
+                         changed_series: Optional[Iterable[str]] = None, full: bool = False) -> Dict:
+    """
+    Export the store's observations and series metadata for the web app
+    
+    Args:
+        store: Observation store to export
+        output_dir: Directory the web app serves its data from
+        questions_file: src/data/questions.ts, for the per-question shards
+        rules_file: Mood rule table the scores are computed with
+        changed_series: Series the caller wrote since the last export, only
+            used to warn about series changed by something else; what is
+            rescored is decided by the content hashes in the previous manifest
+        full: Score every question and rewrite every shard
+    
+    Returns:
+        The manifest that was written, with the size report of every file
+        (raw and per compressed suffix) under 'sizes' and the questions that
+        were scored again under 'rescored'
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    observations = store.load(columns=['series_id', 'date', 'value']) if store.exists() else pd.DataFrame(
+        columns=['series_id', 'date', 'value'])
+    metadata = load_series_metadata(series_metadata_path(store.path))
+    
+    observations_payload = build_observations_payload(observations)
+    observations_data = encode_payload(observations_payload)
+    metadata_data = encode_payload(build_metadata_payload(metadata, observations_payload))
+    
+    questions: Dict[str, List[str]] = {}
+    if questions_file is not None:
+        try:
+            questions = load_questions(questions_file)
+        except OSError as e:
+            logger.warning(f"No question shards, could not read {questions_file}: {e}")
+    
+    frequencies: Dict[str, str] = {}
+    for row in metadata.to_dict('records'):
+        if row.get('update_frequency'):
+            frequencies[row['series_id']] = row['update_frequency']
+    
+    rules = compile_rules(rules_file)
+    series_hashes = {
+        series_id: content_hash(encode_payload(columns))
+        for series_id, columns in observations_payload['series'].items()
+    }
+    scoring_inputs = content_hash(encode_payload({
+        'rules': [asdict(rule) for rule in rules.rules],
+        'questions': questions,
+        'frequencies': frequencies
+    }))
+    
+    # Work out what changed since the previous export
+    previous_manifest = load_manifest(output_dir)
+    previous = None if full else load_previous_export(output_dir, previous_manifest)
+    if previous is not None and previous['manifest'].get('scoring_inputs') != scoring_inputs:
+        logger.info("Rules, questions or frequencies changed, scoring every question")
+        previous = None
+    
+    if previous is None:
+        changed = set(series_hashes)
+        previous = {'manifest': {'shards': {}}, 'scores': {'questions': {}}, 'history': {'questions': {}}}
+    else:
+        old_hashes = previous['manifest'].get('series', {})
+        # The content hash is the judge: a series the refresh wrote again with
+        # the same rows (e.g. with --force) is not rescored
+        changed = {
+            series_id for series_id in set(series_hashes) | set(old_hashes)
+            if series_hashes.get(series_id) != old_hashes.get(series_id)
+        }
+        unreported = changed - set(changed_series) if changed_series is not None else set()
+        if unreported:
+            logger.warning(f"Series changed outside this refresh: {', '.join(sorted(unreported))}")
+    
+    rescored = {
+        question_id: series_ids for question_id, series_ids in questions.items()
+        if changed.intersection(series_ids) or question_id not in previous['scores']['questions']
+        or question_id not in previous['history']['questions']
+    }
+    rescored_series = {series_id for series_ids in rescored.values() for series_id in series_ids}
+    rescored_observations = observations[observations['series_id'].isin(rescored_series)]
+    rescored_rules = rules.for_questions(rescored)
+    
+    scores = score_questions(rescored_observations, rescored, frequencies, rules=rescored_rules)
+    history = build_history_payload(*backfill_mood_history(rescored_observations, rescored, frequencies,
+                                                           rescored_rules))
+    # The other questions keep their previous scores and history
+    for document, previous_document in [(scores, previous['scores']), (history, previous['history'])]:
+        document['questions'] = merge_questions(list(questions), rescored, document['questions'],
+                                                previous_document['questions'])
+    scores_data = encode_payload(scores)
+    history_data = encode_payload(history)
+    
+    previous_shards = previous['manifest']['shards']
+    manifest = {
+        'version': ARTIFACT_VERSION,
+        'generated_at': datetime.now().isoformat(),
+        'observations': write_hashed(output_dir, OBSERVATIONS_STEM, observations_data),
+        'metadata': write_hashed(output_dir, METADATA_STEM, metadata_data),
+        'scores': write_hashed(output_dir, SCORES_STEM, scores_data),
+        'history': write_hashed(output_dir, HISTORY_STEM, history_data),
+        'series_count': len(observations_payload['series']),
+        'scoring_inputs': scoring_inputs,
+        'series': series_hashes,
+        'shards': {
+            'question': update_shards(output_dir, observations_payload, questions,
+                                      previous_shards.get('question', {}), changed)
+        }
+    }
+    
+    # The manifest goes last, so it never points at a file that is not there yet
+    write_artifact(output_dir / MANIFEST_FILENAME, json.dumps(manifest, indent=2).encode('utf-8'), overwrite=True)
+    
+    removed = prune_stale_artifacts(output_dir, manifest, previous_manifest)
+    logger.info(f"Exported {manifest['series_count']} series to {output_dir / manifest['observations']} "
+                f"({len(observations_data)} bytes), {len(changed)} changed, {len(rescored)} questions rescored, "
+                f"removed {removed} stale files")
+    
+    return dict(manifest, sizes=size_report(output_dir, manifest_files(manifest) + [MANIFEST_FILENAME]),
+                rescored=sorted(rescored))
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Export FRED data as compact files for the web app')
+    parser.add_argument('--csv-file', type=str, default='data/fred_data.csv',
+                       help='Path to the data store (its extension selects the backend)')
+    parser.add_argument('--store', type=str, choices=sorted(STORE_BACKENDS),
+                       help='Storage backend; overrides the extension of --csv-file')
+    parser.add_argument('--output-dir', type=str, default='public/data',
+                       help='Directory the web app serves its data from')
+    parser.add_argument('--questions-file', type=str, default='src/data/questions.ts',
+                       help='Question definitions to write per-question shards for')
+    parser.add_argument('--rules-file', type=str, default='mood_rules.json',
+                       help='Mood score rule table')
+    parser.add_argument('--full', action='store_true',
+                       help='Score every question and rewrite every shard, not only those with changed series')
+    
+    args = parser.parse_args()
+    
+    store = open_store(args.csv_file, args.store)
+    if not store.exists():
+        print(f"❌ Data file not found: {store.path}")
+        exit(1)
+    
+    manifest = export_frontend_data(store, args.output_dir, args.questions_file, args.rules_file, full=args.full)
+    store.close()
+    
+    shard_entries = [entry for entries in manifest['shards'].values() for entry in entries.values()]
+    print(f"📦 Exported {manifest['series_count']} series and {len(shard_entries)} shards "
+          f"({len({entry['file'] for entry in shard_entries})} files) to {args.output_dir}")
+    print(f"🔁 Scored {len(manifest['rescored'])} questions again: {', '.join(manifest['rescored']) or 'none'}")
+    if brotli is None:
+        print("⚠️  brotli is not installed, wrote .gz variants only (pip install brotli)")
+    print()
+    for line in format_size_report(manifest['sizes']):
+        print(f"   {line}")
+
+if __name__ == "__main__":
+    main()
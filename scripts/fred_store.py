@@ -0,0 +1,636 @@
+#!/usr/bin/env python3
+"""
+Storage layout for the local FRED database
+
+Data is kept in two normalized tables:
+- observations (`data/fred_data.csv`): one narrow row per observation
+  (series_id, date, value, last_updated)
+- series metadata (`data/series_metadata.csv`): one row per series with the
+  schema fields (name, description, messages, ...) and the FRED title,
+  frequency, units and notes
+
+Older versions of the refresh script wrote every metadata field on every
+observation row. `scripts/migrate_csv_store.py` converts such a file.
+
+Observations can be kept in different backends, chosen by file extension or
+explicitly by name (see STORE_BACKENDS):
+- csv: a single CSV file (the default)
+- parquet: a directory of Parquet files partitioned by series_id, with
+  dictionary-encoded series IDs, date32 dates and float64 values. Reads
+  only open the partitions and row groups that match the requested series
+  and date range. Appends rewrite the series' partition, replacing stored
+  rows with the same date. Requires pyarrow.
+- sqlite: a SQLite database in WAL mode with a (series_id, date) primary
+  key. Writes are upserts, so re-fetched or revised observations overwrite
+  the stored value instead of adding duplicate rows.
+
+Writes are crash-safe: the CSV file and Parquet partitions are rewritten
+through a temporary file, fsync and rename (see atomic_io), so readers only
+ever see a complete file, and SQLite commits through its write-ahead log.
+"""
+
+import io
+import logging
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+from atomic_io import atomic_path, atomic_write, file_lock, read_complete_lines
+
+logger = logging.getLogger(__name__)
+
+OBSERVATION_COLUMNS = ['series_id', 'date', 'value', 'last_updated']
+
+SERIES_METADATA_COLUMNS = [
+    'series_id', 'name', 'description', 'category', 'units', 'update_frequency',
+    'yay_message', 'meh_message', 'nay_message',
+    'fred_title', 'fred_frequency', 'fred_units', 'fred_notes', 'fred_last_updated'
+]
+
+# Columns that only appear in the legacy wide layout
+LEGACY_METADATA_COLUMNS = ['name', 'description', 'fred_title', 'fred_notes']
+
+SERIES_METADATA_FILENAME = 'series_metadata.csv'
+
+def series_metadata_path(observations_path: Union[str, Path]) -> Path:
+    """Get the series metadata table that belongs to an observations file"""
+    return Path(observations_path).with_name(SERIES_METADATA_FILENAME)
+
+def is_legacy_wide_csv(path: Union[str, Path]) -> bool:
+    """Check whether a CSV file still uses the legacy wide layout"""
+    path = Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        return False
+    
+    header = pd.read_csv(path, nrows=0).columns
+    return any(column in header for column in LEGACY_METADATA_COLUMNS)
+
+def split_wide_frame(wide_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Split a legacy wide DataFrame into observations and series metadata
+    
+    Duplicate (series_id, date) rows are collapsed, keeping the most recently
+    written one.
+    
+    Returns:
+        (observations, series metadata)
+    """
+    observations = wide_df.reindex(columns=OBSERVATION_COLUMNS)
+    observations = observations.drop_duplicates(['series_id', 'date'], keep='last')
+    observations = observations.sort_values(['series_id', 'date'], kind='stable').reset_index(drop=True)
+    
+    # The newest row of each series carries its most recent metadata
+    metadata = wide_df.drop_duplicates('series_id', keep='last')
+    metadata = metadata.reindex(columns=SERIES_METADATA_COLUMNS)
+    metadata = metadata.sort_values('series_id').reset_index(drop=True)
+    
+    return observations, metadata
+
+def load_series_metadata(path: Union[str, Path]) -> pd.DataFrame:
+    """Load the series metadata table (empty if it does not exist)"""
+    path = Path(path)
+    if not path.exists():
+        return pd.DataFrame(columns=SERIES_METADATA_COLUMNS)
+    
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+def save_series_metadata(path: Union[str, Path], rows: List[Dict]):
+    """Write the series metadata table"""
+    df = pd.DataFrame(rows).reindex(columns=SERIES_METADATA_COLUMNS)
+    df = df.sort_values('series_id').reset_index(drop=True)
+    with atomic_write(path, newline='') as f:
+        df.to_csv(f, index=False)
+    logger.info(f"Wrote metadata for {len(df)} series to {path}")
+
+@dataclass
+class SeriesSummary:
+    """What the refresh needs to know about one stored series"""
+    last_date: str
+    row_count: int
+    last_value: Optional[float]
+
+class SeriesIndex:
+    """
+    Per-series summary of the observations table
+    
+    Built once from the stored observations and kept up to date as rows are
+    written, so looking up a series' last date does not scan the table.
+    """
+    
+    def __init__(self, entries: Optional[Dict[str, SeriesSummary]] = None):
+        self._entries: Dict[str, SeriesSummary] = entries or {}
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'SeriesIndex':
+        """Summarize a frame with series_id, date and value columns"""
+        if df.empty:
+            return cls()
+        
+        ordered = df.sort_values(['series_id', 'date'], kind='stable')
+        last_rows = ordered.drop_duplicates('series_id', keep='last')
+        counts = ordered['series_id'].value_counts()
+        values = pd.to_numeric(last_rows['value'], errors='coerce')
+        
+        return cls({
+            series_id: SeriesSummary(last_date, int(counts[series_id]), None if pd.isna(value) else float(value))
+            for series_id, last_date, value in zip(last_rows['series_id'], last_rows['date'], values)
+        })
+    
+    def __contains__(self, series_id: str) -> bool:
+        return series_id in self._entries
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, series_id: str) -> Optional[SeriesSummary]:
+        """Get the summary of a series (None if it has no stored observations)"""
+        return self._entries.get(series_id)
+    
+    def last_date(self, series_id: str) -> Optional[str]:
+        """Get the newest stored observation date of a series"""
+        summary = self._entries.get(series_id)
+        return summary.last_date if summary else None
+    
+    def update(self, df: pd.DataFrame, upsert: bool = False):
+        """
+        Account for appended observation rows
+        
+        Args:
+            df: Rows that were just written
+            upsert: The store overwrote existing dates; only rows after the
+                previous last date are counted as new
+        """
+        for series_id, rows in df.groupby('series_id', sort=False):
+            previous = self._entries.get(series_id)
+            added = rows
+            if upsert and previous is not None:
+                added = rows[rows['date'] > previous.last_date]
+            
+            newest = rows.loc[rows['date'].idxmax()]
+            if previous is not None and previous.last_date > newest['date']:
+                last_date, last_value = previous.last_date, previous.last_value
+            else:
+                value = pd.to_numeric(pd.Series([newest['value']]), errors='coerce').iloc[0]
+                last_date, last_value = newest['date'], None if pd.isna(value) else float(value)
+            
+            row_count = (previous.row_count if previous else 0) + len(added)
+            self._entries[series_id] = SeriesSummary(last_date, row_count, last_value)
+    
+    def replace(self, series_id: str, df: pd.DataFrame):
+        """Account for a series whose observations were replaced"""
+        self._entries.pop(series_id, None)
+        if not df.empty:
+            self.update(df)
+
+class ObservationStore:
+    """Base class for observation storage backends"""
+    
+    name = ''
+    suffixes: Tuple[str, ...] = ()
+    # Whether append() overwrites existing (series_id, date) rows instead of duplicating them
+    supports_upsert = False
+    # Whether appends only become durable when the surrounding transaction() commits
+    transactional = False
+    
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._pending_replacements: Dict[str, pd.DataFrame] = {}
+        self._batching = False
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Group the writes made inside the block
+        
+        Series replacements are held back and written together when the block
+        exits without an error.
+        """
+        if self._batching:
+            yield
+            return
+        
+        self._batching = True
+        try:
+            yield
+            self.flush()
+        finally:
+            self._batching = False
+            self._discard_pending()
+    
+    def _discard_pending(self):
+        """Drop the writes a failed transaction held back"""
+        self._pending_replacements = {}
+    
+    def flush(self):
+        """Write any series replacements held back by transaction()"""
+        if not self._pending_replacements:
+            return
+        
+        pending, self._pending_replacements = self._pending_replacements, {}
+        self._write_replacements(pending)
+    
+    def close(self):
+        """Release any open handles"""
+    
+    def exists(self) -> bool:
+        """Check whether the store holds any data yet"""
+        return self.path.exists()
+    
+    def load(self, series_ids: Optional[Sequence[str]] = None, start_date: Optional[str] = None,
+             end_date: Optional[str] = None, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Load observations
+        
+        Args:
+            series_ids: Only load these series (default: all)
+            start_date: Only load observations on or after this date (YYYY-MM-DD)
+            end_date: Only load observations on or before this date (YYYY-MM-DD)
+            columns: Only load these columns (default: all observation columns)
+        
+        Returns:
+            DataFrame with dates as YYYY-MM-DD strings
+        """
+        raise NotImplementedError
+    
+    def series_index(self) -> SeriesIndex:
+        """Summarize every stored series"""
+        if not self.exists():
+            return SeriesIndex()
+        return SeriesIndex.from_frame(self.load(columns=['series_id', 'date', 'value']))
+    
+    def append(self, df: pd.DataFrame):
+        """Append observation rows"""
+        raise NotImplementedError
+    
+    def replace_series(self, series_id: str, df: pd.DataFrame):
+        """Replace every stored observation of a series with the given rows"""
+        if self._batching:
+            self._pending_replacements[series_id] = df
+        else:
+            self._write_replacements({series_id: df})
+    
+    def _write_replacements(self, frames: Dict[str, pd.DataFrame]):
+        """Replace the stored observations of each series with its frame"""
+        raise NotImplementedError
+
+def _filter_frame(df: pd.DataFrame, series_ids: Optional[Sequence[str]],
+                  start_date: Optional[str], end_date: Optional[str]) -> pd.DataFrame:
+    """Apply series and date filters to an already loaded frame"""
+    mask = pd.Series(True, index=df.index)
+    if series_ids is not None:
+        mask &= df['series_id'].isin(list(series_ids))
+    if start_date is not None:
+        mask &= df['date'] >= start_date
+    if end_date is not None:
+        mask &= df['date'] <= end_date
+    return df[mask] if not mask.all() else df
+
+class CsvObservationStore(ObservationStore):
+    """
+    Observations in a single CSV file
+    
+    Every write rewrites the file through atomic_write, under a lock shared by
+    all writers. Inside a transaction, appends and replacements are held back
+    and written together in one rewrite when it commits.
+    """
+    
+    name = 'csv'
+    suffixes = ('.csv',)
+    transactional = True
+    
+    def __init__(self, path: Union[str, Path]):
+        super().__init__(path)
+        self._pending_appends: List[pd.DataFrame] = []
+    
+    def exists(self) -> bool:
+        return self.path.exists() and self.path.stat().st_size > 0
+    
+    def load(self, series_ids=None, start_date=None, end_date=None, columns=None) -> pd.DataFrame:
+        if not self.exists():
+            return pd.DataFrame()
+        contents = read_complete_lines(self.path)
+        if not contents:
+            return pd.DataFrame()
+        
+        # Filtering needs the filter columns even when they are not requested
+        usecols = None
+        if columns is not None:
+            usecols = list(dict.fromkeys(list(columns) + ['series_id', 'date']))
+        
+        df = pd.read_csv(io.BytesIO(contents), usecols=usecols, dtype={'series_id': str, 'date': str})
+        df = _filter_frame(df, series_ids, start_date, end_date)
+        
+        if columns is not None:
+            df = df[list(columns)]
+        return df
+    
+    def append(self, df: pd.DataFrame):
+        if self._batching:
+            self._pending_appends.append(df)
+        else:
+            self._rewrite([df], {})
+    
+    def flush(self):
+        appends, self._pending_appends = self._pending_appends, []
+        replacements, self._pending_replacements = self._pending_replacements, {}
+        if appends or replacements:
+            self._rewrite(appends, replacements)
+    
+    def _discard_pending(self):
+        super()._discard_pending()
+        self._pending_appends = []
+    
+    def _write_replacements(self, frames: Dict[str, pd.DataFrame]):
+        self._rewrite([], frames)
+    
+    def _rewrite(self, appends: List[pd.DataFrame], replacements: Dict[str, pd.DataFrame]):
+        """Write the stored rows plus appended rows, with replaced series swapped out, in one atomic rewrite"""
+        with file_lock(self.path):
+            kept = [
+                df[~df['series_id'].isin(list(replacements))]
+                for df in [self.load(), *appends] if not df.empty
+            ]
+            frames = [df.reindex(columns=OBSERVATION_COLUMNS) for df in kept + list(replacements.values())]
+            combined = pd.concat(frames, ignore_index=True)
+            with atomic_write(self.path, newline='') as f:
+                combined.to_csv(f, index=False)
+        
+        if replacements:
+            logger.info(f"Replaced {len(replacements)} series in one rewrite of {self.path}")
+
+def _require_pyarrow():
+    """Import pyarrow for the Parquet backend"""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The parquet store requires pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+class ParquetObservationStore(ObservationStore):
+    """Observations in a directory of Parquet files partitioned by series_id"""
+    
+    name = 'parquet'
+    suffixes = ('.parquet',)
+    supports_upsert = True
+    
+    def __init__(self, path: Union[str, Path]):
+        super().__init__(path)
+        self.pa = _require_pyarrow()
+        self.schema = self.pa.schema([
+            ('date', self.pa.date32()),
+            ('value', self.pa.float64()),
+            ('last_updated', self.pa.string()),
+        ])
+    
+    def _partition_path(self, series_id: str) -> Path:
+        return self.path / f"series_id={series_id}" / 'data.parquet'
+    
+    def exists(self) -> bool:
+        return self.path.is_dir() and any(self.path.glob('series_id=*/data.parquet'))
+    
+    def _to_table(self, df: pd.DataFrame):
+        """Convert observation rows of one series to an Arrow table"""
+        frame = pd.DataFrame({
+            'date': pd.to_datetime(df['date']).dt.date,
+            'value': pd.to_numeric(df['value'], errors='coerce').astype('float64'),
+            'last_updated': df['last_updated'].astype('string') if 'last_updated' in df else None,
+        })
+        frame = frame.sort_values('date', kind='stable')
+        return self.pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False)
+    
+    def _write_partition(self, series_id: str, table):
+        """Write one series partition through a temporary file and rename"""
+        with atomic_path(self._partition_path(series_id), suffix='.parquet') as tmp_path:
+            self.pa.parquet.write_table(table, tmp_path)
+    
+    def _read_partition(self, series_id: str):
+        path = self._partition_path(series_id)
+        if not path.exists():
+            return None
+        return self.pa.parquet.read_table(path, schema=self.schema)
+    
+    def load(self, series_ids=None, start_date=None, end_date=None, columns=None) -> pd.DataFrame:
+        if not self.exists():
+            return pd.DataFrame()
+        
+        ds = self.pa.dataset
+        # series_id comes from the partition directories, dictionary-encoded
+        partitioning = ds.HivePartitioning.discover(infer_dictionary=True)
+        dataset = ds.dataset(self.path, format='parquet', partitioning=partitioning)
+        
+        # Predicates are pushed down to partition pruning and row-group statistics
+        expression = None
+        conditions = []
+        if series_ids is not None:
+            conditions.append(ds.field('series_id').isin(list(series_ids)))
+        if start_date is not None:
+            conditions.append(ds.field('date') >= self.pa.scalar(pd.Timestamp(start_date).date(), self.pa.date32()))
+        if end_date is not None:
+            conditions.append(ds.field('date') <= self.pa.scalar(pd.Timestamp(end_date).date(), self.pa.date32()))
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        
+        read_columns = list(columns) if columns is not None else OBSERVATION_COLUMNS
+        table = dataset.to_table(columns=read_columns, filter=expression)
+        
+        df = table.to_pandas()
+        if 'series_id' in df:
+            df['series_id'] = df['series_id'].astype(str)
+        if 'date' in df:
+            df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
+        return df
+    
+    def append(self, df: pd.DataFrame):
+        for series_id, rows in df.groupby('series_id', sort=False):
+            existing = self._read_partition(series_id)
+            if existing is not None:
+                # Appended rows win over stored ones with the same date, like SQLite's upsert
+                rows = pd.concat([existing.to_pandas(), rows.reindex(columns=['date', 'value', 'last_updated'])],
+                                 ignore_index=True)
+                rows['date'] = pd.to_datetime(rows['date'])
+                rows = rows.drop_duplicates(['date'], keep='last')
+            self._write_partition(series_id, self._to_table(rows))
+    
+    def _write_replacements(self, frames: Dict[str, pd.DataFrame]):
+        # Each series only touches its own partition
+        for series_id, df in frames.items():
+            self._write_partition(series_id, self._to_table(df))
+
+class SqliteObservationStore(ObservationStore):
+    """Observations in a SQLite database keyed by (series_id, date)"""
+    
+    name = 'sqlite'
+    suffixes = ('.sqlite', '.sqlite3', '.db')
+    supports_upsert = True
+    transactional = True
+    
+    UPSERT_SQL = (
+        "INSERT INTO observations (series_id, date, value, last_updated) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(series_id, date) DO UPDATE SET "
+        "value = excluded.value, last_updated = excluded.last_updated"
+    )
+    
+    def __init__(self, path: Union[str, Path]):
+        super().__init__(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._in_transaction = False
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS observations ("
+                "series_id TEXT NOT NULL, "
+                "date TEXT NOT NULL, "
+                "value REAL, "
+                "last_updated TEXT, "
+                "PRIMARY KEY (series_id, date)"
+                ") WITHOUT ROWID"
+            )
+            self._conn.commit()
+        return self._conn
+    
+    @contextmanager
+    def transaction(self):
+        conn = self._connect()
+        if self._in_transaction:
+            yield
+            return
+        
+        self._in_transaction = True
+        try:
+            with conn:
+                yield
+        finally:
+            self._in_transaction = False
+    
+    @contextmanager
+    def _write(self):
+        """Commit a write immediately unless a run-wide transaction is open"""
+        conn = self._connect()
+        if self._in_transaction:
+            yield conn
+        else:
+            with conn:
+                yield conn
+    
+    def close(self):
+        if self._conn is not None:
+            # Fold the write-ahead log back into the database file
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+            self._conn = None
+    
+    def exists(self) -> bool:
+        if not self.path.exists():
+            return False
+        row = self._connect().execute("SELECT 1 FROM observations LIMIT 1").fetchone()
+        return row is not None
+    
+    def load(self, series_ids=None, start_date=None, end_date=None, columns=None) -> pd.DataFrame:
+        if not self.path.exists():
+            return pd.DataFrame()
+        
+        select_columns = list(columns) if columns is not None else OBSERVATION_COLUMNS
+        unknown = set(select_columns) - set(OBSERVATION_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown observation columns: {', '.join(sorted(unknown))}")
+        
+        conditions = []
+        params: List = []
+        if series_ids is not None:
+            series_ids = list(series_ids)
+            conditions.append(f"series_id IN ({', '.join('?' for _ in series_ids)})")
+            params.extend(series_ids)
+        if start_date is not None:
+            conditions.append("date >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append("date <= ?")
+            params.append(end_date)
+        
+        query = f"SELECT {', '.join(select_columns)} FROM observations"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY series_id, date"
+        
+        return pd.read_sql_query(query, self._connect(), params=params)
+    
+    def series_index(self) -> SeriesIndex:
+        if not self.path.exists():
+            return SeriesIndex()
+        
+        # The primary key makes this a single ordered pass over the table
+        rows = self._connect().execute(
+            "SELECT o.series_id, o.date, o.value, s.row_count FROM observations o "
+            "JOIN (SELECT series_id, MAX(date) AS last_date, COUNT(*) AS row_count "
+            "FROM observations GROUP BY series_id) s "
+            "ON o.series_id = s.series_id AND o.date = s.last_date"
+        ).fetchall()
+        return SeriesIndex({
+            series_id: SeriesSummary(last_date, row_count, value)
+            for series_id, last_date, value, row_count in rows
+        })
+    
+    def _rows(self, df: pd.DataFrame):
+        frame = df.reindex(columns=OBSERVATION_COLUMNS)
+        values = pd.to_numeric(frame['value'], errors='coerce')
+        return zip(
+            frame['series_id'].astype(str),
+            frame['date'].astype(str),
+            values.astype(object).where(values.notna(), None),
+            frame['last_updated'].astype(object).where(frame['last_updated'].notna(), None)
+        )
+    
+    def append(self, df: pd.DataFrame):
+        with self._write() as conn:
+            conn.executemany(self.UPSERT_SQL, self._rows(df))
+    
+    def _write_replacements(self, frames: Dict[str, pd.DataFrame]):
+        with self._write() as conn:
+            for series_id, df in frames.items():
+                conn.execute("DELETE FROM observations WHERE series_id = ?", (series_id,))
+                conn.executemany(self.UPSERT_SQL, self._rows(df))
+
+STORE_BACKENDS = {
+    CsvObservationStore.name: CsvObservationStore,
+    ParquetObservationStore.name: ParquetObservationStore,
+    SqliteObservationStore.name: SqliteObservationStore,
+}
+
+def store_path_for_backend(path: Union[str, Path], backend: str) -> Path:
+    """Swap the file extension of a store path to match a backend"""
+    path = Path(path)
+    store_class = STORE_BACKENDS[backend]
+    if path.suffix in store_class.suffixes:
+        return path
+    return path.with_suffix(store_class.suffixes[0])
+
+def open_store(path: Union[str, Path], backend: Optional[str] = None) -> ObservationStore:
+    """
+    Open an observation store
+    
+    Args:
+        path: Store location; its extension selects the backend when none is given
+        backend: Backend name from STORE_BACKENDS
+    """
+    path = Path(path)
+    
+    if backend is None:
+        backend = next(
+            (name for name, store_class in STORE_BACKENDS.items() if path.suffix in store_class.suffixes),
+            CsvObservationStore.name
+        )
+    elif backend not in STORE_BACKENDS:
+        raise ValueError(f"Unknown store backend '{backend}'. Valid: {', '.join(STORE_BACKENDS)}")
+    
+    return STORE_BACKENDS[backend](store_path_for_backend(path, backend))
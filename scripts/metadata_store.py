@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Local store of FRED series metadata
+
+Series titles, frequency, units and notes almost never change, so they are
+kept in a JSON file next to the data and only re-fetched from the API when:
+- the series has never been fetched
+- the stored copy is older than the refresh interval (weekly by default)
+- a release of the series (from the release calendar) has come out since the
+  stored `last_updated`; a release can revise existing observations without
+  adding any dates
+- a fetch returned observations past the stored `observation_end`, which means
+  FRED has published new data since the stored `last_updated`
+"""
+
+import json
+import logging
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Union
+
+from atomic_io import atomic_write
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_INTERVAL_DAYS = 7
+
+class SeriesMetadataStore:
+    """JSON-backed store of FRED series metadata with its own refresh interval"""
+    
+    def __init__(self, path: Union[str, Path], refresh_interval_days: float = DEFAULT_REFRESH_INTERVAL_DAYS):
+        self.path = Path(path)
+        self.refresh_interval = timedelta(days=refresh_interval_days)
+        self._entries: Dict[str, Dict] = {}
+        self._dirty = False
+        self.load()
+    
+    def load(self):
+        """Load stored metadata from disk"""
+        if not self.path.exists():
+            self._entries = {}
+            return
+        
+        try:
+            with open(self.path, 'r') as f:
+                self._entries = json.load(f).get('series', {})
+            logger.info(f"Loaded stored metadata for {len(self._entries)} series")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load metadata store {self.path}, starting empty: {e}")
+            self._entries = {}
+    
+    def get(self, series_id: str) -> Dict:
+        """Get the stored FRED metadata for a series ({} if unknown)"""
+        entry = self._entries.get(series_id)
+        return dict(entry['metadata']) if entry else {}
+    
+    def needs_refresh(self, series_id: str, latest_observation_date: Optional[str] = None,
+                      release_dates: Sequence[str] = (), today: Optional[date] = None) -> bool:
+        """
+        Check whether a series' metadata should be fetched again
+        
+        Args:
+            series_id: FRED series identifier
+            latest_observation_date: Newest observation date just fetched (YYYY-MM-DD), if any
+            release_dates: Known release dates of the series' release (YYYY-MM-DD)
+            today: Date to compare release dates with (default: today)
+        """
+        entry = self._entries.get(series_id)
+        if not entry:
+            return True
+        
+        try:
+            fetched_at = datetime.fromisoformat(entry['fetched_at'])
+        except (KeyError, ValueError):
+            return True
+        
+        if datetime.now() - fetched_at >= self.refresh_interval:
+            return True
+        
+        # A release after FRED's last update may have revised the series even
+        # if it brought no new dates
+        last_updated = (entry['metadata'].get('last_updated') or '')[:10]
+        today_iso = (today or date.today()).isoformat()
+        if last_updated and any(last_updated < released <= today_iso for released in release_dates):
+            return True
+        
+        # New observations beyond what the stored metadata describes mean the
+        # series was updated after the stored last_updated
+        observation_end = entry['metadata'].get('observation_end')
+        if latest_observation_date and observation_end and latest_observation_date > observation_end:
+            return True
+        
+        return False
+    
+    def update(self, series_id: str, metadata: Dict):
+        """Record freshly fetched metadata for a series"""
+        if not metadata:
+            return
+        
+        previous = self._entries.get(series_id, {}).get('metadata', {})
+        if previous.get('last_updated') != metadata.get('last_updated'):
+            logger.info(f"Metadata for {series_id} last updated {metadata.get('last_updated', 'unknown')}")
+        
+        self._entries[series_id] = {
+            'fetched_at': datetime.now().isoformat(),
+            'metadata': metadata
+        }
+        self._dirty = True
+    
+    def save(self):
+        """Write the store to disk if anything changed"""
+        if not self._dirty:
+            return
+        
+        payload = json.dumps({'series': self._entries}, indent=2, sort_keys=True)
+        
+        with atomic_write(self.path) as f:
+            f.write(payload)
+        
+        self._dirty = False
+        logger.info(f"Saved metadata for {len(self._entries)} series to {self.path}")
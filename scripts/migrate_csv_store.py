@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+CSV Store Migration Script
+
+Converts a legacy wide FRED CSV, where every observation row repeats the
+metric name, description, mood messages and FRED title/units/notes, into the
+normalized layout:
+- a narrow observations file (series_id, date, value, last_updated)
+- a small series metadata table (series_metadata.csv next to it)
+
+Duplicate (series_id, date) rows are collapsed, keeping the last one written.
+The observations can also be written to another storage backend, which works
+for normalized CSV files too.
+
+Usage:
+    python scripts/migrate_csv_store.py [--csv-file PATH] [--output PATH] [--store BACKEND] [--backup]
+
+Examples:
+    python scripts/migrate_csv_store.py --csv-file data/fred_data.csv --backup
+    python scripts/migrate_csv_store.py --csv-file data/fred_data.csv --store parquet
+"""
+
+import argparse
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+from atomic_io import atomic_write
+from fred_store import (
+    STORE_BACKENDS, CsvObservationStore, is_legacy_wide_csv, open_store, save_series_metadata,
+    series_metadata_path, split_wide_frame
+)
+
+def format_size(num_bytes: int) -> str:
+    """Format a byte count for display"""
+    if num_bytes >= 1024 * 1024:
+        return f"{num_bytes / (1024 * 1024):.2f} MB"
+    return f"{num_bytes / 1024:.1f} KB"
+
+def store_size(path: Path) -> int:
+    """Total size of a store file or directory"""
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
+    return path.stat().st_size
+
+def write_observations(observations: pd.DataFrame, target: Path, backend: str = None) -> Path:
+    """Write observations to a store, replacing anything it held for those series"""
+    store = open_store(target, backend)
+    
+    if isinstance(store, CsvObservationStore):
+        # The target may be the legacy file being migrated, so never truncate it in place
+        with atomic_write(store.path, newline='') as f:
+            observations.to_csv(f, index=False)
+    else:
+        with store.transaction():
+            for series_id, rows in observations.groupby('series_id', sort=False):
+                store.replace_series(series_id, rows)
+    
+    store.close()
+    return store.path
+
+def migrate_csv_store(csv_file: str, output_file: str = None, backup: bool = False, backend: str = None) -> bool:
+    """Convert a wide CSV into the normalized observations and metadata tables"""
+    source = Path(csv_file)
+    target = Path(output_file) if output_file else source
+    metadata_target = series_metadata_path(target)
+    
+    if not source.exists():
+        print(f"❌ Data file not found: {source}")
+        return False
+    
+    if not is_legacy_wide_csv(source):
+        target_path = open_store(target, backend).path
+        if target_path == source:
+            print(f"✅ {source} already uses the normalized layout, nothing to do")
+            return True
+        
+        observations = pd.read_csv(source, dtype={'series_id': str, 'date': str})
+        target_path = write_observations(observations, target, backend)
+        print(f"📤 Copied {len(observations):,} observations from {source} to {target_path} "
+              f"({format_size(store_size(target_path))})")
+        return True
+    
+    source_size = source.stat().st_size
+    wide_df = pd.read_csv(source)
+    print(f"📥 Loaded {len(wide_df):,} wide records from {source} ({format_size(source_size)})")
+    
+    observations, metadata = split_wide_frame(wide_df)
+    
+    if backup:
+        backup_path = source.with_name(f"{source.stem}_wide_backup{source.suffix}")
+        shutil.copy2(source, backup_path)
+        print(f"💾 Backed up original file to {backup_path}")
+    
+    target_path = write_observations(observations, target, backend)
+    save_series_metadata(metadata_target, metadata.to_dict('records'))
+    
+    new_size = store_size(target_path) + metadata_target.stat().st_size
+    dropped = len(wide_df) - len(observations)
+    
+    print(f"📤 Wrote {len(observations):,} observations to {target_path} ({format_size(store_size(target_path))})")
+    print(f"📤 Wrote {len(metadata)} series to {metadata_target} ({format_size(metadata_target.stat().st_size)})")
+    if dropped:
+        print(f"🧹 Removed {dropped} duplicate (series_id, date) rows")
+    print(f"📉 Total size {format_size(source_size)} → {format_size(new_size)} "
+          f"({source_size / max(new_size, 1):.1f}x smaller)")
+    return True
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Convert a wide FRED CSV into the normalized store')
+    parser.add_argument('--csv-file', type=str, default='data/fred_data.csv',
+                       help='Path to the legacy wide CSV file')
+    parser.add_argument('--output', type=str,
+                       help='Path for the observations file (default: overwrite --csv-file)')
+    parser.add_argument('--store', type=str, choices=sorted(STORE_BACKENDS),
+                       help='Storage backend for the observations (default: from the output extension)')
+    parser.add_argument('--backup', action='store_true',
+                       help='Keep a copy of the original file next to it')
+    
+    args = parser.parse_args()
+    
+    success = migrate_csv_store(args.csv_file, args.output, args.backup, args.store)
+    
+    if not success:
+        exit(1)
+
+if __name__ == "__main__":
+    main()
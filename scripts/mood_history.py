@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Mood Score History
+
+Backfills the mood of every question, and of each of its series, at every
+historical observation date, for mood history charts:
+- a series' state on one of its observation dates is scored the way
+  mood_scoring scores it today, with only the observations up to that date
+  (the latest one at least a year earlier, or the previous one for
+  'monthly_delta' rules, within the alignment tolerance)
+- a question's score on one of its series' observation dates is the average
+  of its series' latest states; series without data yet count as Meh
+
+There is no loop over dates: the alignment engine (see alignment) finds the
+year-ago and previous observation of every observation at once, the compiled
+rule table scores every (rule, date) pair in one pass and a forward-filled
+pivot averages the questions. The export writes the result as
+fred_mood_history.<hash>.json.
+
+Usage:
+    python scripts/mood_history.py [--csv-file PATH] [--store BACKEND] [--questions-file PATH]
+                                   [--rules-file PATH] [--output-dir DIR]
+"""
+
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from atomic_io import atomic_write
+from fred_store import STORE_BACKENDS, load_series_metadata, open_store, series_metadata_path
+from alignment import PREVIOUS, YEAR_AGO, align_series
+from mood_scoring import QUESTION_MOODS, CompiledRules, compile_rules, load_questions, minimum_points
+
+INDICATOR_HISTORY_COLUMNS = ['question', 'series_id', 'date', 'score', 'change']
+QUESTION_HISTORY_COLUMNS = ['question', 'date', 'score', 'mood']
+
+def backfill_indicators(observations: pd.DataFrame, questions: Dict[str, List[str]], frequencies: Dict[str, str],
+                        rules: CompiledRules) -> pd.DataFrame:
+    """
+    Score every rule of the questions at every observation date of its series
+    
+    Returns:
+        Rows of (question, series_id, date, score, change), sorted by question,
+        series and date
+    """
+    aligned = align_series(observations, (YEAR_AGO, PREVIOUS), frequencies, series_ids=rules.series_ids)
+    if not len(aligned.values):
+        return pd.DataFrame(columns=INDICATOR_HISTORY_COLUMNS)
+    
+    # One row per rule and observation of its series
+    rule_counts = aligned.counts[rules.series]
+    rule_index = np.repeat(np.arange(len(rules)), rule_counts)
+    offsets = np.arange(len(rule_index)) - np.repeat(np.cumsum(rule_counts) - rule_counts, rule_counts)
+    positions = aligned.starts[rules.series][rule_index] + offsets
+    
+    scores, measures = rules.evaluate(aligned.values[positions],
+                                      aligned.values_at(aligned.lags[YEAR_AGO.name][positions]),
+                                      aligned.values_at(aligned.lags[PREVIOUS.name][positions]), rule_index)
+    
+    # Until a series has enough observations it scores Meh, as score_rules' "no data"
+    min_points = np.array([minimum_points(frequencies.get(series_id, 'monthly'))
+                           for series_id in aligned.series_ids], dtype=np.int64)
+    enough = offsets + 1 >= min_points[rules.series][rule_index]
+    
+    history = pd.DataFrame({
+        'question': np.array([rule.question for rule in rules.rules], dtype=object)[rule_index],
+        'series_id': aligned.series_ids[rules.series][rule_index],
+        'date': aligned.dates[positions],
+        'score': np.where(enough, scores, 0).astype(np.int8),
+        'change': np.where(enough & np.isfinite(measures), measures, np.nan)
+    })
+    history = history[history['question'].isin(list(questions))]
+    return history.sort_values(['question', 'series_id', 'date'], kind='stable').reset_index(drop=True)
+
+def backfill_questions(indicators: pd.DataFrame, questions: Dict[str, List[str]]) -> pd.DataFrame:
+    """
+    Average each question's series states at every observation date of its series
+    
+    Returns:
+        Rows of (question, date, score, mood), sorted by question and date
+    """
+    if indicators.empty:
+        return pd.DataFrame(columns=QUESTION_HISTORY_COLUMNS)
+    
+    # Each series keeps its state until its next observation
+    states = indicators.pivot(index='date', columns=['question', 'series_id'], values='score')
+    states = states.sort_index().ffill()
+    totals = states.T.groupby(level='question').sum(min_count=1).T
+    series_counts = pd.Series({question_id: len(series_ids) for question_id, series_ids in questions.items()})
+    averages = totals / series_counts[totals.columns]
+    
+    long = averages.reset_index().melt(id_vars='date', var_name='question', value_name='score')
+    dates = indicators[['question', 'date']].drop_duplicates()
+    history = dates.merge(long, on=['question', 'date'], how='left').dropna(subset=['score'])
+    
+    thresholds = [lowest for lowest, *_ in QUESTION_MOODS[:-1]]
+    history['mood'] = np.select([history['score'] >= lowest for lowest in thresholds],
+                                [mood for _, mood, *_ in QUESTION_MOODS[:-1]], QUESTION_MOODS[-1][1])
+    history['score'] = history['score'].round(4)
+    return history[QUESTION_HISTORY_COLUMNS].sort_values(['question', 'date'], kind='stable').reset_index(drop=True)
+
+def backfill_mood_history(observations: pd.DataFrame, questions: Dict[str, List[str]], frequencies: Dict[str, str],
+                          rules: Optional[CompiledRules] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Mood of every question and its series at every historical observation date
+    
+    Args:
+        observations: Stored observation rows (series_id, date, value)
+        questions: Question id -> its FRED series
+        frequencies: Series id -> schema update_frequency
+        rules: Compiled rule table (default: mood_rules.json)
+    
+    Returns:
+        (per-series history, per-question history) tables
+    """
+    rules = rules if rules is not None else compile_rules()
+    indicators = backfill_indicators(observations, questions, frequencies, rules)
+    return indicators, backfill_questions(indicators, questions)
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Backfill mood scores at every historical observation date')
+    parser.add_argument('--csv-file', type=str, default='data/fred_data.csv',
+                       help='Path to the data store (its extension selects the backend)')
+    parser.add_argument('--store', type=str, choices=sorted(STORE_BACKENDS),
+                       help='Storage backend; overrides the extension of --csv-file')
+    parser.add_argument('--questions-file', type=str, default='src/data/questions.ts',
+                       help='Question definitions to score')
+    parser.add_argument('--rules-file', type=str, default='mood_rules.json',
+                       help='Mood score rule table')
+    parser.add_argument('--output-dir', type=str, default='data',
+                       help='Directory for mood_history_series.csv and mood_history_questions.csv')
+    
+    args = parser.parse_args()
+    
+    store = open_store(args.csv_file, args.store)
+    if not store.exists():
+        print(f"❌ Data file not found: {store.path}")
+        exit(1)
+    
+    observations = store.load(columns=['series_id', 'date', 'value'])
+    metadata = load_series_metadata(series_metadata_path(store.path))
+    store.close()
+    frequencies = {
+        row['series_id']: row['update_frequency']
+        for row in metadata.to_dict('records') if row.get('update_frequency')
+    }
+    questions = load_questions(args.questions_file)
+    
+    indicators, question_history = backfill_mood_history(observations, questions, frequencies,
+                                                         compile_rules(args.rules_file))
+    
+    output_dir = Path(args.output_dir)
+    for name, table in [('mood_history_series.csv', indicators), ('mood_history_questions.csv', question_history)]:
+        with atomic_write(output_dir / name, newline='') as f:
+            table.to_csv(f, index=False)
+    
+    print(f"📈 Backfilled {len(indicators):,} series scores and {len(question_history):,} question scores "
+          f"for {len(questions)} questions to {output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Mood scoring for the wallet mood questions
+
+Scores every question in src/data/questions.ts the way mood_score_system.md
+describes, so the web app can show precomputed scores instead of scoring the
+raw series in every browser:
+- each series of a question is Yay (+1), Meh (0) or Nay (-1) by one measure
+  of its latest observation: the change from the observation a year earlier
+  in the series units ('point'), the year-over-year percent change
+  ('yoy_pct'), the current level ('level') or the change from the previous
+  observation ('monthly_delta'); the year-ago and previous observations come
+  from the alignment engine (see alignment), within its frequency tolerances
+- a question's score is the average over its series (series without enough
+  data count as Meh); +0.5 or more is Yay, less than -0.5 is Nay
+
+The thresholds live in mood_rules.json next to schema.json, one rule per
+question and series. compile_rules turns the table into flat numpy arrays so
+that every rule is evaluated in one vectorized pass; adding a metric is a
+change to the table only.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from alignment import PREVIOUS, YEAR_AGO, AlignedSeries, align_series
+
+SCORES_VERSION = 1
+RULES_VERSION = 1
+
+DEFAULT_RULES_FILE = Path(__file__).resolve().parent.parent / 'mood_rules.json'
+
+# Change types of the rule table, in the order of their compiled codes
+CHANGE_TYPES = ['point', 'yoy_pct', 'level', 'monthly_delta']
+CHANGE_CODES = {change: code for code, change in enumerate(CHANGE_TYPES)}
+
+# Condition operators and the number of thresholds each takes
+OPERATORS = {'<': 1, '<=': 1, '>': 1, '>=': 1, 'between': 2, 'outside': 2}
+OPERATOR_CODES = {op: code for code, op in enumerate(OPERATORS)}
+
+# A question object in src/data/questions.ts: its id and fredSeries list
+QUESTION_PATTERN = re.compile(r"\{\s*id:\s*'([^']+)'.*?fredSeries:\s*\[([^\]]*)\]", re.DOTALL)
+
+# A condition is (operator, threshold) or (operator, low, high)
+Condition = Tuple
+
+@dataclass
+class Rule:
+    """Yay and Nay conditions on one measure of a series in a question; anything else is Meh"""
+    question: str
+    series_id: str
+    change: str
+    yay: Condition
+    nay: Condition
+
+def parse_condition(condition, where: str) -> Condition:
+    """Check a rule table condition and return it as a tuple"""
+    if not isinstance(condition, list) or not condition or condition[0] not in OPERATORS:
+        raise ValueError(f"{where}: condition must be [operator, threshold...] "
+                         f"with an operator in {list(OPERATORS)}, got {condition!r}")
+    
+    op, thresholds = condition[0], condition[1:]
+    if len(thresholds) != OPERATORS[op]:
+        raise ValueError(f"{where}: '{op}' takes {OPERATORS[op]} threshold(s), got {len(thresholds)}")
+    if not all(isinstance(t, (int, float)) and not isinstance(t, bool) for t in thresholds):
+        raise ValueError(f"{where}: thresholds must be numbers, got {thresholds!r}")
+    return (op, *(float(t) for t in thresholds))
+
+def load_rule_table(path: Union[str, Path] = DEFAULT_RULES_FILE) -> List[Rule]:
+    """
+    Read and check mood_rules.json
+    
+    Raises:
+        ValueError: If the table has an unknown version, change type or
+            operator, a malformed condition or a duplicate rule
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        table = json.load(f)
+    
+    if table.get('version') != RULES_VERSION:
+        raise ValueError(f"{path}: unsupported rule table version {table.get('version')!r}")
+    
+    rules = []
+    seen = set()
+    for index, entry in enumerate(table.get('rules', [])):
+        where = f"{path} rule {index}"
+        missing = [field for field in ('question', 'series', 'change', 'yay', 'nay') if field not in entry]
+        if missing:
+            raise ValueError(f"{where}: missing {', '.join(missing)}")
+        if entry['change'] not in CHANGE_CODES:
+            raise ValueError(f"{where}: unknown change type '{entry['change']}', expected one of {CHANGE_TYPES}")
+        
+        key = (entry['question'], entry['series'])
+        if key in seen:
+            raise ValueError(f"{where}: duplicate rule for {key[1]} in {key[0]}")
+        seen.add(key)
+        
+        rules.append(Rule(entry['question'], entry['series'], entry['change'],
+                          parse_condition(entry['yay'], f"{where} yay"),
+                          parse_condition(entry['nay'], f"{where} nay")))
+    return rules
+
+def _per_value(array: np.ndarray, ndim: int, rule_index: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Line a per-rule array up with the values: reshaped to broadcast against
+    (n_rules, ...) values, or taken at rule_index for flat values that each
+    belong to one rule
+    """
+    if rule_index is not None:
+        return array[rule_index]
+    return array.reshape(array.shape + (1,) * (ndim - 1))
+
+def condition_mask(ops: np.ndarray, low: np.ndarray, high: np.ndarray, measure: np.ndarray,
+                   rule_index: Optional[np.ndarray] = None) -> np.ndarray:
+    """Evaluate one condition per rule on a measure array; NaN measures never match"""
+    ops, low, high = (_per_value(a, measure.ndim, rule_index) for a in (ops, low, high))
+    tests = {
+        '<': measure < low,
+        '<=': measure <= low,
+        '>': measure > low,
+        '>=': measure >= low,
+        'between': (measure >= low) & (measure <= high),
+        'outside': (measure < low) | (measure > high),
+    }
+    return np.select([ops == OPERATOR_CODES[op] for op in tests], list(tests.values()), False)
+
+class CompiledRules:
+    """A rule table as flat numpy arrays, one position per (question, series) rule"""
+    
+    def __init__(self, rules: List[Rule]):
+        self.rules = rules
+        self.index = {(rule.question, rule.series_id): i for i, rule in enumerate(rules)}
+        self.series_ids = sorted({rule.series_id for rule in rules})
+        
+        series_positions = {series_id: i for i, series_id in enumerate(self.series_ids)}
+        self.series = np.array([series_positions[rule.series_id] for rule in rules], dtype=np.intp)
+        self.change = np.array([CHANGE_CODES[rule.change] for rule in rules], dtype=np.int8)
+        self.yay_op, self.yay_low, self.yay_high = self._conditions([rule.yay for rule in rules])
+        self.nay_op, self.nay_low, self.nay_high = self._conditions([rule.nay for rule in rules])
+    
+    @staticmethod
+    def _conditions(conditions: List[Condition]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        ops = np.array([OPERATOR_CODES[c[0]] for c in conditions], dtype=np.int8)
+        low = np.array([c[1] for c in conditions], dtype=np.float64)
+        high = np.array([c[2] if len(c) > 2 else np.nan for c in conditions], dtype=np.float64)
+        return ops, low, high
+    
+    def __len__(self) -> int:
+        return len(self.rules)
+    
+    def for_questions(self, question_ids) -> 'CompiledRules':
+        """The rules of some questions only"""
+        question_ids = set(question_ids)
+        return CompiledRules([rule for rule in self.rules if rule.question in question_ids])
+    
+    def measures(self, current: np.ndarray, year_ago: np.ndarray, previous: np.ndarray,
+                 rule_index: Optional[np.ndarray] = None) -> np.ndarray:
+        """The value each rule's thresholds apply to"""
+        change = _per_value(self.change, current.ndim, rule_index)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.select(
+                [change == CHANGE_CODES['point'], change == CHANGE_CODES['yoy_pct'],
+                 change == CHANGE_CODES['level'], change == CHANGE_CODES['monthly_delta']],
+                [current - year_ago, (current - year_ago) / year_ago * 100, current, current - previous],
+                np.nan
+            )
+    
+    def evaluate(self, current: np.ndarray, year_ago: np.ndarray, previous: np.ndarray,
+                 rule_index: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score every rule in one pass
+        
+        Args:
+            current, year_ago, previous: Values of each rule's series, shaped
+                (n_rules,) or (n_rules, n_dates); NaN where missing
+            rule_index: For flat value arrays of any length, the rule each
+                value belongs to
+        
+        Returns:
+            (scores of +1/0/-1 as int8, measures)
+        """
+        measure = self.measures(current, year_ago, previous, rule_index)
+        yay = condition_mask(self.yay_op, self.yay_low, self.yay_high, measure, rule_index)
+        nay = condition_mask(self.nay_op, self.nay_low, self.nay_high, measure, rule_index)
+        return np.where(yay, 1, np.where(nay, -1, 0)).astype(np.int8), measure
+
+def compile_rules(rules: Union[List[Rule], str, Path] = DEFAULT_RULES_FILE) -> CompiledRules:
+    """Compile rules, or the rule table at a path, for vectorized scoring"""
+    if not isinstance(rules, list):
+        rules = load_rule_table(rules)
+    return CompiledRules(rules)
+
+# Fewer observations than this and a series scores Meh ("No data")
+MIN_DATA_POINTS = {'annually': 2, 'annual': 2, 'quarterly': 2}
+DEFAULT_MIN_DATA_POINTS = 4
+
+# Question mood by average score: (lowest score, mood, emoji, color)
+QUESTION_MOODS = [
+    (0.5, 'Yay!', '😀', '#4CAF50'),
+    (-0.5, 'Meh', '😐', '#FF9800'),
+    (-np.inf, 'Nay', '😒', '#F44336'),
+]
+
+# Indicator moods as the web app names them
+INDICATOR_MOODS = {1: 'good', 0: 'neutral', -1: 'bad'}
+
+@dataclass
+class IndicatorScore:
+    """Mood of one series within a question"""
+    series_id: str
+    score: int
+    value: Optional[float] = None
+    date: Optional[str] = None
+    previous_value: Optional[float] = None
+    previous_date: Optional[str] = None
+    change: Optional[float] = None
+    change_kind: Optional[str] = None
+    status: str = 'ok'
+    
+    def to_dict(self) -> Dict:
+        """Entry of the scores file"""
+        return {
+            'series': self.series_id,
+            'mood': INDICATOR_MOODS[self.score],
+            'score': self.score,
+            'value': self.value,
+            'date': self.date,
+            'previous_value': self.previous_value,
+            'previous_date': self.previous_date,
+            'change': None if self.change is None else round(self.change, 4),
+            'change_kind': self.change_kind,
+            'status': self.status
+        }
+
+def minimum_points(frequency: str) -> int:
+    """Fewest observations a series of this frequency is scored with"""
+    return MIN_DATA_POINTS.get(frequency.lower(), DEFAULT_MIN_DATA_POINTS)
+
+def score_rules(rules: CompiledRules, aligned: AlignedSeries, frequencies: Dict[str, str],
+                as_of: np.datetime64) -> List[IndicatorScore]:
+    """
+    Score every rule of the table with the data available on as_of, in rule order
+    
+    aligned holds the series of the rules with their YEAR_AGO and PREVIOUS lags.
+    """
+    # Each series' latest observation, unless it has too few observations by then
+    latest = aligned.latest(as_of)
+    min_points = np.array([minimum_points(frequencies.get(series_id, 'monthly'))
+                           for series_id in aligned.series_ids], dtype=np.int64)
+    latest[latest - aligned.starts + 1 < min_points] = -1
+    
+    codes = np.searchsorted(aligned.series_ids, np.asarray(rules.series_ids, dtype=object))
+    current = latest[codes][rules.series]
+    year_ago = np.where(current >= 0, aligned.lags[YEAR_AGO.name][current], -1)
+    previous = np.where(current >= 0, aligned.lags[PREVIOUS.name][current], -1)
+    scores, measures = rules.evaluate(aligned.values_at(current), aligned.values_at(year_ago),
+                                      aligned.values_at(previous))
+    
+    indicators = []
+    for i, rule in enumerate(rules.rules):
+        if current[i] < 0:
+            indicators.append(IndicatorScore(rule.series_id, 0, status='no data'))
+            continue
+        
+        indicator = IndicatorScore(rule.series_id, int(scores[i]), float(aligned.values[current[i]]),
+                                   str(aligned.dates[current[i]]))
+        compared = previous[i] if rule.change == 'monthly_delta' else year_ago[i]
+        if compared >= 0:
+            indicator.previous_value = float(aligned.values[compared])
+            indicator.previous_date = str(aligned.dates[compared])
+        elif rule.change != 'level':
+            indicator.status = 'insufficient for trend'
+            indicators.append(indicator)
+            continue
+        
+        if np.isfinite(measures[i]):
+            indicator.change = float(measures[i])
+        indicator.change_kind = rule.change
+        indicators.append(indicator)
+    return indicators
+
+def question_mood(score: float) -> Tuple[str, str, str]:
+    """(mood, emoji, color) for a question's average score"""
+    for lowest, mood, emoji, color in QUESTION_MOODS:
+        if score >= lowest:
+            return mood, emoji, color
+    return QUESTION_MOODS[-1][1:]
+
+def question_insight(good: int, neutral: int, bad: int, score: float) -> str:
+    """One-line summary of a question's indicators"""
+    total = good + neutral + bad
+    if score >= 0.5:
+        return f"Strong positive signals ({good}/{total} good indicators)"
+    if score >= 0:
+        return f"Mostly positive trends ({good}/{total} good indicators)"
+    if score >= -0.5:
+        return f"Mixed economic signals ({bad}/{total} concerning)"
+    return f"Challenging conditions ({bad}/{total} indicators concerning)"
+
+def load_questions(path: Union[str, Path]) -> Dict[str, List[str]]:
+    """Read each question's id and FRED series from src/data/questions.ts"""
+    text = Path(path).read_text(encoding='utf-8')
+    return {
+        question_id: re.findall(r"'([^']+)'", series)
+        for question_id, series in QUESTION_PATTERN.findall(text)
+    }
+
+def score_question(question_id: str, series_ids: List[str],
+                   indicators: Dict[Tuple[str, str], IndicatorScore]) -> Dict:
+    """Score one question from the scores of its series"""
+    question_indicators = [
+        indicators.get((question_id, series_id)) or IndicatorScore(series_id, 0, status='no rule')
+        for series_id in series_ids
+    ]
+    
+    scores = [indicator.score for indicator in question_indicators]
+    score = float(np.mean(scores)) if scores else 0.0
+    good, neutral, bad = scores.count(1), scores.count(0), scores.count(-1)
+    mood, emoji, color = question_mood(score)
+    
+    return {
+        'score': round(score, 4),
+        'mood': mood,
+        'emoji': emoji,
+        'color': color,
+        'insight': question_insight(good, neutral, bad, score),
+        'good_count': good,
+        'neutral_count': neutral,
+        'bad_count': bad,
+        'indicators': [indicator.to_dict() for indicator in question_indicators]
+    }
+
+def score_questions(observations: pd.DataFrame, questions: Dict[str, List[str]],
+                    frequencies: Dict[str, str], as_of: Optional[date] = None,
+                    rules: Optional[CompiledRules] = None) -> Dict:
+    """
+    Score every question
+    
+    Args:
+        observations: Stored observation rows (series_id, date, value)
+        questions: Question id -> its FRED series
+        frequencies: Series id -> schema update_frequency
+        as_of: Score with the data available on this date (default: today)
+        rules: Compiled rule table (default: mood_rules.json)
+    
+    Returns:
+        The scores document: {'version', 'as_of', 'questions': {question id: ...}}
+    """
+    as_of = as_of or date.today()
+    rules = rules if rules is not None else compile_rules()
+    
+    aligned = align_series(observations, (YEAR_AGO, PREVIOUS), frequencies, series_ids=rules.series_ids)
+    scored = score_rules(rules, aligned, frequencies, np.datetime64(as_of.isoformat(), 'D'))
+    indicators = {(rule.question, rule.series_id): indicator for rule, indicator in zip(rules.rules, scored)}
+    
+    return {
+        'version': SCORES_VERSION,
+        'as_of': as_of.isoformat(),
+        'questions': {
+            question_id: score_question(question_id, series_ids, indicators)
+            for question_id, series_ids in questions.items()
+        }
+    }
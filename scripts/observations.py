@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Columnar observation batches
+
+The FRED client returns the observations of a series as an ObservationBatch:
+parallel numpy arrays of datetime64[D] dates and float64 values, with NaN
+where FRED reports a missing value ('.'). Filtering against the stored data
+is done with vectorized comparisons on these arrays instead of per-point date
+parsing.
+
+The batch stays columnar from the JSON parse to the storage writer: rows are
+only materialized on demand, as lightweight ObservationRow views.
+
+Large responses can also be parsed while they download with
+parse_observation_stream, which decodes one observation object at a time
+into compact arrays, so memory stays flat however long the history is.
+"""
+
+import codecs
+import json
+import math
+from array import array
+from datetime import date
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from fred_store import OBSERVATION_COLUMNS
+
+# FRED marks missing observations with a lone dot
+MISSING_VALUE = '.'
+
+DATE_DTYPE = 'datetime64[D]'
+
+# Day numbers in the stream buffers count from the datetime64 epoch
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def parse_value(raw: str) -> float:
+    """Convert a FRED observation value to float (NaN when missing)"""
+    return math.nan if raw == MISSING_VALUE else float(raw)
+
+class ObservationRow:
+    """A single observation viewed from a batch"""
+    
+    __slots__ = ('date', 'value')
+    
+    def __init__(self, date: str, value: Optional[float]):
+        self.date = date
+        self.value = value
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ObservationRow):
+            return NotImplemented
+        return self.date == other.date and self.value == other.value
+    
+    def __repr__(self) -> str:
+        return f"ObservationRow(date={self.date!r}, value={self.value!r})"
+
+class ObservationBatch:
+    """Dates and values of one series' observations, in chronological order"""
+    
+    __slots__ = ('dates', 'values')
+    
+    def __init__(self, dates: Optional[np.ndarray] = None, values: Optional[np.ndarray] = None):
+        self.dates = np.asarray(dates if dates is not None else [], dtype=DATE_DTYPE)
+        self.values = np.asarray(values if values is not None else [], dtype=np.float64)
+        if len(self.dates) != len(self.values):
+            raise ValueError(f"{len(self.dates)} dates but {len(self.values)} values")
+    
+    @classmethod
+    def from_records(cls, observations: Sequence[Dict]) -> 'ObservationBatch':
+        """Build a batch from FRED observation records ({'date': ..., 'value': ...})"""
+        # Fill the arrays directly instead of collecting intermediate lists
+        count = len(observations)
+        dates = np.fromiter((obs['date'] for obs in observations), dtype=DATE_DTYPE, count=count)
+        values = np.fromiter((parse_value(obs['value']) for obs in observations), dtype=np.float64, count=count)
+        return cls(dates, values)
+    
+    def __len__(self) -> int:
+        return len(self.dates)
+    
+    def _row(self, position: int) -> ObservationRow:
+        value = self.values[position]
+        return ObservationRow(str(self.dates[position]), None if np.isnan(value) else float(value))
+    
+    def __getitem__(self, key: Union[int, slice]) -> Union[ObservationRow, 'ObservationBatch']:
+        if isinstance(key, slice):
+            return ObservationBatch(self.dates[key], self.values[key])
+        return self._row(key)
+    
+    def __iter__(self) -> Iterator[ObservationRow]:
+        for position in range(len(self.dates)):
+            yield self._row(position)
+    
+    def __repr__(self) -> str:
+        return f"ObservationBatch({len(self)} observations, last_date={self.last_date!r})"
+    
+    def select(self, mask: np.ndarray) -> 'ObservationBatch':
+        """Keep the observations where mask is true"""
+        return ObservationBatch(self.dates[mask], self.values[mask])
+    
+    def reversed(self) -> 'ObservationBatch':
+        """The same observations in the opposite order"""
+        return ObservationBatch(self.dates[::-1], self.values[::-1])
+    
+    def after(self, last_date: str) -> 'ObservationBatch':
+        """Keep observations dated strictly after last_date (YYYY-MM-DD)"""
+        return self.select(self.dates > np.datetime64(last_date, 'D'))
+    
+    @property
+    def last_date(self) -> Optional[str]:
+        """Newest observation date as YYYY-MM-DD (None if empty)"""
+        if not len(self.dates):
+            return None
+        return str(self.dates.max())
+    
+    def date_strings(self) -> np.ndarray:
+        """Dates formatted as YYYY-MM-DD strings"""
+        return np.datetime_as_string(self.dates, unit='D')
+    
+    def to_frame(self, series_id: str, last_updated: str) -> pd.DataFrame:
+        """Observation table rows for the store (series_id, date, value, last_updated)"""
+        return pd.DataFrame({
+            'series_id': series_id,
+            'date': self.date_strings(),
+            'value': self.values,
+            'last_updated': last_updated
+        }, columns=OBSERVATION_COLUMNS)
+
+class ObservationStreamParser:
+    """
+    Incremental parser for a FRED series/observations JSON body
+    
+    Feed it the body in chunks of bytes as they arrive. Everything before the
+    "observations" array is skipped, and each observation object is decoded
+    on its own and appended to typed buffers, so only the unparsed tail of the
+    current chunk is ever held as text.
+    """
+    
+    KEY = '"observations"'
+    
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._in_array = False
+        self._done = False
+        self._days = array('i')
+        self._values = array('d')
+    
+    def feed(self, chunk: bytes):
+        """Parse the next chunk of the response body"""
+        if self._done:
+            return
+        
+        self._buffer += self._text.decode(chunk)
+        
+        if not self._in_array:
+            start = self._buffer.find(self.KEY)
+            if start < 0:
+                # Keep just enough text to match a key split across chunks
+                self._buffer = self._buffer[-len(self.KEY):]
+                return
+            
+            bracket = self._buffer.find('[', start + len(self.KEY))
+            if bracket < 0:
+                self._buffer = self._buffer[start:]
+                return
+            
+            self._buffer = self._buffer[bracket + 1:]
+            self._in_array = True
+        
+        self._parse_items()
+    
+    def _parse_items(self):
+        buffer = self._buffer
+        length = len(buffer)
+        pos = 0
+        
+        while True:
+            while pos < length and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= length:
+                break
+            if buffer[pos] == ']':
+                self._done = True
+                pos += 1
+                break
+            
+            try:
+                obs, pos_after = self._decoder.raw_decode(buffer, pos)
+            except ValueError:
+                # The object continues in the next chunk
+                break
+            
+            self._days.append(date.fromisoformat(obs['date']).toordinal() - EPOCH_ORDINAL)
+            self._values.append(parse_value(obs['value']))
+            pos = pos_after
+        
+        self._buffer = buffer[pos:]
+    
+    def close(self) -> ObservationBatch:
+        """Finish parsing and return the observations"""
+        if not self._done:
+            raise ValueError("Response ended before the observations array was complete")
+        
+        dates = np.frombuffer(self._days, dtype=np.int32).astype(DATE_DTYPE)
+        values = np.frombuffer(self._values, dtype=np.float64).copy()
+        return ObservationBatch(dates, values)
+
+def parse_observation_stream(chunks: Iterable[bytes]) -> ObservationBatch:
+    """Parse a series/observations response body given as an iterable of byte chunks"""
+    parser = ObservationStreamParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Token-bucket rate limiter for FRED API calls
+
+The bucket refills at `rate` tokens per second up to `burst` tokens, and every
+request takes one token. It is safe to share between threads, and can be
+shared between processes by pointing several limiters at the same state file:
+the bucket state is then kept in that file and updated under an exclusive
+file lock.
+
+When the API answers 429 Too Many Requests anyway (e.g. another tool shares
+the API key), backoff() holds every caller back for the Retry-After delay.
+
+Usage:
+    limiter = TokenBucketRateLimiter(rate=2.0, burst=10)
+    limiter.acquire()  # blocks until a request may be sent
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Callable, Optional, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds to hold back after a 429 response that did not say how long to wait
+DEFAULT_RETRY_AFTER_SECONDS = 30.0
+
+class RateLimitedError(Exception):
+    """The API answered 429 Too Many Requests"""
+    
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited by the API, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+def retry_after_seconds(value: Optional[str], now: Optional[float] = None) -> float:
+    """
+    Seconds to wait according to a Retry-After header
+    
+    The header holds either a number of seconds or an HTTP date. A missing or
+    unreadable header falls back to DEFAULT_RETRY_AFTER_SECONDS.
+    """
+    if not value:
+        return DEFAULT_RETRY_AFTER_SECONDS
+    
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER_SECONDS
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+class TokenBucketRateLimiter:
+    """Token bucket shared across threads and, optionally, processes"""
+    
+    def __init__(self, rate: float, burst: int = 1, state_file: Optional[Union[str, Path]] = None,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        if burst < 1:
+            raise ValueError(f"burst must be at least 1, got {burst}")
+        
+        self.rate = float(rate)
+        self.burst = float(burst)
+        # Wall-clock time by default, since the shared state file is read by other processes
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._timestamp = clock()
+        
+        self.state_file = Path(state_file) if state_file else None
+        if self.state_file and fcntl is None:
+            logger.warning("File locking is not available on this platform; "
+                           "rate limit will not be shared between processes")
+            self.state_file = None
+        if self.state_file:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+    
+    def _refill(self, tokens: float, timestamp: float, now: float) -> float:
+        """Return the token count after refilling from timestamp to now"""
+        elapsed = max(0.0, now - timestamp)
+        return min(self.burst, tokens + elapsed * self.rate)
+    
+    def _take(self, tokens: float) -> Tuple[float, float]:
+        """
+        Take one token from a refilled token count
+        
+        The token count may go negative: the caller has then reserved a future
+        slot and must wait until the bucket refills back to zero.
+        
+        Returns:
+            (remaining tokens, seconds to wait)
+        """
+        tokens -= 1.0
+        wait = -tokens / self.rate if tokens < 0 else 0.0
+        return tokens, wait
+    
+    def _update_shared(self, now: float, update: Callable[[float], Tuple[float, float]]) -> float:
+        """Apply update to the bucket stored in the shared state file"""
+        fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # Each call opens its own descriptor, so the file lock also serializes threads
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            
+            raw = b''
+            while True:
+                chunk = os.read(fd, 4096)
+                if not chunk:
+                    break
+                raw += chunk
+            
+            try:
+                state = json.loads(raw) if raw else {}
+                tokens = float(state['tokens'])
+                timestamp = float(state['timestamp'])
+            except (ValueError, KeyError, TypeError):
+                tokens, timestamp = self.burst, now
+            
+            tokens, wait = update(self._refill(tokens, timestamp, now))
+            
+            payload = json.dumps({'tokens': tokens, 'timestamp': now}).encode()
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, payload)
+            return wait
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+    
+    def _update(self, update: Callable[[float], Tuple[float, float]]) -> float:
+        """Apply update to the refilled token count, returning the seconds it asks the caller to wait"""
+        if self.state_file:
+            # The thread lock is not held while waiting for the file lock
+            return self._update_shared(self._clock(), update)
+        
+        with self._lock:
+            now = self._clock()
+            self._tokens, wait = update(self._refill(self._tokens, self._timestamp, now))
+            self._timestamp = now
+            return wait
+    
+    def reserve(self) -> float:
+        """
+        Reserve a request slot without blocking
+        
+        Returns:
+            Seconds the caller must wait before sending the request
+        """
+        return self._update(self._take)
+    
+    def acquire(self):
+        """Block until a request may be sent"""
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+    
+    def backoff(self, delay: float):
+        """
+        Hold every caller back for delay seconds, e.g. after a 429 response
+        
+        The bucket is emptied to -delay * rate tokens, so the next slot opens
+        once it has refilled back to zero. Slots reserved before the call are
+        not moved.
+        """
+        logger.warning(f"Rate limited by the API, holding requests back for {delay:.1f}s")
+        self._update(lambda tokens: (min(tokens, -delay * self.rate), 0.0))
@@ -8,15 +8,16 @@ This script manages the local database of FRED economic metrics by:
 - Avoiding duplicates
 - Handling errors gracefully
 - Saving to CSV format
+- Exporting compact data files and precomputed mood scores for the web app (public/data)
 
 Usage:
     cd scripts
     python refresh_fred_data.py [--force] [--metrics METRIC1,METRIC2]
-    
+
 Example:
     cd scripts
     python refresh_fred_data.py --force --metrics MORTGAGE30US,UNRATE
-    
+
 Note: 
     - Script should be run from the scripts/ directory
     - FRED_API_KEY should be in .env file in project root
@@ -24,18 +25,39 @@ Note:
 """
 
 import os
+import asyncio
 import csv
 import json
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
+import threading
 import time
 
+try:
+    import aiohttp
+except ImportError:  # Optional: only needed for --concurrency
+    aiohttp = None
+
+from export_frontend_data import export_frontend_data, format_size_report
+from fred_store import (
+    STORE_BACKENDS, CsvObservationStore, SeriesIndex, is_legacy_wide_csv, load_series_metadata,
+    open_store, save_series_metadata, series_metadata_path
+)
+from metadata_store import DEFAULT_REFRESH_INTERVAL_DAYS, SeriesMetadataStore
+from observations import ObservationBatch, ObservationRow, parse_observation_stream
+from rate_limiter import RateLimitedError, TokenBucketRateLimiter, retry_after_seconds
+from refresh_planner import ReleaseCalendar, RefreshPlanner
+from run_journal import FAILED, WRITTEN, RunJournal
+from response_cache import STREAM_CHUNK_SIZE, CacheEntry, CacheMissError, ResponseCache, cache_ttl_for_frequency
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -47,11 +69,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# FRED allows 120 requests per minute per API key. With the default burst, any
+# 60-second window sees at most burst + 60 * rate = 120 requests.
+FRED_REQUESTS_PER_MINUTE = 120
+DEFAULT_RATE_LIMIT_BURST = 10
+DEFAULT_REQUESTS_PER_SECOND = (FRED_REQUESTS_PER_MINUTE - DEFAULT_RATE_LIMIT_BURST) / 60.0
+# Times a request answered with 429 Too Many Requests is sent again, after the Retry-After delay
+RATE_LIMIT_RETRIES = 3
+
+# A single FRED data point, now a row view of an ObservationBatch
+FredDataPoint = ObservationRow
+
 @dataclass
-class FredDataPoint:
-    """Represents a single FRED data point"""
-    date: str
-    value: Optional[float]
+class FetchRequest:
+    """Observation request parameters for a single series"""
+    series_id: str
+    start_date: str = "2023-01-01"
+    limit: Optional[int] = None
+    cache_ttl: Optional[float] = None
 
 @dataclass 
 class MetricInfo:
@@ -69,34 +104,154 @@ class MetricInfo:
 class FredApiClient:
     """FRED API client with rate limiting and error handling"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, pool_size: int = 10,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 cache: Optional[ResponseCache] = None, stream_observations: bool = False):
         self.api_key = api_key
+        self.cache = cache
+        # Parse observation bodies while they download instead of decoding them whole
+        self.stream_observations = stream_observations
         self.base_url = "https://api.stlouisfed.org/fred"
-        self.last_request_time = 0
-        self.min_request_interval = 0.1  # 100ms between requests
+        self.rate_limiter = rate_limiter or TokenBucketRateLimiter(
+            DEFAULT_REQUESTS_PER_SECOND, DEFAULT_RATE_LIMIT_BURST
+        )
+        
+        # One pooled keep-alive session for every call, so the TCP/TLS handshake
+        # with api.stlouisfed.org is paid once per connection instead of per request
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_maxsize=pool_size, pool_block=True)
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+    
+    def connection_stats(self) -> Dict[str, int]:
+        """Report how many requests were sent and how many connections were opened or reused"""
+        requests_sent = 0
+        connections_opened = 0
+        
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_sent += pool.num_requests
+            connections_opened += pool.num_connections
         
+        return {
+            'requests': requests_sent,
+            'opened': connections_opened,
+            'reused': max(0, requests_sent - connections_opened)
+        }
+    
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+    
     def _rate_limit(self):
         """Ensure we don't exceed API rate limits"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            time.sleep(self.min_request_interval - elapsed)
-        self.last_request_time = time.time()
+        self.rate_limiter.acquire()
+    
+    def _decode_entry(self, entry: CacheEntry, decode: Optional[Callable[[Iterable[bytes]], object]]):
+        """Decode a cached body, streaming it from disk when a stream decoder is given"""
+        if decode is None:
+            return json.loads(entry.read_body())
+        return decode(entry.iter_body())
     
-    def get_series_observations(self, series_id: str, start_date: str = "2023-01-01", limit: Optional[int] = None) -> List[FredDataPoint]:
+    def cached_response(self, endpoint: str, params: Dict, cache_ttl: Optional[float],
+                        decode: Optional[Callable[[Iterable[bytes]], object]] = None) -> Tuple[Optional[Dict], Optional[CacheEntry]]:
         """
-        Fetch observations for a FRED series
+        Look up a request in the response cache
         
-        Args:
-            series_id: FRED series identifier
-            start_date: Start date in YYYY-MM-DD format (ignored if limit is set)
-            limit: If set, fetch the last N observations instead of using start_date
-            
         Returns:
-            List of FredDataPoint objects
+            (decoded body if it can be served without the network, entry to revalidate)
+        """
+        if self.cache is None:
+            return None, None
+        
+        entry = self.cache.lookup(endpoint, params)
+        
+        if self.cache.cache_only:
+            if entry is None:
+                self.cache.count('misses')
+                raise CacheMissError(f"{endpoint} {params.get('series_id', '')} is not cached")
+            self.cache.count('hits')
+            return self._decode_entry(entry, decode), entry
+        
+        if entry is not None and entry.is_fresh(cache_ttl):
+            self.cache.count('hits')
+            return self._decode_entry(entry, decode), entry
+        
+        return None, entry
+    
+    def revalidated_response(self, endpoint: str, params: Dict, cached: CacheEntry,
+                             decode: Optional[Callable[[Iterable[bytes]], object]] = None):
+        """Serve a cached body that the API just confirmed with a 304"""
+        self.cache.count('revalidated')
+        self.cache.touch(cached, endpoint, params)
+        return self._decode_entry(cached, decode)
+    
+    def store_response(self, endpoint: str, params: Dict, body: bytes, etag: Optional[str] = None,
+                       last_modified: Optional[str] = None):
+        """Cache a body downloaded in full, if caching is enabled"""
+        if self.cache is not None:
+            self.cache.count('misses')
+            self.cache.store(endpoint, params, body, etag, last_modified)
+    
+    def _request(self, endpoint: str, params: Dict, cached: Optional[CacheEntry] = None,
+                 decode: Optional[Callable[[Iterable[bytes]], object]] = None) -> Dict:
+        """
+        Perform a GET request against a FRED endpoint and decode the body
+        
+        Without a decode function the whole body is read and decoded as JSON.
+        With one, the body is streamed: decode consumes it chunk by chunk while
+        it downloads (and while it is written to the cache).
         """
-        self._rate_limit()
+        headers = cached.conditional_headers() if cached else {}
+        with self.session.get(f"{self.base_url}/{endpoint}", params=params, headers=headers,
+                              timeout=30, stream=decode is not None) as response:
+            if response.status_code == 304 and cached is not None:
+                return self.revalidated_response(endpoint, params, cached, decode)
+            if response.status_code == 429:
+                raise RateLimitedError(retry_after_seconds(response.headers.get('Retry-After')))
+            
+            response.raise_for_status()
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            
+            if decode is None:
+                self.store_response(endpoint, params, response.content, etag, last_modified)
+                return response.json()
+            
+            chunks = response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+            if self.cache is None:
+                return decode(chunks)
+            
+            self.cache.count('misses')
+            with self.cache.storing(endpoint, params, chunks, etag, last_modified) as teed_chunks:
+                return decode(teed_chunks)
+    
+    def _get(self, endpoint: str, params: Dict, cache_ttl: Optional[float] = None,
+             decode: Optional[Callable[[Iterable[bytes]], object]] = None) -> Dict:
+        """Serve a request from the cache when fresh, otherwise fetch it under the rate limit"""
+        body, cached = self.cached_response(endpoint, params, cache_ttl, decode)
+        if body is not None:
+            return body
         
-        url = f"{self.base_url}/series/observations"
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            self._rate_limit()
+            try:
+                return self._request(endpoint, params, cached, decode)
+            except RateLimitedError as e:
+                if attempt == RATE_LIMIT_RETRIES:
+                    raise
+                self.rate_limiter.backoff(e.retry_after)
+    
+    def _observation_decoder(self) -> Optional[Callable[[Iterable[bytes]], ObservationBatch]]:
+        """Stream decoder for observation bodies, if streaming is enabled"""
+        return parse_observation_stream if self.stream_observations else None
+    
+    def observation_params(self, series_id: str, start_date: str, limit: Optional[int]) -> Dict:
+        """Build query parameters for a series/observations request"""
         params = {
             'series_id': series_id,
             'api_key': self.api_key,
@@ -112,73 +267,277 @@ class FredApiClient:
             params['observation_start'] = start_date
             params['sort_order'] = 'asc'  # For date-based queries, ascending order
         
+        return params
+    
+    def metadata_params(self, series_id: str) -> Dict:
+        """Build query parameters for a series metadata request"""
+        return {
+            'series_id': series_id,
+            'api_key': self.api_key,
+            'file_type': 'json'
+        }
+    
+    def parse_observations(self, series_id: str, data, limit: Optional[int]) -> ObservationBatch:
+        """Convert a decoded observations payload into typed date and value arrays"""
+        if isinstance(data, ObservationBatch):
+            # Already parsed while streaming
+            data_points = data
+        else:
+            # Missing values (marked as '.' in FRED) become NaN
+            data_points = ObservationBatch.from_records(data.get('observations', []))
+        
+        # If we used limit (desc order), reverse to get chronological order
+        if limit:
+            data_points = data_points.reversed()
+        
+        logger.info(f"Fetched {len(data_points)} observations for {series_id}")
+        return data_points
+    
+    def parse_metadata(self, series_id: str, data: Dict) -> Dict:
+        """Extract the series record from a decoded metadata payload"""
+        series_info = data.get('seriess', [])
+        
+        if series_info:
+            return series_info[0]
+        else:
+            logger.warning(f"No metadata found for {series_id}")
+            return {}
+    
+    def get_series_observations(self, series_id: str, start_date: str = "2023-01-01", limit: Optional[int] = None,
+                                cache_ttl: Optional[float] = None) -> ObservationBatch:
+        """
+        Fetch observations for a FRED series
+        
+        Args:
+            series_id: FRED series identifier
+            start_date: Start date in YYYY-MM-DD format (ignored if limit is set)
+            limit: If set, fetch the last N observations instead of using start_date
+            cache_ttl: Seconds a cached response stays fresh (None always revalidates)
+        
+        Returns:
+            ObservationBatch of dates and values (empty on failure)
+        """
+        params = self.observation_params(series_id, start_date, limit)
+        
         try:
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            observations = data.get('observations', [])
-            
-            data_points = []
-            for obs in observations:
-                # Handle missing values (marked as '.' in FRED)
-                value = None if obs['value'] == '.' else float(obs['value'])
-                data_points.append(FredDataPoint(
-                    date=obs['date'],
-                    value=value
-                ))
-            
-            # If we used limit (desc order), reverse to get chronological order
-            if limit:
-                data_points.reverse()
-            
-            logger.info(f"Fetched {len(data_points)} observations for {series_id}")
-            return data_points
-            
-        except requests.exceptions.RequestException as e:
+            data = self._get('series/observations', params, cache_ttl, self._observation_decoder())
+            return self.parse_observations(series_id, data, limit)
+        
+        except CacheMissError as e:
+            logger.warning(f"Skipping {series_id} in cache-only mode: {e}")
+            return ObservationBatch()
+        except (requests.exceptions.RequestException, RateLimitedError) as e:
             logger.error(f"API request failed for {series_id}: {e}")
-            return []
+            return ObservationBatch()
         except (KeyError, ValueError, json.JSONDecodeError) as e:
             logger.error(f"Data parsing failed for {series_id}: {e}")
-            return []
+            return ObservationBatch()
     
-    def get_series_metadata(self, series_id: str) -> Dict:
+    def get_series_metadata(self, series_id: str, cache_ttl: Optional[float] = None) -> Dict:
         """Fetch metadata for a FRED series"""
-        self._rate_limit()
+        try:
+            data = self._get('series', self.metadata_params(series_id), cache_ttl)
+            return self.parse_metadata(series_id, data)
+        
+        except CacheMissError as e:
+            logger.warning(f"No cached metadata for {series_id} in cache-only mode: {e}")
+            return {}
+        except Exception as e:
+            logger.error(f"Metadata fetch failed for {series_id}: {e}")
+            return {}
+    
+    def get_series_release(self, series_id: str, cache_ttl: Optional[float] = None) -> Dict:
+        """Fetch the release a FRED series belongs to"""
+        params = {'series_id': series_id, 'api_key': self.api_key, 'file_type': 'json'}
+        try:
+            releases = self._get('series/release', params, cache_ttl).get('releases', [])
+            return releases[0] if releases else {}
+        except Exception as e:
+            logger.error(f"Release lookup failed for {series_id}: {e}")
+            return {}
+    
+    def get_release_dates(self, release_id: str, cache_ttl: Optional[float] = None,
+                          today: Optional[date] = None) -> List[str]:
+        """
+        Fetch past and scheduled release dates of a FRED release
         
-        url = f"{self.base_url}/series"
+        Dates are requested from January 1st of the previous year, an anchor
+        that (unlike "a year ago today") keeps the cache key the same all year.
+        """
+        today = today or date.today()
         params = {
-            'series_id': series_id,
+            'release_id': release_id,
             'api_key': self.api_key,
-            'file_type': 'json'
+            'file_type': 'json',
+            'realtime_start': f"{today.year - 1}-01-01",
+            'realtime_end': '9999-12-31',
+            'include_release_dates_with_no_data': 'true',
+            'sort_order': 'asc'
         }
-        
         try:
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            series_info = data.get('seriess', [])
+            data = self._get('release/dates', params, cache_ttl)
+            return [entry['date'] for entry in data.get('release_dates', [])]
+        except Exception as e:
+            logger.error(f"Release dates fetch failed for release {release_id}: {e}")
+            return []
+
+class AsyncFredApiClient:
+    """
+    Asyncio FRED client on aiohttp that keeps a bounded number of requests in flight
+    
+    Requests are built, cached and parsed by a FredApiClient, so both clients
+    share the response cache and the token-bucket rate limiter; only the
+    transport differs. A series' observations and metadata are requested at
+    the same time, and no more than max_concurrency requests are open at once.
+    """
+    
+    def __init__(self, client: FredApiClient, max_concurrency: int = 8):
+        if aiohttp is None:
+            raise ImportError("The async client requires aiohttp: pip install aiohttp")
+        self.client = client
+        self.max_concurrency = max(1, max_concurrency)
+        self._session: Optional['aiohttp.ClientSession'] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    async def _rate_limit(self):
+        """Take a token from the shared bucket, sleeping until its slot without blocking the loop"""
+        wait = self.client.rate_limiter.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+    
+    async def _request(self, endpoint: str, params: Dict, cached: Optional[CacheEntry] = None) -> Dict:
+        """Perform a GET request against a FRED endpoint and decode the JSON body"""
+        headers = cached.conditional_headers() if cached else {}
+        async with self._session.get(f"{self.client.base_url}/{endpoint}", params=params,
+                                     headers=headers) as response:
+            if response.status == 304 and cached is not None:
+                return self.client.revalidated_response(endpoint, params, cached)
+            if response.status == 429:
+                raise RateLimitedError(retry_after_seconds(response.headers.get('Retry-After')))
             
-            if series_info:
-                return series_info[0]
-            else:
-                logger.warning(f"No metadata found for {series_id}")
-                return {}
-                
+            response.raise_for_status()
+            body = await response.read()
+            self.client.store_response(endpoint, params, body, response.headers.get('ETag'),
+                                       response.headers.get('Last-Modified'))
+            return json.loads(body)
+    
+    async def _get(self, endpoint: str, params: Dict, cache_ttl: Optional[float] = None) -> Dict:
+        """Serve a request from the cache when fresh, otherwise fetch it under the semaphore and rate limit"""
+        body, cached = self.client.cached_response(endpoint, params, cache_ttl)
+        if body is not None:
+            return body
+        
+        async with self._semaphore:
+            for attempt in range(RATE_LIMIT_RETRIES + 1):
+                await self._rate_limit()
+                try:
+                    return await self._request(endpoint, params, cached)
+                except RateLimitedError as e:
+                    if attempt == RATE_LIMIT_RETRIES:
+                        raise
+                    self.client.rate_limiter.backoff(e.retry_after)
+    
+    async def get_series_observations(self, request: FetchRequest) -> ObservationBatch:
+        """Async counterpart of FredApiClient.get_series_observations"""
+        series_id = request.series_id
+        params = self.client.observation_params(series_id, request.start_date, request.limit)
+        
+        try:
+            data = await self._get('series/observations', params, request.cache_ttl)
+            return self.client.parse_observations(series_id, data, request.limit)
+        
+        except CacheMissError as e:
+            logger.warning(f"Skipping {series_id} in cache-only mode: {e}")
+            return ObservationBatch()
+        except (aiohttp.ClientError, asyncio.TimeoutError, RateLimitedError) as e:
+            logger.error(f"API request failed for {series_id}: {e}")
+            return ObservationBatch()
+        except (KeyError, ValueError, json.JSONDecodeError) as e:
+            logger.error(f"Data parsing failed for {series_id}: {e}")
+            return ObservationBatch()
+    
+    async def get_series_metadata(self, series_id: str, cache_ttl: Optional[float] = None) -> Dict:
+        """Async counterpart of FredApiClient.get_series_metadata"""
+        try:
+            data = await self._get('series', self.client.metadata_params(series_id), cache_ttl)
+            return self.client.parse_metadata(series_id, data)
+        
+        except CacheMissError as e:
+            logger.warning(f"No cached metadata for {series_id} in cache-only mode: {e}")
+            return {}
         except Exception as e:
             logger.error(f"Metadata fetch failed for {series_id}: {e}")
             return {}
+    
+    async def fetch_series(self, fetch_requests: List[FetchRequest],
+                           needs_metadata: Callable[[str, Optional[str]], bool],
+                           on_fetched: Callable[[str, ObservationBatch, Optional[Dict]], None]):
+        """
+        Fetch observations, and metadata where needed, for many series concurrently
+        
+        Args:
+            fetch_requests: Observation requests, one per series
+            needs_metadata: needs_metadata(series_id, newest observation date or
+                None) tells whether the series' metadata should be fetched; it is
+                asked before the fetch, to request both at the same time, and
+                again once the observations are in
+            on_fetched: Called as on_fetched(series_id, data points, metadata or
+                None) on the event loop thread as each series completes, so it
+                is the only writer
+        """
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=30)
+        
+        async def fetch_one(request: FetchRequest) -> Tuple[str, ObservationBatch, Optional[Dict]]:
+            series_id = request.series_id
+            if needs_metadata(series_id, None):
+                data_points, metadata = await asyncio.gather(
+                    self.get_series_observations(request),
+                    self.get_series_metadata(series_id)
+                )
+                return series_id, data_points, metadata
+            
+            data_points = await self.get_series_observations(request)
+            metadata = None
+            if needs_metadata(series_id, data_points.last_date):
+                metadata = await self.get_series_metadata(series_id)
+            return series_id, data_points, metadata
+        
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            self._session = session
+            try:
+                for fetched in asyncio.as_completed([fetch_one(request) for request in fetch_requests]):
+                    on_fetched(*(await fetched))
+            finally:
+                self._session = None
+    
+    def fetch_all(self, fetch_requests: List[FetchRequest], needs_metadata: Callable[[str, Optional[str]], bool],
+                  on_fetched: Callable[[str, ObservationBatch, Optional[Dict]], None]):
+        """Blocking entry point: run fetch_series on a new event loop"""
+        asyncio.run(self.fetch_series(fetch_requests, needs_metadata, on_fetched))
 
 class FredDataManager:
     """Manages local FRED data storage and updates"""
     
-    def __init__(self, csv_file: str = "fred_data.csv", schema_file: str = "schema.json"):
-        self.csv_file = Path(csv_file)
+    def __init__(self, csv_file: str = "fred_data.csv", schema_file: str = "schema.json",
+                 metadata_refresh_days: float = DEFAULT_REFRESH_INTERVAL_DAYS, store_backend: Optional[str] = None):
+        self.store = open_store(csv_file, store_backend)
+        self.csv_file = self.store.path
         self.schema_file = Path(schema_file)
         self.data_dir = self.csv_file.parent
         self.data_dir.mkdir(exist_ok=True)
-        
+        self.metadata_store = SeriesMetadataStore(self.data_dir / 'fred_series_metadata.json',
+                                                  metadata_refresh_days)
+        self.series_metadata_file = series_metadata_path(self.csv_file)
+        self.series_index = SeriesIndex()
+        # Journal of the current run, which records the rows written per series
+        self.journal: Optional[RunJournal] = None
+        # Release calendar of the run, if any, to tell when stored metadata is out of date
+        self.release_calendar: Optional[ReleaseCalendar] = None
+        # Series this run appended or replaced rows for, so the export only rescores their questions
+        self.changed_series: Set[str] = set()
+    
     def load_schema(self) -> Dict:
         """Load the schema configuration"""
         try:
@@ -209,156 +568,196 @@ class FredDataManager:
         return metrics
     
     def load_existing_data(self) -> pd.DataFrame:
-        """Load existing data from CSV"""
-        if not self.csv_file.exists():
+        """Load existing data from the observation store"""
+        if not self.store.exists():
             logger.info("No existing data file found, starting fresh")
             return pd.DataFrame()
         
         try:
-            df = pd.read_csv(self.csv_file)
-            logger.info(f"Loaded {len(df)} existing records")
+            df = self.store.load()
+            logger.info(f"Loaded {len(df)} existing records from {self.store.name} store {self.csv_file}")
             return df
         except Exception as e:
             logger.error(f"Failed to load existing data: {e}")
             return pd.DataFrame()
     
-    def get_last_update_date(self, series_id: str, existing_data: pd.DataFrame) -> Optional[str]:
+    def load_series_index(self) -> SeriesIndex:
+        """Summarize the stored series (last date, row count, last value) once per run"""
+        try:
+            self.series_index = self.store.series_index()
+            logger.info(f"Indexed {len(self.series_index)} stored series in {self.store.name} store {self.csv_file}")
+        except Exception as e:
+            logger.error(f"Failed to build the series index of {self.csv_file}: {e}")
+            self.series_index = SeriesIndex()
+        return self.series_index
+    
+    def get_last_update_date(self, series_id: str) -> Optional[str]:
         """Get the last update date for a specific series"""
-        if existing_data.empty:
-            return None
-            
-        series_data = existing_data[existing_data['series_id'] == series_id]
-        if series_data.empty:
-            return None
-        
-        # Return the most recent date
-        return series_data['date'].max()
+        return self.series_index.last_date(series_id)
     
-    def filter_new_data(self, series_id: str, data_points: List[FredDataPoint], 
-                       existing_data: pd.DataFrame) -> List[FredDataPoint]:
+    def filter_new_data(self, series_id: str, data_points: ObservationBatch) -> ObservationBatch:
         """Filter out data points that already exist"""
-        last_date = self.get_last_update_date(series_id, existing_data)
+        last_date = self.get_last_update_date(series_id)
         
         if last_date is None:
             logger.info(f"No existing data for {series_id}, keeping all {len(data_points)} points")
             return data_points
         
-        # Convert to datetime for comparison
-        last_datetime = datetime.strptime(last_date, '%Y-%m-%d')
-        new_points = []
-        
-        for point in data_points:
-            point_datetime = datetime.strptime(point.date, '%Y-%m-%d')
-            if point_datetime > last_datetime:
-                new_points.append(point)
+        # One vectorized comparison of the datetime64 dates
+        new_points = data_points.after(last_date)
         
         logger.info(f"Found {len(new_points)} new data points for {series_id} since {last_date}")
         return new_points
     
-    def append_data_to_csv(self, series_id: str, metric_info: MetricInfo, 
-                          data_points: List[FredDataPoint], metadata: Dict):
-        """Append new data points to CSV (or replace for annual metrics)"""
-        if not data_points:
-            return
+    def is_legacy_format(self) -> bool:
+        """Check whether the CSV file still repeats series metadata on every row"""
+        return isinstance(self.store, CsvObservationStore) and is_legacy_wide_csv(self.csv_file)
+    
+    def save_series_metadata(self, metrics: List[MetricInfo]):
+        """
+        Write the series metadata table
         
-        # Prepare records for CSV
-        records = []
-        current_timestamp = datetime.now().isoformat()
+        Schema fields come from schema.json and FRED fields from the metadata
+        store, falling back to the existing table for series whose FRED
+        metadata has not been fetched yet.
+        """
+        existing = {
+            row['series_id']: row
+            for row in load_series_metadata(self.series_metadata_file).to_dict('records')
+        }
         
-        for point in data_points:
-            records.append({
-                'series_id': series_id,
+        rows = []
+        for metric_info in metrics:
+            previous = existing.get(metric_info.id, {})
+            metadata = self.metadata_store.get(metric_info.id)
+            
+            rows.append({
+                'series_id': metric_info.id,
                 'name': metric_info.name,
                 'description': metric_info.description,
                 'category': metric_info.category,
                 'units': metric_info.units,
                 'update_frequency': metric_info.update_frequency,
-                'date': point.date,
-                'value': point.value,
                 'yay_message': metric_info.yay_message,
                 'meh_message': metric_info.meh_message,
                 'nay_message': metric_info.nay_message,
-                'last_updated': current_timestamp,
-                'fred_title': metadata.get('title', ''),
-                'fred_frequency': metadata.get('frequency', ''),
-                'fred_units': metadata.get('units', ''),
-                'fred_notes': metadata.get('notes', '')
+                'fred_title': metadata.get('title', previous.get('fred_title', '')),
+                'fred_frequency': metadata.get('frequency', previous.get('fred_frequency', '')),
+                'fred_units': metadata.get('units', previous.get('fred_units', '')),
+                'fred_notes': metadata.get('notes', previous.get('fred_notes', '')),
+                'fred_last_updated': metadata.get('last_updated', previous.get('fred_last_updated', ''))
             })
         
+        # Keep rows for series that are stored but no longer tracked
+        tracked = {metric_info.id for metric_info in metrics}
+        rows.extend(row for series_id, row in existing.items() if series_id not in tracked)
+        
+        save_series_metadata(self.series_metadata_file, rows)
+    
+    def append_data_to_csv(self, series_id: str, metric_info: MetricInfo, 
+                          data_points: ObservationBatch, metadata: Dict):
+        """Append new data points to CSV (or replace for annual metrics)"""
+        if not data_points:
+            return
+        
+        # Build the observation columns straight from the arrays
+        # (series metadata lives in the separate metadata table)
+        df = data_points.to_frame(series_id, datetime.now().isoformat())
+        
         # Handle annual metrics differently - replace existing data
-        if metric_info.update_frequency.lower() in ['annual', 'annually'] and self.csv_file.exists():
-            logger.info(f"Replacing existing data for annual metric {series_id}")
-            
-            # Read existing data
-            existing_df = pd.read_csv(self.csv_file)
-            
-            # Remove existing records for this series
-            filtered_df = existing_df[existing_df['series_id'] != series_id]
-            
-            # Add new records
-            new_df = pd.DataFrame(records)
-            combined_df = pd.concat([filtered_df, new_df], ignore_index=True)
-            
-            # Write back to CSV
-            combined_df.to_csv(self.csv_file, index=False)
-            logger.info(f"Replaced data for annual metric {series_id} with {len(records)} records")
+        replace = metric_info.update_frequency.lower() in ['annual', 'annually'] and self.store.exists()
+        if replace:
+            # Inside a run-wide store transaction the replacement is written with the others at the end
+            self.store.replace_series(series_id, df)
+            self.series_index.replace(series_id, df)
+            logger.info(f"Replacing data for annual metric {series_id} with {len(df)} records")
         else:
             # Normal append for non-annual metrics
-            file_exists = self.csv_file.exists()
-            df = pd.DataFrame(records)
-            
-            df.to_csv(self.csv_file, mode='a', header=not file_exists, index=False)
-            logger.info(f"Appended {len(records)} records for {series_id} to {self.csv_file}")
+            self.store.append(df)
+            self.series_index.update(df, upsert=self.store.supports_upsert)
+            logger.info(f"Appended {len(df)} records for {series_id} to {self.csv_file}")
+        
+        self.changed_series.add(series_id)
+        if self.journal is not None:
+            self.journal.record_rows(series_id, len(df), df['date'].iloc[0], df['date'].iloc[-1],
+                                     'replace' if replace else 'append')
+    
+    def build_fetch_request(self, metric_info: MetricInfo, force_update: bool = False) -> FetchRequest:
+        """Decide which observations to request for a metric"""
+        series_id = metric_info.id
+        cache_ttl = cache_ttl_for_frequency(metric_info.update_frequency)
+        
+        # Handle annual metrics differently
+        if metric_info.update_frequency.lower() in ['annual', 'annually']:
+            # For annual metrics, fetch last 5 data points instead of using date range
+            logger.info(f"Using limit-based fetch for annual metric {series_id}")
+            return FetchRequest(series_id, limit=5, cache_ttl=cache_ttl)
+        
+        # For non-annual metrics, use date-based approach
+        # Start from 2023 to ensure we have enough historical data for YoY calculations
+        start_date = "2023-01-01"
+        
+        if not force_update:
+            last_date = self.get_last_update_date(series_id)
+            if last_date:
+                # For quarterly metrics, always ensure we have at least 2 years of data for YoY calculations
+                if metric_info.update_frequency.lower() == 'quarterly':
+                    # Always fetch from 2023 to ensure we have enough data for YoY comparisons
+                    start_date = "2023-01-01"
+                    logger.info(f"Using extended date range for quarterly metric {series_id} to enable YoY calculations")
+                else:
+                    # For monthly/daily metrics, start from day after last update
+                    last_datetime = datetime.strptime(last_date, '%Y-%m-%d')
+                    start_datetime = last_datetime + timedelta(days=1)
+                    start_date = start_datetime.strftime('%Y-%m-%d')
+        
+        return FetchRequest(series_id, start_date=start_date, cache_ttl=cache_ttl)
+    
+    def metadata_due(self, series_id: str, latest_observation_date: Optional[str] = None) -> bool:
+        """Check whether a series' stored metadata is missing or out of date"""
+        release_dates = self.release_calendar.release_dates(series_id) if self.release_calendar else []
+        return self.metadata_store.needs_refresh(series_id, latest_observation_date, release_dates)
+    
+    def fetch_metadata_if_due(self, metric_info: MetricInfo, data_points: ObservationBatch,
+                              fred_client: FredApiClient) -> Optional[Dict]:
+        """Fetch series metadata when the stored copy is missing or out of date (None otherwise)"""
+        series_id = metric_info.id
+        
+        if not self.metadata_due(series_id, data_points.last_date):
+            logger.info(f"Using stored metadata for {series_id}")
+            return None
+        
+        return fred_client.get_series_metadata(series_id) or None
     
-    def update_metric(self, metric_info: MetricInfo, fred_client: FredApiClient, 
-                     existing_data: pd.DataFrame, force_update: bool = False) -> bool:
+    def apply_fetched_data(self, metric_info: MetricInfo, data_points: ObservationBatch,
+                           fetched_metadata: Optional[Dict] = None, force_update: bool = False) -> bool:
         """
-        Update a single metric
+        Store the observations and metadata that were fetched for a metric
+        
+        Only the writer thread calls this, so the metadata store and the
+        observation store are never written concurrently.
         
         Returns:
             True if successful, False otherwise
         """
         series_id = metric_info.id
-        logger.info(f"Updating metric: {series_id} ({metric_info.name})")
         
         try:
-            # Handle annual metrics differently
-            if metric_info.update_frequency.lower() in ['annual', 'annually']:
-                # For annual metrics, fetch last 5 data points instead of using date range
-                logger.info(f"Using limit-based fetch for annual metric {series_id}")
-                data_points = fred_client.get_series_observations(series_id, limit=5)
-            else:
-                # For non-annual metrics, use date-based approach
-                # Start from 2023 to ensure we have enough historical data for YoY calculations
-                start_date = "2023-01-01"
-                
-                if not force_update:
-                    last_date = self.get_last_update_date(series_id, existing_data)
-                    if last_date:
-                        # For quarterly metrics, always ensure we have at least 2 years of data for YoY calculations
-                        if metric_info.update_frequency.lower() == 'quarterly':
-                            # Always fetch from 2023 to ensure we have enough data for YoY comparisons
-                            start_date = "2023-01-01"
-                            logger.info(f"Using extended date range for quarterly metric {series_id} to enable YoY calculations")
-                        else:
-                            # For monthly/daily metrics, start from day after last update
-                            last_datetime = datetime.strptime(last_date, '%Y-%m-%d')
-                            start_datetime = last_datetime + timedelta(days=1)
-                            start_date = start_datetime.strftime('%Y-%m-%d')
-                
-                data_points = fred_client.get_series_observations(series_id, start_date)
-            
-            # Get metadata
-            metadata = fred_client.get_series_metadata(series_id)
+            if fetched_metadata:
+                self.metadata_store.update(series_id, fetched_metadata)
+            metadata = self.metadata_store.get(series_id)
             
             if not data_points:
                 logger.warning(f"No new data available for {series_id}")
                 return True  # Not an error, just no new data
             
             # Filter for truly new data (avoid duplicates) - but only for non-annual metrics
-            # For annual metrics, we always want to refresh with the latest data
-            if not force_update and metric_info.update_frequency.lower() not in ['annual', 'annually']:
-                data_points = self.filter_new_data(series_id, data_points, existing_data)
+            # For annual metrics, we always want to refresh with the latest data.
+            # Upserting stores overwrite existing dates themselves, which also applies revisions.
+            if self.store.supports_upsert:
+                logger.info(f"Upserting {len(data_points)} data points for {series_id}")
+            elif not force_update and metric_info.update_frequency.lower() not in ['annual', 'annually']:
+                data_points = self.filter_new_data(series_id, data_points)
             elif metric_info.update_frequency.lower() in ['annual', 'annually']:
                 # For annual metrics, remove existing data for this series first to avoid duplicates
                 logger.info(f"Replacing existing annual data for {series_id}")
@@ -368,10 +767,163 @@ class FredDataManager:
             self.append_data_to_csv(series_id, metric_info, data_points, metadata)
             
             return True
+        
+        except Exception as e:
+            logger.error(f"Failed to update {series_id}: {e}")
+            return False
+    
+    def fetch_metric(self, metric_info: MetricInfo, fred_client: FredApiClient,
+                     force_update: bool = False) -> Optional[Tuple[ObservationBatch, Optional[Dict]]]:
+        """
+        Fetch and parse a single metric without writing anything
+        
+        Returns:
+            (data points, fetched metadata or None if the stored copy is still
+            current), or None if the fetch failed
+        """
+        series_id = metric_info.id
+        logger.info(f"Updating metric: {series_id} ({metric_info.name})")
+        
+        try:
+            request = self.build_fetch_request(metric_info, force_update)
+            data_points = fred_client.get_series_observations(series_id, request.start_date, request.limit,
+                                                              request.cache_ttl)
             
+            # The stored metadata is used unless it is missing or out of date
+            metadata = self.fetch_metadata_if_due(metric_info, data_points, fred_client)
+        
         except Exception as e:
             logger.error(f"Failed to update {series_id}: {e}")
+            return None
+        
+        return data_points, metadata
+    
+    def update_metric(self, metric_info: MetricInfo, fred_client: FredApiClient,
+                      force_update: bool = False) -> bool:
+        """
+        Update a single metric
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        fetched = self.fetch_metric(metric_info, fred_client, force_update)
+        if fetched is None:
             return False
+        
+        data_points, metadata = fetched
+        return self.apply_fetched_data(metric_info, data_points, metadata, force_update)
+
+def update_metrics_with_workers(data_manager: FredDataManager, metrics: List[MetricInfo],
+                                fred_client: FredApiClient, workers: int, force_update: bool = False,
+                                on_result: Optional[Callable[[MetricInfo, bool], None]] = None) -> Tuple[int, int]:
+    """
+    Fetch metrics on a thread pool and store them from a single writer
+    
+    Workers only fetch and parse. Results, including any fetched metadata, are
+    written by the calling thread as they complete, one metric at a time, so
+    store writes never interleave.
+    on_result is called on the writer thread with each metric's outcome.
+    
+    Returns:
+        (successful updates, failed updates)
+    """
+    worker_stats: Dict[str, List[float]] = {}
+    stats_lock = threading.Lock()
+    
+    def fetch(metric: MetricInfo):
+        started = time.time()
+        try:
+            return data_manager.fetch_metric(metric, fred_client, force_update)
+        finally:
+            elapsed = time.time() - started
+            with stats_lock:
+                stats = worker_stats.setdefault(threading.current_thread().name, [0, 0.0])
+                stats[0] += 1
+                stats[1] += elapsed
+    
+    successful_updates = 0
+    failed_updates = 0
+    started = time.time()
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='fred-worker') as executor:
+        futures = {executor.submit(fetch, metric): metric for metric in metrics}
+        
+        for future in as_completed(futures):
+            metric = futures[future]
+            try:
+                fetched = future.result()
+            except Exception as e:
+                logger.error(f"Failed to update {metric.id}: {e}")
+                fetched = None
+            
+            success = False
+            if fetched is not None:
+                data_points, metadata = fetched
+                success = data_manager.apply_fetched_data(metric, data_points, metadata, force_update)
+            
+            if success:
+                successful_updates += 1
+            else:
+                failed_updates += 1
+            if on_result is not None:
+                on_result(metric, success)
+    
+    elapsed = time.time() - started
+    for name, (count, busy) in sorted(worker_stats.items()):
+        rate = count / busy if busy > 0 else 0.0
+        logger.info(f"{name}: {int(count)} metrics fetched in {busy:.1f}s ({rate:.2f} metrics/s)")
+    if metrics:
+        logger.info(f"Fetched {len(metrics)} metrics with {workers} workers in {elapsed:.1f}s "
+                    f"({len(metrics) / max(elapsed, 1e-9):.2f} metrics/s)")
+    
+    return successful_updates, failed_updates
+
+def update_metrics_async(data_manager: FredDataManager, metrics: List[MetricInfo], async_client: AsyncFredApiClient,
+                         force_update: bool = False,
+                         on_result: Optional[Callable[[MetricInfo, bool], None]] = None) -> Tuple[int, int]:
+    """
+    Fetch metrics with the async client and store each one as it completes
+    
+    The event loop thread is the single writer: results are applied there one
+    metric at a time, while the other requests stay in flight.
+    
+    Returns:
+        (successful updates, failed updates)
+    """
+    metrics_by_id = {metric.id: metric for metric in metrics}
+    successful_updates = 0
+    failed_updates = 0
+    
+    def record(metric: MetricInfo, success: bool):
+        nonlocal successful_updates, failed_updates
+        if success:
+            successful_updates += 1
+        else:
+            failed_updates += 1
+        if on_result is not None:
+            on_result(metric, success)
+    
+    fetch_requests = []
+    for metric in metrics:
+        try:
+            fetch_requests.append(data_manager.build_fetch_request(metric, force_update))
+        except Exception as e:
+            logger.error(f"Failed to update {metric.id}: {e}")
+            record(metric, False)
+    
+    def on_fetched(series_id: str, data_points: ObservationBatch, metadata: Optional[Dict]):
+        metric = metrics_by_id[series_id]
+        logger.info(f"Updating metric: {series_id} ({metric.name})")
+        record(metric, data_manager.apply_fetched_data(metric, data_points, metadata, force_update))
+    
+    started = time.time()
+    async_client.fetch_all(fetch_requests, data_manager.metadata_due, on_fetched)
+    elapsed = time.time() - started
+    if fetch_requests:
+        logger.info(f"Fetched {len(fetch_requests)} metrics with {async_client.max_concurrency} concurrent "
+                    f"requests in {elapsed:.1f}s ({len(fetch_requests) / max(elapsed, 1e-9):.2f} metrics/s)")
+    
+    return successful_updates, failed_updates
 
 def load_api_key() -> str:
     """Load FRED API key from environment or .env file"""
@@ -400,6 +952,17 @@ def load_api_key() -> str:
     
     raise ValueError("FRED_API_KEY not found in environment or .env file (checked current directory and parent directory)")
 
+def print_plan(plan: List):
+    """Print a refresh plan"""
+    to_fetch = [planned for planned in plan if planned.fetch]
+    print(f"📋 Refresh plan: {len(to_fetch)} of {len(plan)} metrics to fetch")
+    print("=" * 60)
+    
+    for planned in plan:
+        marker = "⬇️ " if planned.fetch else "⏭️ "
+        frequency = planned.metric.update_frequency
+        print(f"{marker} {planned.metric.id:<16} {frequency:<10} {planned.reason}")
+
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(description='Refresh FRED economic data')
@@ -408,23 +971,86 @@ def main():
     parser.add_argument('--metrics', type=str,
                        help='Comma-separated list of specific metrics to update')
     parser.add_argument('--csv-file', type=str, default='../data/fred_data.csv',
-                       help='Path to CSV file for storing data')
+                       help='Path to the data store (its extension selects the backend)')
+    parser.add_argument('--store', type=str, choices=sorted(STORE_BACKENDS),
+                       help='Storage backend; overrides the extension of --csv-file')
     parser.add_argument('--schema-file', type=str, default='../schema.json',
                        help='Path to schema file')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Number of worker threads fetching metrics (writes stay on a single writer)')
+    parser.add_argument('--concurrency', type=int, default=1,
+                       help='Number of API requests the async client keeps in flight (values above 1 need aiohttp)')
+    parser.add_argument('--requests-per-second', type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                       help='Sustained API request rate (token-bucket refill rate)')
+    parser.add_argument('--burst', type=int, default=DEFAULT_RATE_LIMIT_BURST,
+                       help='Number of API requests that may be sent back to back')
+    parser.add_argument('--rate-limit-file', type=str,
+                       help='State file for sharing the rate limit between concurrent refresh processes')
+    parser.add_argument('--pool-size', type=int, default=10,
+                       help='Maximum number of pooled keep-alive connections to the FRED API')
+    parser.add_argument('--cache-dir', type=str,
+                       help='Directory for cached API responses (default: .cache/http next to the CSV file)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Always fetch from the API without reading or writing the response cache')
+    parser.add_argument('--cache-only', action='store_true',
+                       help='Serve every request from the response cache and never touch the network')
+    parser.add_argument('--stream', action='store_true',
+                       help='Parse observation responses while they download (flat memory for long histories)')
+    parser.add_argument('--metadata-refresh-days', type=float, default=DEFAULT_REFRESH_INTERVAL_DAYS,
+                       help='Re-fetch stored series metadata after this many days')
+    parser.add_argument('--plan', action='store_true',
+                       help='Print which metrics would be fetched and why, then exit without fetching')
+    parser.add_argument('--ignore-plan', action='store_true',
+                       help='Fetch every selected metric even if no new release is expected')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue the previous run, updating only the series it did not finish')
+    parser.add_argument('--release-calendar', action='store_true',
+                       help='Also plan with the FRED release calendar (cached next to the data, refreshed weekly)')
+    parser.add_argument('--export-dir', type=str, default='../public/data',
+                       help='Directory to write the web app data files to after the refresh')
+    parser.add_argument('--no-export', action='store_true',
+                       help='Skip exporting the web app data files')
     
     args = parser.parse_args()
     
+    if args.no_cache and args.cache_only:
+        parser.error('--no-cache and --cache-only cannot be used together')
+    if args.workers > 1 and args.concurrency > 1:
+        parser.error('--workers and --concurrency cannot be used together')
+    
     try:
-        # Load API key
-        api_key = load_api_key()
-        logger.info("FRED API key loaded successfully")
+        # Load API key (not needed when every response comes from the cache)
+        try:
+            api_key = load_api_key()
+            logger.info("FRED API key loaded successfully")
+        except ValueError:
+            if not args.cache_only:
+                raise
+            api_key = ''
+            logger.info("No FRED API key found; serving all requests from the response cache")
+        
+        data_manager = FredDataManager(args.csv_file, args.schema_file, args.metadata_refresh_days, args.store)
+        
+        if data_manager.is_legacy_format():
+            logger.error(f"{args.csv_file} uses the old wide layout; convert it first with "
+                         f"python migrate_csv_store.py --csv-file {args.csv_file}")
+            return 1
         
         # Initialize components
-        fred_client = FredApiClient(api_key)
-        data_manager = FredDataManager(args.csv_file, args.schema_file)
+        rate_limiter = TokenBucketRateLimiter(args.requests_per_second, args.burst, args.rate_limit_file)
         
-        # Load existing data
-        existing_data = data_manager.load_existing_data()
+        cache = None
+        if not args.no_cache:
+            cache_dir = args.cache_dir or Path(args.csv_file).parent / '.cache' / 'http'
+            cache = ResponseCache(cache_dir, cache_only=args.cache_only)
+        
+        # Every worker needs its own pooled connection, otherwise they queue on the pool
+        fred_client = FredApiClient(api_key, pool_size=max(args.pool_size, args.workers), rate_limiter=rate_limiter,
+                                    cache=cache, stream_observations=args.stream)
+        # The async client sends its requests through the same cache and rate limiter
+        async_client = AsyncFredApiClient(fred_client, args.concurrency) if args.concurrency > 1 else None
+        # Summarize existing data
+        data_manager.load_series_index()
         
         # Get metrics to update
         all_metrics = data_manager.get_metrics_to_track()
@@ -440,33 +1066,106 @@ def main():
         else:
             metrics_to_update = all_metrics
         
+        journal = RunJournal(data_manager.data_dir / 'fred_refresh_journal.json')
+        
+        if args.resume:
+            # Continue the journaled run with the series it did not finish
+            if not journal.exists:
+                logger.error(f"No run journal to resume at {journal.path}")
+                return 1
+            if journal.finished:
+                logger.info("The previous run finished, nothing to resume")
+                return 0
+            
+            journal.resume(appends_are_durable=not data_manager.store.transactional)
+            unfinished = set(journal.unfinished())
+            # With every series committed, only the export of the interrupted run is redone
+            metrics_to_update = [m for m in all_metrics if m.id in unfinished]
+            # Rows the interrupted run committed have not been exported yet
+            data_manager.changed_series.update(journal.written_series())
+            args.force = journal.options.get('force', args.force)
+            logger.info(f"Resuming previous run with {len(metrics_to_update)} unfinished metrics")
+        else:
+            # Skip series that cannot have new data yet
+            calendar = None
+            if args.release_calendar:
+                calendar = ReleaseCalendar(data_manager.data_dir / 'fred_release_calendar.json')
+                calls = calendar.update(fred_client, [m.id for m in metrics_to_update])
+                calendar.save()
+                logger.info(f"Release calendar: {calls} API calls to update it")
+                data_manager.release_calendar = calendar
+            
+            planner = RefreshPlanner(data_manager.series_index, data_manager.metadata_store, calendar)
+            plan = planner.plan(metrics_to_update, args.force or args.ignore_plan)
+            
+            if args.plan:
+                print_plan(plan)
+                fred_client.close()
+                return 0
+            
+            skipped = [planned for planned in plan if not planned.fetch]
+            metrics_to_update = [planned.metric for planned in plan if planned.fetch]
+            if skipped:
+                logger.info(f"Planner skipped {len(skipped)} metrics with no new release expected")
+            
+            journal.start([m.id for m in metrics_to_update], {'force': args.force})
+        
+        data_manager.journal = journal
         logger.info(f"Updating {len(metrics_to_update)} metrics...")
         
-        # Update each metric
-        successful_updates = 0
-        failed_updates = 0
+        def record_result(metric: MetricInfo, success: bool):
+            journal.mark(metric.id, WRITTEN if success else FAILED)
         
-        for metric in metrics_to_update:
-            success = data_manager.update_metric(
-                metric, fred_client, existing_data, args.force
-            )
-            
-            if success:
-                successful_updates += 1
+        # All writes of the run share one transaction where the store supports it
+        with data_manager.store.transaction():
+            # The token bucket paces the requests, so no delay between metrics is needed
+            if async_client is not None:
+                successful_updates, failed_updates = update_metrics_async(
+                    data_manager, metrics_to_update, async_client, args.force, record_result
+                )
             else:
-                failed_updates += 1
-            
-            # Small delay between metrics
-            time.sleep(0.2)
+                successful_updates, failed_updates = update_metrics_with_workers(
+                    data_manager, metrics_to_update, fred_client, args.workers, args.force, record_result
+                )
+        
+        data_manager.store.close()
+        # The store has committed everything written above
+        journal.commit_written()
+        data_manager.metadata_store.save()
+        data_manager.save_series_metadata(all_metrics)
+        
+        if not args.no_export:
+            questions_file = Path(args.schema_file).parent / 'src' / 'data' / 'questions.ts'
+            rules_file = Path(args.schema_file).parent / 'mood_rules.json'
+            logger.info(f"Changed series: {len(data_manager.changed_series)} "
+                        f"({', '.join(sorted(data_manager.changed_series)) or 'none'})")
+            exported = export_frontend_data(data_manager.store, args.export_dir, questions_file, rules_file,
+                                            data_manager.changed_series)
+            logger.info(f"Rescored {len(exported['rescored'])} questions: {', '.join(exported['rescored']) or 'none'}")
+            for line in format_size_report(exported['sizes']):
+                logger.info(line)
+            data_manager.store.close()
+        
+        # Only now is there nothing left for --resume to redo
+        journal.finish()
         
         # Summary
         logger.info(f"Update complete: {successful_updates} successful, {failed_updates} failed")
+        logger.info(f"Run journal {journal.path}: {journal.summary()}")
+        
+        stats = fred_client.connection_stats()
+        logger.info(f"HTTP connections: {stats['requests']} requests, "
+                    f"{stats['opened']} opened, {stats['reused']} reused")
+        if cache is not None:
+            logger.info(f"Response cache: {cache.stats['hits']} hits, "
+                        f"{cache.stats['revalidated']} revalidated, {cache.stats['misses']} misses")
+        fred_client.close()
         
         if failed_updates > 0:
             return 1
         
         return 0
-        
+    
     except Exception as e:
         logger.error(f"Script failed: {e}")
         return 1
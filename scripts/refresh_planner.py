@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Refresh planner for FRED metrics
+
+Most tracked series are monthly or quarterly releases that only change on
+known dates, so querying every series on every run mostly returns nothing
+new. The planner decides per series whether a fetch can possibly find new
+data, from:
+- the newest stored observation and the series' update_frequency: the next
+  observation cannot be published before its date, and for monthly,
+  quarterly and annual series (dated at the start of their period) not
+  before the period has ended
+- the stored FRED metadata: an observation_end past the newest stored
+  observation means FRED already has newer data
+- optionally, the FRED release calendar (fred/series/release and
+  fred/release/dates), cached in a JSON file: a series is only fetched once
+  one of its release dates has passed since FRED last updated it
+"""
+
+import json
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+from atomic_io import atomic_write
+from fred_store import SeriesIndex
+from metadata_store import SeriesMetadataStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CALENDAR_REFRESH_DAYS = 7
+# Cached release and release-date responses are reused for a day (e.g. when
+# the calendar file was deleted, or by another data directory's calendar)
+CALENDAR_CACHE_TTL_SECONDS = 24 * 3600
+
+# Length of one observation period per schema update_frequency
+FREQUENCY_PERIODS = {
+    'daily': pd.DateOffset(days=1),
+    'weekly': pd.DateOffset(weeks=1),
+    'monthly': pd.DateOffset(months=1),
+    'quarterly': pd.DateOffset(months=3),
+    'annually': pd.DateOffset(years=1),
+    'annual': pd.DateOffset(years=1),
+}
+
+# Frequencies whose observations are dated at the start of their period
+PERIOD_START_FREQUENCIES = {'monthly', 'quarterly', 'annually', 'annual'}
+
+@dataclass
+class PlannedRefresh:
+    """Planner decision for one metric"""
+    metric: object
+    fetch: bool
+    reason: str
+    next_check: Optional[str] = None
+
+def earliest_next_release(last_date: str, update_frequency: str) -> Optional[str]:
+    """
+    Earliest date the observation after last_date could be published
+    
+    Returns None for frequencies the planner does not know.
+    """
+    period = FREQUENCY_PERIODS.get(update_frequency.lower())
+    if period is None:
+        return None
+    
+    next_date = pd.Timestamp(last_date) + period
+    if update_frequency.lower() in PERIOD_START_FREQUENCIES:
+        next_date += period
+    return next_date.strftime('%Y-%m-%d')
+
+class ReleaseCalendar:
+    """JSON-backed cache of which FRED release each series belongs to and its release dates"""
+    
+    def __init__(self, path: Union[str, Path], refresh_interval_days: float = DEFAULT_CALENDAR_REFRESH_DAYS):
+        self.path = Path(path)
+        self.refresh_interval = timedelta(days=refresh_interval_days)
+        self._series: Dict[str, Dict] = {}
+        self._releases: Dict[str, Dict] = {}
+        self._dirty = False
+        self.load()
+    
+    def load(self):
+        """Load the cached calendar from disk"""
+        if not self.path.exists():
+            return
+        
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self._series = data.get('series', {})
+            self._releases = data.get('releases', {})
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load release calendar {self.path}, starting empty: {e}")
+            self._series, self._releases = {}, {}
+    
+    def _is_stale(self, entry: Optional[Dict]) -> bool:
+        if not entry:
+            return True
+        try:
+            fetched_at = datetime.fromisoformat(entry['fetched_at'])
+        except (KeyError, ValueError):
+            return True
+        return datetime.now() - fetched_at >= self.refresh_interval
+    
+    def release_id(self, series_id: str) -> Optional[str]:
+        """Get the FRED release a series belongs to, if known"""
+        entry = self._series.get(series_id)
+        return str(entry['release_id']) if entry and entry.get('release_id') is not None else None
+    
+    def release_dates(self, series_id: str) -> List[str]:
+        """Get the known release dates (YYYY-MM-DD, ascending) of a series' release"""
+        release_id = self.release_id(series_id)
+        if release_id is None:
+            return []
+        return self._releases.get(release_id, {}).get('dates', [])
+    
+    def series_needs_refresh(self, series_id: str) -> bool:
+        """Check whether the series -> release mapping should be fetched again"""
+        return self._is_stale(self._series.get(series_id))
+    
+    def release_needs_refresh(self, release_id: str) -> bool:
+        """Check whether a release's dates should be fetched again"""
+        return self._is_stale(self._releases.get(str(release_id)))
+    
+    def set_series_release(self, series_id: str, release: Dict):
+        """Record the release a series belongs to"""
+        self._series[series_id] = {
+            'release_id': release.get('id'),
+            'release_name': release.get('name', ''),
+            'fetched_at': datetime.now().isoformat()
+        }
+        self._dirty = True
+    
+    def set_release_dates(self, release_id: str, dates: List[str]):
+        """Record the release dates of a release"""
+        self._releases[str(release_id)] = {
+            'dates': sorted(set(dates)),
+            'fetched_at': datetime.now().isoformat()
+        }
+        self._dirty = True
+    
+    def update(self, fred_client, series_ids: List[str]) -> int:
+        """
+        Fetch missing or stale calendar entries for the given series
+        
+        Returns:
+            Number of API calls made
+        """
+        calls = 0
+        for series_id in series_ids:
+            if self.series_needs_refresh(series_id):
+                release = fred_client.get_series_release(series_id, CALENDAR_CACHE_TTL_SECONDS)
+                calls += 1
+                if release:
+                    self.set_series_release(series_id, release)
+        
+        release_ids = {self.release_id(series_id) for series_id in series_ids} - {None}
+        for release_id in sorted(release_ids):
+            if self.release_needs_refresh(release_id):
+                dates = fred_client.get_release_dates(release_id, CALENDAR_CACHE_TTL_SECONDS)
+                calls += 1
+                if dates:
+                    self.set_release_dates(release_id, dates)
+        
+        return calls
+    
+    def save(self):
+        """Write the calendar to disk if anything changed"""
+        if not self._dirty:
+            return
+        
+        payload = json.dumps({'series': self._series, 'releases': self._releases}, indent=2, sort_keys=True)
+        
+        with atomic_write(self.path) as f:
+            f.write(payload)
+        
+        self._dirty = False
+        logger.info(f"Saved release calendar for {len(self._series)} series to {self.path}")
+
+class RefreshPlanner:
+    """Decides which metrics a refresh run should fetch"""
+    
+    def __init__(self, series_index: SeriesIndex, metadata_store: SeriesMetadataStore,
+                 calendar: Optional[ReleaseCalendar] = None, today: Optional[date] = None):
+        self.series_index = series_index
+        self.metadata_store = metadata_store
+        self.calendar = calendar
+        self.today = (today or date.today()).isoformat()
+    
+    def plan_metric(self, metric, force_update: bool = False) -> PlannedRefresh:
+        """Decide whether one metric should be fetched"""
+        series_id = metric.id
+        
+        if force_update:
+            return PlannedRefresh(metric, True, "forced")
+        
+        last_date = self.series_index.last_date(series_id)
+        if last_date is None:
+            return PlannedRefresh(metric, True, "no stored observations")
+        
+        metadata = self.metadata_store.get(series_id)
+        observation_end = metadata.get('observation_end')
+        if observation_end and observation_end > last_date:
+            return PlannedRefresh(metric, True, f"FRED has observations through {observation_end}")
+        
+        earliest = earliest_next_release(last_date, metric.update_frequency)
+        if earliest is None:
+            return PlannedRefresh(metric, True, f"unknown frequency {metric.update_frequency}")
+        if earliest > self.today:
+            return PlannedRefresh(metric, False, f"observation after {last_date} not out before {earliest}", earliest)
+        
+        # The calendar can only narrow the window: wait for a release after FRED's last update
+        release_dates = self.calendar.release_dates(series_id) if self.calendar else []
+        if release_dates:
+            last_updated = (metadata.get('last_updated') or '')[:10]
+            pending = [d for d in release_dates if d > last_updated]
+            if pending and pending[0] <= self.today:
+                return PlannedRefresh(metric, True, f"released {pending[0]}")
+            next_release = pending[0] if pending else None
+            reason = f"next release {next_release}" if next_release else "no scheduled release"
+            return PlannedRefresh(metric, False, reason, next_release)
+        
+        return PlannedRefresh(metric, True, f"observation after {last_date} may be out since {earliest}")
+    
+    def plan(self, metrics: List, force_update: bool = False) -> List[PlannedRefresh]:
+        """Plan every metric, in the given order"""
+        return [self.plan_metric(metric, force_update) for metric in metrics]
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+On-disk HTTP response cache for FRED API calls
+
+Responses are stored under the data directory, keyed by endpoint and query
+parameters (the API key is never part of the key or the stored metadata).
+Each entry keeps the raw response body together with the time it was fetched
+and any ETag / Last-Modified validators FRED sent, so an expired entry can be
+revalidated with a conditional request instead of downloaded again.
+
+How long an entry stays fresh depends on the metric's update_frequency; see
+CACHE_TTL_SECONDS.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Union
+
+from atomic_io import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Freshness window per schema update_frequency, in seconds
+CACHE_TTL_SECONDS = {
+    'daily': 6 * 3600,
+    'weekly': 12 * 3600,
+    'monthly': 24 * 3600,
+    'quarterly': 2 * 24 * 3600,
+    'annually': 7 * 24 * 3600,
+    'annual': 7 * 24 * 3600,
+}
+
+# Query parameters that never affect the response content
+IGNORED_PARAMS = {'api_key'}
+
+# Read size when a body is streamed from or into the cache
+STREAM_CHUNK_SIZE = 64 * 1024
+
+class CacheMissError(Exception):
+    """Raised in cache-only mode when a response is not in the cache"""
+
+def cache_ttl_for_frequency(update_frequency: str) -> Optional[float]:
+    """Get the freshness window for a metric update frequency (None = always revalidate)"""
+    return CACHE_TTL_SECONDS.get(update_frequency.lower())
+
+@dataclass
+class CacheEntry:
+    """A cached response body and its validators"""
+    key: str
+    body_path: Path
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    
+    def is_fresh(self, ttl: Optional[float]) -> bool:
+        """Check whether the entry is younger than ttl seconds"""
+        if ttl is None:
+            return False
+        return time.time() - self.fetched_at < ttl
+    
+    def read_body(self) -> bytes:
+        """Read the cached response body"""
+        return self.body_path.read_bytes()
+    
+    def iter_body(self, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """Read the cached response body in chunks"""
+        with open(self.body_path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers for revalidating this entry with the server"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class ResponseCache:
+    """Content cache for API responses keyed by endpoint and parameters"""
+    
+    def __init__(self, cache_dir: Union[str, Path], cache_only: bool = False):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_only = cache_only
+        self.stats = {'hits': 0, 'revalidated': 0, 'misses': 0}
+        self._stats_lock = threading.Lock()
+    
+    def count(self, outcome: str):
+        """Count a 'hits', 'revalidated' or 'misses' outcome (worker threads share the cache)"""
+        with self._stats_lock:
+            self.stats[outcome] += 1
+    
+    def key(self, endpoint: str, params: Dict) -> str:
+        """Build a stable cache key for a request"""
+        relevant = {k: str(v) for k, v in params.items() if k not in IGNORED_PARAMS}
+        raw = json.dumps({'endpoint': endpoint, 'params': relevant}, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def _paths(self, key: str):
+        directory = self.cache_dir / key[:2]
+        return directory / f"{key}.meta.json", directory / f"{key}.body"
+    
+    def lookup(self, endpoint: str, params: Dict) -> Optional[CacheEntry]:
+        """Find the cached entry for a request, if any"""
+        key = self.key(endpoint, params)
+        meta_path, body_path = self._paths(key)
+        
+        if not meta_path.exists() or not body_path.exists():
+            return None
+        
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            return CacheEntry(
+                key=key,
+                body_path=body_path,
+                fetched_at=float(meta['fetched_at']),
+                etag=meta.get('etag'),
+                last_modified=meta.get('last_modified')
+            )
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {meta_path}: {e}")
+            return None
+    
+    def _write_atomic(self, path: Path, data: bytes):
+        with atomic_write(path, 'wb') as f:
+            f.write(data)
+    
+    def _write_meta(self, entry: CacheEntry, endpoint: str, params: Dict):
+        meta_path, _ = self._paths(entry.key)
+        meta = {
+            'endpoint': endpoint,
+            'params': {k: str(v) for k, v in params.items() if k not in IGNORED_PARAMS},
+            'fetched_at': entry.fetched_at,
+            'etag': entry.etag,
+            'last_modified': entry.last_modified
+        }
+        self._write_atomic(meta_path, json.dumps(meta, indent=2).encode('utf-8'))
+    
+    def store(self, endpoint: str, params: Dict, body: bytes,
+              etag: Optional[str] = None, last_modified: Optional[str] = None) -> CacheEntry:
+        """Store a response body with its validators"""
+        key = self.key(endpoint, params)
+        _, body_path = self._paths(key)
+        
+        self._write_atomic(body_path, body)
+        entry = CacheEntry(key, body_path, time.time(), etag, last_modified)
+        self._write_meta(entry, endpoint, params)
+        return entry
+    
+    @contextmanager
+    def storing(self, endpoint: str, params: Dict, chunks: Iterable[bytes],
+                etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """
+        Store a streamed response body while it is being consumed
+        
+        Yields an iterator over chunks that also writes each chunk to a
+        temporary file. The entry is only committed if the block exits without
+        an error, so a failed download never leaves a truncated body behind.
+        """
+        key = self.key(endpoint, params)
+        _, body_path = self._paths(key)
+        
+        with atomic_write(body_path, 'wb') as f:
+            def tee():
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            
+            yield tee()
+        
+        self._write_meta(CacheEntry(key, body_path, time.time(), etag, last_modified), endpoint, params)
+    
+    def touch(self, entry: CacheEntry, endpoint: str, params: Dict) -> CacheEntry:
+        """Mark an entry as fresh after the server confirmed it is unchanged"""
+        entry.fetched_at = time.time()
+        self._write_meta(entry, endpoint, params)
+        return entry
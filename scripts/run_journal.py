@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Run journal for resumable refreshes
+
+Each refresh run records the series it planned to update, the status of each
+one and the observation rows it wrote, in a JSON file next to the data. The
+file is rewritten after every change, so when a run dies part way through the
+next run can pick up with `--resume` and only update the series that did not
+finish. A run only counts as finished once the web app export that follows the
+store commit has been written too, so `--resume` redoes an export that crashed.
+
+Series statuses:
+- pending: planned, not processed yet
+- written: observations handed to the store, not yet committed
+- done: committed to the store
+- failed: the fetch or the write failed
+"""
+
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from atomic_io import atomic_write
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+WRITTEN = 'written'
+DONE = 'done'
+FAILED = 'failed'
+
+class RunJournal:
+    """JSON record of one refresh run's planned series and their progress"""
+    
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.data: Dict = {}
+        self.load()
+    
+    def load(self):
+        """Load the journal of the previous run, if any"""
+        if not self.path.exists():
+            self.data = {}
+            return
+        
+        try:
+            with open(self.path, 'r') as f:
+                self.data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable run journal {self.path}: {e}")
+            self.data = {}
+    
+    @property
+    def exists(self) -> bool:
+        """Whether a previous run left a journal"""
+        return bool(self.data.get('series'))
+    
+    @property
+    def finished(self) -> bool:
+        """Whether the journaled run got through its store commit and export"""
+        return bool(self.data.get('finished_at'))
+    
+    @property
+    def options(self) -> Dict:
+        """Options the journaled run was started with"""
+        return self.data.get('options', {})
+    
+    def start(self, series_ids: List[str], options: Optional[Dict] = None):
+        """Start a new run, replacing the previous journal"""
+        self.data = {
+            'started_at': datetime.now().isoformat(),
+            'finished_at': None,
+            'options': options or {},
+            'series': {series_id: {'status': PENDING, 'writes': []} for series_id in series_ids}
+        }
+        self.save()
+    
+    def resume(self, appends_are_durable: bool = False):
+        """
+        Continue the journaled run, retrying every series that was not committed
+        
+        Args:
+            appends_are_durable: The store persists appends as soon as they are
+                made (no run-wide transaction), so written series that only
+                appended rows are already complete and are not retried
+        """
+        for entry in self.data.get('series', {}).values():
+            status = entry.get('status')
+            if status == WRITTEN and appends_are_durable and \
+                    all(write.get('kind') == 'append' for write in entry.get('writes', [])):
+                entry['status'] = DONE
+            elif status != DONE:
+                entry['status'] = PENDING
+                entry['writes'] = []
+        self.data['resumed_at'] = datetime.now().isoformat()
+        self.data['finished_at'] = None
+        self.save()
+    
+    def unfinished(self) -> List[str]:
+        """Series of the journaled run that were not committed, in planned order"""
+        return [
+            series_id for series_id, entry in self.data.get('series', {}).items()
+            if entry.get('status') != DONE
+        ]
+    
+    def written_series(self) -> List[str]:
+        """Series the journaled run committed observation rows for"""
+        return [
+            series_id for series_id, entry in self.data.get('series', {}).items()
+            if entry.get('status') == DONE and entry.get('writes')
+        ]
+    
+    def record_rows(self, series_id: str, row_count: int, first_date: str, last_date: str, kind: str = 'append'):
+        """Record an observation range written for a series ('append' or 'replace')"""
+        entry = self.data['series'].setdefault(series_id, {'status': PENDING, 'writes': []})
+        entry['writes'].append({'kind': kind, 'rows': row_count, 'first_date': first_date, 'last_date': last_date})
+    
+    def mark(self, series_id: str, status: str):
+        """Set the status of a series and save the journal"""
+        entry = self.data['series'].setdefault(series_id, {'status': PENDING, 'writes': []})
+        entry['status'] = status
+        entry['updated_at'] = datetime.now().isoformat()
+        self.save()
+    
+    def commit_written(self):
+        """Mark every written series as done once the store has committed the run"""
+        for entry in self.data.get('series', {}).values():
+            if entry.get('status') == WRITTEN:
+                entry['status'] = DONE
+        self.save()
+    
+    def finish(self):
+        """Mark the run as finished once its export has been written (or skipped)"""
+        self.data['finished_at'] = datetime.now().isoformat()
+        self.save()
+    
+    def summary(self) -> Dict[str, int]:
+        """Count series per status"""
+        counts: Dict[str, int] = {}
+        for entry in self.data.get('series', {}).values():
+            status = entry.get('status', PENDING)
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+    
+    def save(self):
+        """Write the journal to disk"""
+        payload = json.dumps(self.data, indent=2)
+        
+        with atomic_write(self.path) as f:
+            f.write(payload)
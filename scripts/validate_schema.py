@@ -8,16 +8,21 @@ Validates the schema.json file to ensure:
 - Messages are appropriate length
 - Categories are consistent
 - No duplicate metrics
+- The mood rule table (mood_rules.json) is well formed and only scores
+  series the schema tracks
 
 Usage:
-    python scripts/validate_schema.py [--schema-file PATH]
+    python scripts/validate_schema.py [--schema-file PATH] [--rules-file PATH]
 """
 
 import json
 import argparse
 import re
+from pathlib import Path
 from typing import List, Dict, Set
 
+from mood_scoring import load_rule_table
+
 def validate_fred_series_id(series_id: str) -> bool:
     """Validate FRED series ID format"""
     # FRED series IDs are typically uppercase alphanumeric with some special chars
@@ -72,7 +77,20 @@ def validate_metric(metric: Dict, index: int) -> List[str]:
     
     return errors
 
-def validate_schema(schema_file: str = "schema.json") -> bool:
+def validate_rules(rules_file: str, series_ids: Set[str]) -> List[str]:
+    """Validate the mood rule table against the schema's series"""
+    try:
+        rules = load_rule_table(rules_file)
+    except (ValueError, KeyError, TypeError, json.JSONDecodeError) as e:
+        return [f"Rule table: {e}"]
+    
+    print(f"📏 Found {len(rules)} mood rules")
+    return [
+        f"Rule table: {rule.series_id} ({rule.question}) is not in metrics_to_track"
+        for rule in rules if rule.series_id not in series_ids
+    ]
+
+def validate_schema(schema_file: str = "schema.json", rules_file: str = None) -> bool:
     """Validate the entire schema file"""
     print(f"🔍 Validating schema file: {schema_file}")
     
@@ -132,6 +150,11 @@ def validate_schema(schema_file: str = "schema.json") -> bool:
         if 'category' in metric:
             categories.add(metric['category'])
     
+    if rules_file and Path(rules_file).exists():
+        errors.extend(validate_rules(rules_file, series_ids))
+    elif rules_file:
+        warnings.append(f"Rule table not found: {rules_file}")
+    
     # Summary statistics
     print(f"\n📈 VALIDATION SUMMARY")
     print(f"   Total metrics: {len(metrics)}")
@@ -160,10 +183,12 @@ def main():
     parser = argparse.ArgumentParser(description='Validate FRED schema file')
     parser.add_argument('--schema-file', type=str, default='schema.json',
                        help='Path to schema file to validate')
+    parser.add_argument('--rules-file', type=str, default='mood_rules.json',
+                       help='Path to the mood rule table to validate')
     
     args = parser.parse_args()
     
-    success = validate_schema(args.schema_file)
+    success = validate_schema(args.schema_file, args.rules_file)
     
     if not success:
         exit(1)
@@ -1,6 +1,14 @@
 import { FredData } from '../types';
 import { mockFredData } from './mockFredData';
-import { loadRealFredData, getRealDataSummary } from './realFredData';
+import {
+  loadRealFredData,
+  loadRealFredShard,
+  loadPrecomputedScores,
+  loadMoodHistory,
+  getRealDataSummary,
+  PrecomputedQuestionScore,
+  QuestionMoodHistory
+} from './realFredData';
 import { 
   getEffectiveDataSource, 
   shouldFallbackToMock, 
@@ -65,6 +73,65 @@ export async function getFredData(): Promise<FredData> {
   }
 }
 
+/**
+ * Get FRED data for the series of one question
+ * With real data only the question's shard is downloaded, unless the full dataset is already loaded
+ */
+export async function getFredDataForQuestion(questionId: string): Promise<FredData> {
+  const targetDataSource = getEffectiveDataSource();
+  
+  if (currentFredData && currentDataSource === targetDataSource) {
+    return currentFredData;
+  }
+  
+  if (targetDataSource === 'real') {
+    try {
+      const shardData = await loadRealFredShard('question', questionId);
+      logDataSourceInfo(`✅ Loaded real FRED data for question ${questionId} (${Object.keys(shardData).length} series)`);
+      return shardData;
+    } catch (error) {
+      console.error(`❌ Failed to load data shard for ${questionId}, loading the full dataset:`, error);
+    }
+  }
+  
+  return await getFredData();
+}
+
+/**
+ * Get the precomputed score of a question
+ * Returns null with mock data, or when the scores cannot be loaded, so the caller scores in the browser
+ */
+export async function getPrecomputedScore(questionId: string): Promise<PrecomputedQuestionScore | null> {
+  if (getEffectiveDataSource() !== 'real') {
+    return null;
+  }
+  
+  try {
+    const scores = await loadPrecomputedScores();
+    return scores[questionId] ?? null;
+  } catch (error) {
+    console.error('❌ Failed to load precomputed scores, scoring in the browser:', error);
+    return null;
+  }
+}
+
+/**
+ * Get a question's mood over time, backfilled by the data export
+ * Returns null with mock data, or when the history cannot be loaded, so the caller leaves the history out
+ */
+export async function getMoodHistory(questionId: string): Promise<QuestionMoodHistory | null> {
+  if (getEffectiveDataSource() !== 'real') {
+    return null;
+  }
+  
+  try {
+    return await loadMoodHistory(questionId);
+  } catch (error) {
+    console.error('❌ Failed to load mood history:', error);
+    return null;
+  }
+}
+
 /**
  * Force reload of data (clears cache)
  */
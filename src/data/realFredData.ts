@@ -1,12 +1,173 @@
-import { FredData } from '../types';
+import { FredData, FredDataPoint } from '../types';
 
-// Cache for loaded data to avoid re-parsing
+// Files written by scripts/export_frontend_data.py
+const DATA_BASE_URL = '/data';
+const MANIFEST_URL = `${DATA_BASE_URL}/manifest.json`;
+const MS_PER_DAY = 86400000;
+
+interface ShardEntry {
+  file: string;
+  hash: string;
+  series: string[];
+}
+
+interface DataManifest {
+  version: number;
+  generated_at: string;
+  observations: string;
+  metadata: string;
+  scores: string;
+  history: string;
+  series_count: number;
+  // Content hash of each series, shared by every file that contains it
+  series: { [seriesId: string]: string };
+  shards: {
+    question: { [questionId: string]: ShardEntry };
+  };
+}
+
+interface ObservationsArtifact {
+  version: number;
+  series: {
+    // days: first date as days since 1970-01-01, then the gap in days to each next date
+    [seriesId: string]: { days: number[]; values: number[] };
+  };
+}
+
+export interface PrecomputedIndicatorScore {
+  series: string;
+  mood: 'good' | 'neutral' | 'bad';
+  score: number;
+  value: number | null;
+  date: string | null;
+  previous_value: number | null;
+  previous_date: string | null;
+  change: number | null;
+  change_kind: 'point' | 'yoy_pct' | 'level' | 'monthly_delta' | null;
+  status: string;
+}
+
+export interface PrecomputedQuestionScore {
+  score: number;
+  mood: string;
+  emoji: string;
+  color: string;
+  insight: string;
+  good_count: number;
+  neutral_count: number;
+  bad_count: number;
+  indicators: PrecomputedIndicatorScore[];
+}
+
+interface ScoresArtifact {
+  version: number;
+  as_of: string;
+  questions: { [questionId: string]: PrecomputedQuestionScore };
+}
+
+interface ScoreChanges {
+  // Days the score changes, delta-coded like the observations; each score holds until the next one
+  days: number[];
+  scores: number[];
+}
+
+interface MoodHistoryArtifact {
+  version: number;
+  questions: { [questionId: string]: ScoreChanges & { series: { [seriesId: string]: ScoreChanges } } };
+}
+
+export interface MoodHistoryPoint {
+  date: string;
+  score: number;
+}
+
+export interface QuestionMoodHistory {
+  points: MoodHistoryPoint[];
+  series: { [seriesId: string]: MoodHistoryPoint[] };
+}
+
+export type ShardKind = keyof DataManifest['shards'];
+
+// Cache for loaded data to avoid re-fetching
 let cachedRealData: FredData | null = null;
+let cachedManifest: Promise<DataManifest> | null = null;
+let cachedScores: Promise<ScoresArtifact> | null = null;
+let cachedHistory: Promise<MoodHistoryArtifact> | null = null;
+// Decoded series from any file, keyed by series ID with the hash they were decoded at
+let loadedSeries: { [seriesId: string]: { hash: string; points: FredDataPoint[] } } = {};
+
+/**
+ * Fetch the manifest that names the current (content-hashed) data files
+ * The manifest is always revalidated; the files it points to never change
+ */
+function loadManifest(): Promise<DataManifest> {
+  if (!cachedManifest) {
+    cachedManifest = fetch(MANIFEST_URL, { cache: 'no-cache' }).then(response => {
+      if (!response.ok) {
+        throw new Error(`Failed to fetch data manifest: ${response.status}`);
+      }
+      return response.json() as Promise<DataManifest>;
+    });
+    cachedManifest.catch(() => {
+      cachedManifest = null;
+    });
+  }
+  return cachedManifest;
+}
+
+/**
+ * Check whether a series has already been decoded at its current content hash
+ */
+function isSeriesLoaded(manifest: DataManifest, seriesId: string): boolean {
+  const loaded = loadedSeries[seriesId];
+  return loaded !== undefined && loaded.hash === manifest.series[seriesId];
+}
+
+/**
+ * Fetch an observations file (full dataset or shard) and decode the series not loaded yet
+ * Series arrive already sorted by date, so they only need their dates decoded
+ */
+async function loadObservationsFile(manifest: DataManifest, file: string): Promise<string[]> {
+  const response = await fetch(`${DATA_BASE_URL}/${file}`);
+  if (!response.ok) {
+    throw new Error(`Failed to fetch observations: ${response.status}`);
+  }
+  
+  const artifact: ObservationsArtifact = await response.json();
+  
+  Object.entries(artifact.series).forEach(([seriesId, { days, values }]) => {
+    if (isSeriesLoaded(manifest, seriesId)) return;
+    
+    const points: FredDataPoint[] = new Array(days.length);
+    let day = 0;
+    for (let i = 0; i < days.length; i++) {
+      day += days[i];
+      points[i] = {
+        date: new Date(day * MS_PER_DAY).toISOString().slice(0, 10),
+        value: values[i]
+      };
+    }
+    loadedSeries[seriesId] = { hash: manifest.series[seriesId], points };
+  });
+  
+  return Object.keys(artifact.series);
+}
+
+/**
+ * Collect loaded series into the FredData structure
+ */
+function pickSeries(seriesIds: string[]): FredData {
+  const fredData: FredData = {};
+  seriesIds.forEach(seriesId => {
+    if (loadedSeries[seriesId]) {
+      fredData[seriesId] = loadedSeries[seriesId].points;
+    }
+  });
+  return fredData;
+}
 
 /**
- * Load real FRED data from CSV file and convert to expected format
- * This function reads the CSV data and transforms it into the FredData structure
- * expected by the application
+ * Load real FRED data from the exported observations file
  */
 export async function loadRealFredData(): Promise<FredData> {
   // Return cached data if already loaded
@@ -15,60 +176,9 @@ export async function loadRealFredData(): Promise<FredData> {
   }
 
   try {
-    // Fetch the CSV file from the public directory
-    const response = await fetch('/data/fred_data.csv');
-    if (!response.ok) {
-      throw new Error(`Failed to fetch CSV data: ${response.status}`);
-    }
-    
-    const csvText = await response.text();
-    const fredData: FredData = {};
-    
-    // Parse CSV (skip header row)
-    const lines = csvText.trim().split('\n');
-    const header = lines[0];
-    
-    // Verify we have the expected CSV structure
-    if (!header.includes('series_id') || !header.includes('date') || !header.includes('value')) {
-      throw new Error('Invalid CSV format: missing required columns');
-    }
-    
-    // Parse each data row
-    for (let i = 1; i < lines.length; i++) {
-      const line = lines[i].trim();
-      if (!line) continue;
-      
-      // Parse CSV row (handle quoted fields that might contain commas)
-      const fields = parseCSVRow(line);
-      
-      if (fields.length < 8) continue; // Skip malformed rows
-      
-      const seriesId = fields[0];
-      const date = fields[6]; // date column
-      const valueStr = fields[7]; // value column
-      
-      // Skip rows with missing values
-      if (!valueStr || valueStr === 'null' || valueStr === '') continue;
-      
-      const value = parseFloat(valueStr);
-      if (isNaN(value)) continue;
-      
-      // Initialize series array if it doesn't exist
-      if (!fredData[seriesId]) {
-        fredData[seriesId] = [];
-      }
-      
-      // Add data point to series
-      fredData[seriesId].push({
-        date: date,
-        value: value
-      });
-    }
-    
-    // Sort each series by date to ensure chronological order
-    Object.keys(fredData).forEach(seriesId => {
-      fredData[seriesId].sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime());
-    });
+    const manifest = await loadManifest();
+    const seriesIds = await loadObservationsFile(manifest, manifest.observations);
+    const fredData = pickSeries(seriesIds);
     
     // Cache the loaded data
     cachedRealData = fredData;
@@ -84,30 +194,84 @@ export async function loadRealFredData(): Promise<FredData> {
 }
 
 /**
- * Parse a CSV row handling quoted fields that might contain commas
+ * Load only the series of one question from its shard
+ * Nothing is fetched when every series of the shard is already loaded
  */
-function parseCSVRow(row: string): string[] {
-  const fields: string[] = [];
-  let current = '';
-  let inQuotes = false;
-  
-  for (let i = 0; i < row.length; i++) {
-    const char = row[i];
+export async function loadRealFredShard(kind: ShardKind, id: string): Promise<FredData> {
+  try {
+    const manifest = await loadManifest();
+    const shard = manifest.shards[kind]?.[id];
+    if (!shard) {
+      throw new Error(`No ${kind} shard for '${id}'`);
+    }
     
-    if (char === '"') {
-      inQuotes = !inQuotes;
-    } else if (char === ',' && !inQuotes) {
-      fields.push(current.trim());
-      current = '';
-    } else {
-      current += char;
+    if (!shard.series.every(seriesId => isSeriesLoaded(manifest, seriesId))) {
+      await loadObservationsFile(manifest, shard.file);
     }
+    return pickSeries(shard.series);
+    
+  } catch (error) {
+    const errorMessage = error instanceof Error ? error.message : String(error);
+    throw new Error(`Failed to load real FRED data for ${kind} ${id}: ${errorMessage}`);
+  }
+}
+
+/**
+ * Load the mood scores precomputed by the data export (scripts/mood_scoring.py)
+ */
+export async function loadPrecomputedScores(): Promise<{ [questionId: string]: PrecomputedQuestionScore }> {
+  if (!cachedScores) {
+    cachedScores = loadManifest().then(async manifest => {
+      const response = await fetch(`${DATA_BASE_URL}/${manifest.scores}`);
+      if (!response.ok) {
+        throw new Error(`Failed to fetch precomputed scores: ${response.status}`);
+      }
+      return response.json() as Promise<ScoresArtifact>;
+    });
+    cachedScores.catch(() => {
+      cachedScores = null;
+    });
+  }
+  return (await cachedScores).questions;
+}
+
+/**
+ * Decode delta-coded score change days into dated points
+ */
+function decodeScoreChanges({ days, scores }: ScoreChanges): MoodHistoryPoint[] {
+  let day = 0;
+  return scores.map((score, i) => {
+    day += days[i];
+    return { date: new Date(day * MS_PER_DAY).toISOString().slice(0, 10), score };
+  });
+}
+
+/**
+ * Load a question's mood over time, and its series', backfilled by the data export (scripts/mood_history.py)
+ * Points are the dates the score changes; each score holds until the next point
+ */
+export async function loadMoodHistory(questionId: string): Promise<QuestionMoodHistory | null> {
+  if (!cachedHistory) {
+    cachedHistory = loadManifest().then(async manifest => {
+      const response = await fetch(`${DATA_BASE_URL}/${manifest.history}`);
+      if (!response.ok) {
+        throw new Error(`Failed to fetch mood history: ${response.status}`);
+      }
+      return response.json() as Promise<MoodHistoryArtifact>;
+    });
+    cachedHistory.catch(() => {
+      cachedHistory = null;
+    });
   }
   
-  // Add the last field
-  fields.push(current.trim());
+  const question = (await cachedHistory).questions[questionId];
+  if (!question) return null;
   
-  return fields;
+  const series: QuestionMoodHistory['series'] = {};
+  Object.entries(question.series).forEach(([seriesId, changes]) => {
+    series[seriesId] = decodeScoreChanges(changes);
+  });
+  return { points: decodeScoreChanges(question), series };
 }
 
 /**
@@ -115,6 +279,10 @@ function parseCSVRow(row: string): string[] {
  */
 export function clearRealDataCache(): void {
   cachedRealData = null;
+  cachedManifest = null;
+  cachedScores = null;
+  cachedHistory = null;
+  loadedSeries = {};
 }
 
 /**
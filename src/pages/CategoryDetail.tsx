@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
+import { LineChart, Line, ResponsiveContainer, YAxis, XAxis, Tooltip, ReferenceLine } from 'recharts';
 import { ArrowLeft, TrendingUp, TrendingDown, Minus, Info, ExternalLink, Calendar, Scale } from 'lucide-react';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
 import { Button } from '../components/ui/button';
@@ -9,7 +10,8 @@ import { OverallShareButton } from '../components/OverallShareButton';
 import { walletMoodQuestions } from '../data/questions';
 import { calculateScore } from '../utils/scoreCalculator';
 import { getMetricMoodMessage } from '../utils/schemaLoader';
-import { getCurrentDataSourceInfo } from '../data/fredDataProvider';
+import { getCurrentDataSourceInfo, getMoodHistory } from '../data/fredDataProvider';
+import type { MoodHistoryPoint } from '../data/realFredData';
 import type { ScoreResult } from '../types';
 
 // Default demographics for consistent scoring
@@ -23,6 +25,7 @@ const defaultDemographics = {
 export function CategoryDetail() {
   const { categoryId } = useParams<{ categoryId: string }>();
   const [scoreResult, setScoreResult] = useState<ScoreResult | null>(null);
+  const [moodHistory, setMoodHistory] = useState<MoodHistoryPoint[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [dataSourceInfo, setDataSourceInfo] = useState<{ source: 'mock' | 'real' | null }>({ source: null });
@@ -44,8 +47,13 @@ export function CategoryDetail() {
         const sourceInfo = getCurrentDataSourceInfo();
         setDataSourceInfo(sourceInfo);
         
-        const result = await calculateScore(question, defaultDemographics);
+        // Both load the question's own files: its data shard and the mood history
+        const [result, history] = await Promise.all([
+          calculateScore(question, defaultDemographics),
+          getMoodHistory(question.id)
+        ]);
         setScoreResult(result);
+        setMoodHistory(history ? history.points : []);
       } catch (err) {
         console.error('Failed to load score:', err);
         setError(err instanceof Error ? err.message : 'Failed to load economic data');
@@ -220,6 +228,20 @@ export function CategoryDetail() {
           </CardContent>
         </Card>
 
+        {/* Mood History - Only available with real data */}
+        {moodHistory.length >= 2 && (
+          <Card className="mb-8 border-4 border-white/50 shadow-xl">
+            <CardHeader>
+              <CardTitle className="text-2xl font-playful text-center">
+                📅 Mood Over Time
+              </CardTitle>
+            </CardHeader>
+            <CardContent>
+              <MoodHistoryChart points={moodHistory} />
+            </CardContent>
+          </Card>
+        )}
+
         {/* Individual Metrics */}
         <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6 mb-12">
           {scoreResult.indicatorBreakdown.map((indicator) => (
@@ -250,6 +272,58 @@ export function CategoryDetail() {
   );
 }
 
+// Mood History Chart Component
+interface MoodHistoryChartProps {
+  points: MoodHistoryPoint[];
+}
+
+function MoodHistoryChart({ points }: MoodHistoryChartProps) {
+  // Each score holds until the next change, so the line steps at every point
+  const CustomTooltip = ({ active, payload, label }: any) => {
+    if (active && payload && payload.length > 0) {
+      const score = payload[0].value;
+      const mood = score >= 0.5 ? '😀 Yay!' : score >= -0.5 ? '😐 Meh' : '😒 Nay';
+      return (
+        <div className="bg-white border border-gray-200 rounded-lg shadow-lg p-3 text-sm">
+          <p className="font-semibold text-gray-900">{label}</p>
+          <p className="text-gray-600">{mood} ({score.toFixed(2)})</p>
+        </div>
+      );
+    }
+    return null;
+  };
+
+  return (
+    <div className="h-48 w-full">
+      <ResponsiveContainer width="100%" height="100%">
+        <LineChart data={points} margin={{ top: 8, right: 8, left: 8, bottom: 8 }}>
+          <XAxis 
+            dataKey="date" 
+            axisLine={false}
+            tickLine={false}
+            tick={{ fontSize: 10, fill: '#9ca3af' }}
+            tickFormatter={(date: string) => date.slice(0, 4)}
+            minTickGap={40}
+          />
+          <YAxis hide domain={[-1, 1]} />
+          <Tooltip content={<CustomTooltip />} />
+          {/* Use mood_score_system.md rules: +0.5+ = Yay, <-0.5 = Nay */}
+          <ReferenceLine y={0.5} stroke="#22c55e" strokeDasharray="4 4" />
+          <ReferenceLine y={-0.5} stroke="#ef4444" strokeDasharray="4 4" />
+          <Line
+            type="stepAfter"
+            dataKey="score"
+            stroke="#6366f1"
+            strokeWidth={2}
+            dot={false}
+            activeDot={{ r: 3, fill: '#6366f1', stroke: '#fff', strokeWidth: 1 }}
+          />
+        </LineChart>
+      </ResponsiveContainer>
+    </div>
+  );
+}
+
 // Individual Metric Card Component
 interface MetricCardProps {
   indicator: {
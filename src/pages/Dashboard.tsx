@@ -41,8 +41,9 @@ export function Dashboard() {
         
         const results: ScoreResultWithQuestion[] = [];
         
+        // The dashboard draws no charts, so precomputed scores need no raw series
         for (const question of walletMoodQuestions) {
-          const scoreResult = await calculateScore(question, defaultDemographics);
+          const scoreResult = await calculateScore(question, defaultDemographics, { includeChartData: false });
           results.push({ question, scoreResult });
         }
         
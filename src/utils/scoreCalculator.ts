@@ -1,6 +1,8 @@
 import { Demographics, WalletMoodQuestion, ScoreResult, IndicatorMood } from '../types';
-import { getFredData } from '../data/fredDataProvider';
+import { getFredDataForQuestion, getPrecomputedScore } from '../data/fredDataProvider';
+import { PrecomputedQuestionScore } from '../data/realFredData';
 import { loadSchemaMetadata, getFredUrl, formatUnitsForDisplay } from './schemaMetadata';
+import moodRuleTable from '../../mood_rules.json';
 
 // Mapping of FRED series to human-readable names
 const seriesNames: { [key: string]: string } = {
@@ -59,7 +61,7 @@ function getAnnualDataPoint(data: any[], targetDate: Date): any {
   if (currentYearPoint) return currentYearPoint;
   
   // If no current year, get most recent available
-  const sortedData = data.sort((a, b) => new Date(b.date).getTime() - new Date(a.date).getTime());
+  const sortedData = [...data].sort((a, b) => new Date(b.date).getTime() - new Date(a.date).getTime());
   return sortedData[0];
 }
 
@@ -100,7 +102,7 @@ function getAnnualYearAgoDataPoint(data: any[], currentDate: Date): any {
   if (yearAgoPoint) return yearAgoPoint;
   
   // If no exact year, get closest available
-  const sortedData = data.sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime());
+  const sortedData = [...data].sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime());
   return sortedData[Math.max(0, sortedData.length - 2)]; // Second to last data point
 }
 
@@ -135,7 +137,7 @@ function getQuarterlyYearAgoDataPoint(data: any[], currentDate: Date): any {
   }
   
   // Final fallback: get any available point that's roughly a year ago
-  const sortedData = data.sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime());
+  const sortedData = [...data].sort((a, b) => new Date(a.date).getTime() - new Date(b.date).getTime());
   const fallback = sortedData[Math.max(0, sortedData.length - 5)]; // Get a point from earlier in the data
   console.log(`[DEBUG] Using fallback:`, fallback);
   return fallback;
@@ -160,319 +162,64 @@ function getMostRecentDataPoint(data: any[], targetDate: Date) {
   return validPoints[validPoints.length - 1];
 }
 
-// Calculate percentage change between two values
-function calculatePercentageChange(current: number, previous: number): number {
-  return ((current - previous) / previous) * 100;
-}
+// Mood rule table shared with the data export (scripts/mood_scoring.py), so
+// scores computed in the browser match the precomputed ones
+type MoodCondition = [string, number] | [string, number, number];
 
-// Calculate point change between two values
-function calculatePointChange(current: number, previous: number): number {
-  return current - previous;
+interface MoodRule {
+  question: string;
+  series: string;
+  change: 'point' | 'yoy_pct' | 'level' | 'monthly_delta';
+  yay: MoodCondition;
+  nay: MoodCondition;
 }
 
-// Get mood score for each indicator based on comprehensive rules from the document
-// Returns: +1 for Yay, 0 for Meh, -1 for Nay
-function getMoodScore(questionId: string, series: string, currentValue: number, previousValue: number): number {
-  const yoyChange = calculatePercentageChange(currentValue, previousValue);
-  const pointChange = calculatePointChange(currentValue, previousValue);
-
-  switch (questionId) {
-    case 'home-hunt':
-      switch (series) {
-        case 'MORTGAGE30US':
-          // ↓ > 0.5pp = Yay, ±0.5pp = Meh, ↑ > 0.5pp = Nay
-          if (pointChange <= -0.5) return 1;
-          if (pointChange >= 0.5) return -1;
-          return 0;
-        case 'CSUSHPINSA':
-          // ↓ YoY = Yay, ±2% YoY = Meh, ↑ > 2% YoY = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 2) return -1;
-          return 0;
-        case 'CUSR0000SEHA':
-          // ↓ YoY = Yay, ±2% YoY = Meh, ↑ > 2% YoY = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 2) return -1;
-          return 0;
-        case 'HOUST':
-          // ↑ > 5% YoY = Yay, ±5% = Meh, ↓ > 5% YoY = Nay
-          if (yoyChange > 5) return 1;
-          if (yoyChange < -5) return -1;
-          return 0;
-        case 'MSPUS':
-          // ↓ YoY = Yay, ±2% YoY = Meh, ↑ > 2% YoY = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 2) return -1;
-          return 0;
-        case 'MEHOINUSA672N':
-          // ↑ > 3% YoY = Yay, ±3% = Meh, ↓ > 3% = Nay
-          if (yoyChange > 3) return 1;
-          if (yoyChange < -3) return -1;
-          return 0;
-      }
-      break;
-
-    case 'car-cost':
-      switch (series) {
-        case 'CUSR0000SETA01':
-          // ↓ YoY = Yay, ±2% = Meh, ↑ > 2% YoY = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 2) return -1;
-          return 0;
-        case 'CUSR0000SETA02':
-          // ↓ YoY = Yay, ±3% = Meh, ↑ > 3% = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 3) return -1;
-          return 0;
-        case 'CUSR0000SETB':
-          // ↓ > 5% YoY = Yay, ±5% = Meh, ↑ > 5% = Nay
-          if (yoyChange < -5) return 1;
-          if (yoyChange > 5) return -1;
-          return 0;
-        case 'TERMCBAUTO48NS':
-          // ↓ > 0.5pp = Yay, ±0.5pp = Meh, ↑ > 0.5pp = Nay
-          if (pointChange <= -0.5) return 1;
-          if (pointChange >= 0.5) return -1;
-          return 0;
-        case 'DAUTOSAAR':
-          // ↑ YoY = Yay, Flat = Meh, ↓ YoY = Nay
-          if (yoyChange > 0) return 1;
-          if (yoyChange < 0) return -1;
-          return 0;
-      }
-      break;
-
-    case 'job-jolt':
-      switch (series) {
-        case 'UNRATE':
-          // ↓ > 0.3pp = Yay, ±0.3pp = Meh, ↑ > 0.3pp = Nay
-          if (pointChange <= -0.3) return 1;
-          if (pointChange >= 0.3) return -1;
-          return 0;
-        case 'PAYEMS':
-          // ↑ > 200k/month = Yay, ±100k = Meh, < 100k = Nay
-          const monthlyChange = pointChange; // Already in thousands
-          if (monthlyChange > 200) return 1;
-          if (monthlyChange < 100) return -1;
-          return 0;
-        case 'JTSJOL':
-          // ↑ > 5% YoY = Yay, Flat = Meh, ↓ > 5% = Nay
-          if (yoyChange > 5) return 1;
-          if (yoyChange < -5) return -1;
-          return 0;
-        case 'JTSQUR':
-          // ↑ > 2.5% = Yay, 2%–2.5% = Meh, < 2% = Nay
-          if (currentValue > 2.5) return 1;
-          if (currentValue < 2.0) return -1;
-          return 0;
-        case 'CES0500000003':
-          // ↑ > 3.5% YoY = Yay, ±1% = Meh, ↓ YoY = Nay
-          if (yoyChange > 3.5) return 1;
-          if (yoyChange < 0) return -1;
-          return 0;
-      }
-      break;
-
-    case 'grocery-gauge':
-      switch (series) {
-        case 'CUSR0000SAF11':
-          // ↓ YoY = Yay, ±2% = Meh, ↑ > 2% = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 2) return -1;
-          return 0;
-        case 'CUSR0000SETB':
-          // ↓ > 5% = Yay, Flat = Meh, ↑ > 5% = Nay
-          if (yoyChange < -5) return 1;
-          if (yoyChange > 5) return -1;
-          return 0;
-        case 'CPILFESL':
-          // < 2% = Yay, 2–3% = Meh, > 3% = Nay
-          if (yoyChange < 2) return 1;
-          if (yoyChange > 3) return -1;
-          return 0;
-        case 'PCEPI':
-          // < 2% = Yay, 2–3% = Meh, > 3% = Nay
-          if (yoyChange < 2) return 1;
-          if (yoyChange > 3) return -1;
-          return 0;
-        case 'DSPIC96':
-          // ↑ > 3% YoY = Yay, Flat = Meh, ↓ YoY = Nay
-          if (yoyChange > 3) return 1;
-          if (yoyChange < 0) return -1;
-          return 0;
-      }
-      break;
-
-    case 'health-bill':
-      switch (series) {
-        case 'CPIMEDSL':
-          // ↓ YoY = Yay, ±2% = Meh, ↑ > 2% = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 2) return -1;
-          return 0;
-        case 'PCU4461104461101':
-          // ↓ YoY = Yay, ±3% = Meh, ↑ > 3% = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 3) return -1;
-          return 0;
-        case 'DHLCRC1Q027SBEA':
-          // ↑ < 4% YoY = Yay, 4-6% = Meh, ↑ > 6% YoY = Nay
-          if (yoyChange < 4) return 1;
-          if (yoyChange > 6) return -1;
-          return 0;
-        case 'ECIBEN':
-          // ↑ > 3% YoY = Yay, ±2% = Meh, ↓ YoY = Nay
-          if (yoyChange > 3) return 1;
-          if (yoyChange < 0) return -1;
-          return 0;
-        case 'CUSR0000SEMD':
-          // ↓ YoY = Yay, ±3% = Meh, ↑ > 3% = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 3) return -1;
-          return 0;
-      }
-      break;
-
-    case 'tuition-tracker':
-      switch (series) {
-        case 'CUUR0000SEEB':
-          // ↓ YoY = Yay, Flat = Meh, ↑ > 2% YoY = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 2) return -1;
-          return 0;
-        case 'SLOAS':
-          // ↓ YoY = Yay, Flat = Meh, ↑ YoY = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 0) return -1;
-          return 0;
-        case 'CUSR0000SEEA':
-          // ↓ YoY = Yay, ±2% = Meh, ↑ > 2% = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 2) return -1;
-          return 0;
-
-        case 'PSAVERT':
-          // > 6% = Yay, 4–6% = Meh, < 4% = Nay
-          if (currentValue > 6) return 1;
-          if (currentValue < 4) return -1;
-          return 0;
-      }
-      break;
-
-    case 'nest-egg':
-      switch (series) {
-        case 'PSAVERT':
-          // > 6% = Yay, 4–6% = Meh, < 4% = Nay
-          if (currentValue > 6) return 1;
-          if (currentValue < 4) return -1;
-          return 0;
-        case 'SP500':
-          // ↑ > 5% YoY = Yay, Flat = Meh, ↓ YoY = Nay
-          if (yoyChange > 5) return 1;
-          if (yoyChange < 0) return -1;
-          return 0;
-        case 'DGS10':
-          // 3–4% = Yay, 2–3% = Meh, <2% or >4% = Nay
-          if (currentValue >= 3 && currentValue <= 4) return 1;
-          if (currentValue < 2 || currentValue > 4) return -1;
-          return 0;
-        case 'CPIAUCSL':
-          // < 2% = Yay, 2–3% = Meh, > 3% = Nay
-          if (yoyChange < 2) return 1;
-          if (yoyChange > 3) return -1;
-          return 0;
-        case 'DSPIC96':
-          // ↑ > 3% = Yay, ±1% = Meh, ↓ YoY = Nay
-          if (yoyChange > 3) return 1;
-          if (yoyChange < 0) return -1;
-          return 0;
-      }
-      break;
-
-    case 'bills-breakdown':
-      switch (series) {
-        case 'CUSR0000SEHF01':
-          // ↓ YoY = Yay, ±2% = Meh, ↑ > 2% = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 2) return -1;
-          return 0;
-
-        case 'CUSR0000SEHF02':
-          // ↓ YoY = Yay, ±2% = Meh, ↑ > 2% = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 2) return -1;
-          return 0;
-
-        case 'DSPIC96':
-          // ↑ > 3% = Yay, Flat = Meh, ↓ YoY = Nay
-          if (yoyChange > 3) return 1;
-          if (yoyChange < 0) return -1;
-          return 0;
-      }
-      break;
-
-    case 'paycheck-power':
-      switch (series) {
-        case 'CES0500000003':
-          // ↑ > 3.5% = Yay, ±1% = Meh, ↓ YoY = Nay
-          if (yoyChange > 3.5) return 1;
-          if (yoyChange < 0) return -1;
-          return 0;
-        case 'CPIAUCSL':
-          // < 2% = Yay, 2–3% = Meh, > 3% = Nay
-          if (yoyChange < 2) return 1;
-          if (yoyChange > 3) return -1;
-          return 0;
-        case 'PSAVERT':
-          // > 6% = Yay, 4–6% = Meh, < 4% = Nay
-          if (currentValue > 6) return 1;
-          if (currentValue < 4) return -1;
-          return 0;
-        case 'PPIACO':
-          // ↓ YoY = Yay, Flat = Meh, ↑ YoY = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 0) return -1;
-          return 0;
-        case 'DSPIC96':
-          // ↑ > 3% = Yay, ±1% = Meh, ↓ YoY = Nay
-          if (yoyChange > 3) return 1;
-          if (yoyChange < 0) return -1;
-          return 0;
-      }
-      break;
+const moodRules = new Map<string, MoodRule>(
+  (moodRuleTable.rules as MoodRule[]).map(rule => [`${rule.question}/${rule.series}`, rule])
+);
+
+// The value a rule's thresholds apply to, NaN when its comparison point is missing
+function getRuleMeasure(rule: MoodRule, currentValue: number, yearAgoValue?: number, previousValue?: number): number {
+  switch (rule.change) {
+    case 'point':
+      return yearAgoValue === undefined ? NaN : currentValue - yearAgoValue;
+    case 'yoy_pct':
+      return yearAgoValue === undefined ? NaN : ((currentValue - yearAgoValue) / yearAgoValue) * 100;
+    case 'level':
+      return currentValue;
+    case 'monthly_delta':
+      return previousValue === undefined ? NaN : currentValue - previousValue;
+  }
+}
 
-    case 'rainy-day':
-      switch (series) {
-        case 'PSAVERT':
-          // > 6% = Yay, 4–6% = Meh, < 4% = Nay
-          if (currentValue > 6) return 1;
-          if (currentValue < 4) return -1;
-          return 0;
-        case 'CPIMEDSL':
-          // ↓ YoY = Yay, ±2% = Meh, ↑ > 2% = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 2) return -1;
-          return 0;
-        case 'CUSR0000SETD':
-          // ↓ YoY = Yay, ±2% = Meh, ↑ > 2% = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 2) return -1;
-          return 0;
-        case 'HDTGPDUSQ163N':
-          // ↓ YoY = Yay, Flat = Meh, ↑ YoY = Nay
-          if (yoyChange < 0) return 1;
-          if (yoyChange > 0) return -1;
-          return 0;
-        case 'DSPIC96':
-          // ↑ > 3% = Yay, Flat = Meh, ↓ YoY = Nay
-          if (yoyChange > 3) return 1;
-          if (yoyChange < 0) return -1;
-          return 0;
-      }
-      break;
+// Check one yay/nay condition; NaN measures never match
+function matchesCondition([op, low, high]: MoodCondition, measure: number): boolean {
+  switch (op) {
+    case '<': return measure < low;
+    case '<=': return measure <= low;
+    case '>': return measure > low;
+    case '>=': return measure >= low;
+    case 'between': return measure >= low && measure <= (high as number);
+    case 'outside': return measure < low || measure > (high as number);
+    default: return false;
   }
+}
 
-  // Default fallback (should not reach here with proper implementation)
+// Get mood score for each indicator from the rule table in mood_rules.json
+// Returns: +1 for Yay, 0 for Meh, -1 for Nay
+function getMoodScore(
+  questionId: string,
+  series: string,
+  currentValue: number,
+  yearAgoValue?: number,
+  previousValue?: number
+): number {
+  const rule = moodRules.get(`${questionId}/${series}`);
+  if (!rule) return 0;
+  
+  const measure = getRuleMeasure(rule, currentValue, yearAgoValue, previousValue);
+  if (matchesCondition(rule.yay, measure)) return 1;
+  if (matchesCondition(rule.nay, measure)) return -1;
   return 0;
 }
 
@@ -483,14 +230,58 @@ function moodScoreToMood(score: number): 'good' | 'neutral' | 'bad' {
   return 'neutral';
 }
 
+// Build a score result from the scores precomputed by the data export
+async function scoreFromPrecomputed(
+  question: WalletMoodQuestion,
+  precomputed: PrecomputedQuestionScore,
+  includeChartData: boolean
+): Promise<ScoreResult> {
+  // The raw series are only needed to draw the charts
+  const fredData = includeChartData ? await getFredDataForQuestion(question.id) : {};
+  const schemaMetadata = await loadSchemaMetadata();
+  
+  const indicatorBreakdown: IndicatorMood[] = precomputed.indicators.map(indicator => {
+    const metadata = schemaMetadata[indicator.series];
+    return {
+      series: indicator.series,
+      mood: indicator.mood,
+      value: indicator.value ?? 0,
+      name: seriesNames[indicator.series] || indicator.series,
+      timestamp: indicator.date ?? 'No data',
+      units: metadata ? formatUnitsForDisplay(metadata.units) : '',
+      fredUrl: getFredUrl(indicator.series),
+      chartData: fredData[indicator.series] || []
+    };
+  });
+  
+  return {
+    score: precomputed.score,
+    emoji: precomputed.emoji,
+    mood: precomputed.mood,
+    insight: precomputed.insight,
+    color: precomputed.color,
+    indicatorBreakdown,
+    goodCount: precomputed.good_count,
+    neutralCount: precomputed.neutral_count,
+    badCount: precomputed.bad_count
+  };
+}
+
 export async function calculateScore(
   question: WalletMoodQuestion,
-  demographics: Demographics
+  demographics: Demographics,
+  options: { includeChartData?: boolean } = {}
 ): Promise<ScoreResult> {
+  // Use the precomputed score when the real data export provides one
+  const precomputed = await getPrecomputedScore(question.id);
+  if (precomputed) {
+    return scoreFromPrecomputed(question, precomputed, options.includeChartData ?? true);
+  }
+  
   const currentDate = new Date(); // Use actual current date
   
-  // Load FRED data (mock or real based on configuration)
-  const fredData = await getFredData();
+  // Load FRED data for this question's series (mock or real based on configuration)
+  const fredData = await getFredDataForQuestion(question.id);
   
   // Load schema metadata for units and other info
   const schemaMetadata = await loadSchemaMetadata();
@@ -556,9 +347,12 @@ export async function calculateScore(
     }
     
     const currentValue = currentDataPoint.value;
-    const previousValue = yearAgoDataPoint.value;
+    const yearAgoValue = yearAgoDataPoint.value;
+    // Observation before the current one, for rules on the change since the last release
+    const currentIndex = data.indexOf(currentDataPoint);
+    const previousValue = currentIndex > 0 ? data[currentIndex - 1].value : undefined;
     
-    const moodScore = getMoodScore(question.id, series, currentValue, previousValue);
+    const moodScore = getMoodScore(question.id, series, currentValue, yearAgoValue, previousValue);
     moodScores.push(moodScore);
     
     return {
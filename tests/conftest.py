@@ -0,0 +1,74 @@
+"""Shared test setup: the scripts/ modules on sys.path and a local stand-in for the FRED API"""
+
+import importlib
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / 'scripts'
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+class FredHandler(BaseHTTPRequestHandler):
+    """Answers each request with the response registered for its endpoint"""
+    
+    # Keep-alive, so connection reuse can be observed
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        endpoint = urlsplit(self.path).path.split('/fred/', 1)[-1]
+        self.server.requests.append((self.path, dict(self.headers)))
+        
+        response = self.server.responses.get(endpoint)
+        if response is None:
+            status, headers, body = 404, {}, b'{"error_message": "not found"}'
+        elif callable(response):
+            status, headers, body = response(self.headers)
+        else:
+            status, headers, body = 200, {}, json.dumps(response).encode('utf-8')
+        
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def fred_server():
+    """
+    Local HTTP server for FredApiClient
+    
+    Register responses in server.responses by endpoint (e.g. 'series'), as a
+    JSON payload or a function of the request headers returning (status,
+    headers, body). Requests are recorded in server.requests.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FredHandler)
+    server.daemon_threads = True
+    server.responses = {}
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/fred"
+    
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture(scope='session')
+def refresh_fred_data(tmp_path_factory):
+    """The refresh script module, imported from a temporary directory for the log file it opens"""
+    monkeypatch = pytest.MonkeyPatch()
+    monkeypatch.chdir(tmp_path_factory.mktemp('refresh'))
+    try:
+        return importlib.import_module('refresh_fred_data')
+    finally:
+        monkeypatch.undo()
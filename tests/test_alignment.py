@@ -0,0 +1,161 @@
+"""Tests for the lag alignment engine"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from alignment import PREVIOUS, YEAR_AGO, align_series, lag_report, tolerance_days
+
+def observations(series_id, dates, values=None):
+    dates = pd.DatetimeIndex(dates).strftime('%Y-%m-%d')
+    values = np.arange(len(dates), dtype=float) if values is None else values
+    return pd.DataFrame({'series_id': series_id, 'date': dates, 'value': values})
+
+def lagged(aligned, lag):
+    """Observation date -> lagged date (None when missing) of every observation"""
+    frame = aligned.to_frame()
+    return {
+        (row.series_id, row.date.strftime('%Y-%m-%d')):
+            None if pd.isna(row.lagged) else row.lagged.strftime('%Y-%m-%d')
+        for row in frame.rename(columns={f"{lag}_date": 'lagged'}).itertuples()
+    }
+
+def test_year_ago_at_month_starts_and_ends():
+    aligned = align_series(pd.concat([
+        observations('UNRATE', pd.date_range('2023-01-01', '2024-03-01', freq='MS')),
+        observations('PSAVERT', pd.date_range('2023-02-01', '2024-03-01', freq='MS') - pd.Timedelta(days=1))
+    ]), frequencies={'UNRATE': 'monthly', 'PSAVERT': 'monthly'})
+    year_ago = lagged(aligned, 'year_ago')
+    
+    assert year_ago[('UNRATE', '2024-01-01')] == '2023-01-01'
+    assert year_ago[('UNRATE', '2024-03-01')] == '2023-03-01'
+    assert year_ago[('UNRATE', '2023-12-01')] is None
+    # A leap day's year-ago target is the last day of February
+    assert year_ago[('PSAVERT', '2024-02-29')] == '2023-02-28'
+    assert year_ago[('PSAVERT', '2024-01-31')] == '2023-01-31'
+
+def test_year_ago_at_quarter_boundaries():
+    dates = pd.DatetimeIndex(['2022-01-01', '2022-07-01', '2022-10-01', '2023-01-01', '2023-04-01',
+                              '2023-07-01', '2024-01-01'])
+    aligned = align_series(observations('GDP', dates), frequencies={'GDP': 'quarterly'})
+    year_ago = lagged(aligned, 'year_ago')
+    
+    assert year_ago[('GDP', '2023-01-01')] == '2022-01-01'
+    # The missing 2022-04-01 quarter falls back to the one before, 90 days short of its target
+    assert year_ago[('GDP', '2023-04-01')] == '2022-01-01'
+    assert year_ago[('GDP', '2024-01-01')] == '2023-01-01'
+    # Where the previous observation is two quarters back, it is beyond one quarter's tolerance
+    previous = lagged(aligned, 'previous')
+    assert previous[('GDP', '2023-07-01')] == '2023-04-01'
+    assert previous[('GDP', '2022-07-01')] is None
+    assert previous[('GDP', '2024-01-01')] is None
+    assert aligned.outside_tolerance['previous'].sum() == 2
+
+def test_year_ago_of_daily_series_falls_back_to_the_last_business_day():
+    aligned = align_series(observations('DGS10', pd.bdate_range('2022-12-01', '2024-01-31')),
+                           frequencies={'DGS10': 'daily'})
+    year_ago = lagged(aligned, 'year_ago')
+    
+    # 2023-01-01 was a Sunday and 2022-12-31 a Saturday
+    assert year_ago[('DGS10', '2024-01-01')] == '2022-12-30'
+    assert year_ago[('DGS10', '2024-01-02')] == '2023-01-02'
+    assert lagged(aligned, 'previous')[('DGS10', '2024-01-01')] == '2023-12-29'
+
+def test_lags_outside_the_tolerance_are_missing():
+    # A daily series with a two week gap a year before its last observations
+    dates = pd.bdate_range('2023-01-02', '2023-03-01').union(pd.bdate_range('2023-03-20', '2024-03-29'))
+    aligned = align_series(observations('DGS10', dates), frequencies={'DGS10': 'daily'})
+    year_ago = lagged(aligned, 'year_ago')
+    
+    assert year_ago[('DGS10', '2024-03-06')] == '2023-03-01'
+    # Target 2023-03-15: the 2023-03-01 observation is 14 days short, over the 7 day tolerance
+    assert year_ago[('DGS10', '2024-03-15')] is None
+    assert year_ago[('DGS10', '2024-03-20')] == '2023-03-20'
+    
+    # The same gap is within a monthly tolerance
+    aligned = align_series(observations('DGS10', dates), frequencies={'DGS10': 'monthly'})
+    assert lagged(aligned, 'year_ago')[('DGS10', '2024-03-15')] == '2023-03-01'
+    
+    # And within an explicit one
+    aligned = align_series(observations('DGS10', dates), frequencies={'DGS10': 'daily'}, tolerances={'daily': 14})
+    assert lagged(aligned, 'year_ago')[('DGS10', '2024-03-15')] == '2023-03-01'
+
+def test_tolerance_days_by_frequency():
+    assert tolerance_days('daily') == 7
+    assert tolerance_days('Quarterly') == 92
+    assert tolerance_days('annually') == 366
+    assert tolerance_days(None) == 31
+    assert tolerance_days('daily', {'daily': 3}) == 3
+
+def test_searches_stay_inside_each_series():
+    # B ends before A starts, C starts after A ends
+    aligned = align_series(pd.concat([
+        observations('A', ['2021-01-01', '2022-01-01', '2023-01-01']),
+        observations('B', ['2015-01-01', '2016-01-01']),
+        observations('C', ['2030-01-01', '2031-01-01'])
+    ]), frequencies={'A': 'annually', 'B': 'annually', 'C': 'annually'})
+    year_ago = lagged(aligned, 'year_ago')
+    
+    assert year_ago[('A', '2021-01-01')] is None
+    assert year_ago[('C', '2030-01-01')] is None
+    assert year_ago[('C', '2031-01-01')] == '2030-01-01'
+    
+    def latest(as_of):
+        return aligned.dates_at(aligned.latest(np.datetime64(as_of))).astype(str).tolist()
+    
+    assert latest('2000-01-01') == ['NaT', 'NaT', 'NaT']
+    assert latest('2021-06-30') == ['2021-01-01', '2016-01-01', 'NaT']
+    assert latest('2022-01-01') == ['2022-01-01', '2016-01-01', 'NaT']
+    assert latest('2099-01-01') == ['2023-01-01', '2016-01-01', '2031-01-01']
+
+def test_alignment_matches_a_per_series_search():
+    rng = np.random.default_rng(25)
+    frames = []
+    for series_id, frequency, count in [('D', 'B', 600), ('W', 'W-FRI', 150), ('M', 'MS', 40), ('Q', 'QS', 16)]:
+        dates = pd.date_range('2020-01-01', periods=count, freq=frequency)
+        frames.append(observations(series_id, np.sort(rng.choice(dates, count * 3 // 4, replace=False))))
+    frequencies = {'D': 'daily', 'W': 'weekly', 'M': 'monthly', 'Q': 'quarterly'}
+    aligned = align_series(pd.concat(frames), frequencies=frequencies)
+    year_ago, previous = lagged(aligned, 'year_ago'), lagged(aligned, 'previous')
+    
+    for frame in frames:
+        series_id = frame['series_id'].iloc[0]
+        tolerance = pd.Timedelta(days=tolerance_days(frequencies[series_id]))
+        dates = pd.DatetimeIndex(frame['date'])
+        for i, day in enumerate(dates):
+            target = day - pd.DateOffset(years=1)
+            earlier = dates[dates <= target]
+            found = earlier[-1] if len(earlier) and earlier[-1] >= target - tolerance else None
+            expected = None if found is None else found.strftime('%Y-%m-%d')
+            assert year_ago[(series_id, frame['date'].iloc[i])] == expected
+            
+            close = i > 0 and dates[i - 1] >= day - tolerance
+            expected = frame['date'].iloc[i - 1] if close else None
+            assert previous[(series_id, frame['date'].iloc[i])] == expected
+
+def test_lag_report_counts_missing_lags():
+    dates = pd.DatetimeIndex(['2022-01-01', '2022-04-01', '2023-01-01', '2023-04-01', '2024-01-01'])
+    aligned = align_series(pd.concat([
+        observations('GDP', dates),
+        observations('NODATA', ['2023-01-01'], [np.nan])
+    ]), frequencies={'GDP': 'quarterly'}, series_ids=['GDP', 'NODATA'])
+    report = lag_report(aligned).set_index('lag')
+    
+    assert report['series_id'].tolist() == ['GDP', 'GDP']
+    assert report.loc['year_ago', 'missing'] == 2
+    assert report.loc['year_ago', 'outside_tolerance'] == 0
+    assert not report.loc['year_ago', 'latest_missing']
+    # 2023-01-01 and 2024-01-01 are more than a quarter after the observation before them
+    assert report.loc['previous', 'missing'] == 3
+    assert report.loc['previous', 'outside_tolerance'] == 2
+    assert report.loc['previous', 'latest_missing']
+    assert report.loc['previous', 'latest_date'] == np.datetime64('2024-01-01')
+
+@pytest.mark.parametrize('lags', [(YEAR_AGO, PREVIOUS), ()])
+def test_lag_report_of_no_data(lags):
+    aligned = align_series(pd.DataFrame(columns=['series_id', 'date', 'value']), lags)
+    
+    assert len(aligned.values) == 0
+    assert lag_report(aligned).empty
+    assert list(lag_report(aligned).columns) == ['series_id', 'lag', 'observations', 'missing',
+                                                 'outside_tolerance', 'latest_date', 'latest_missing']
@@ -0,0 +1,128 @@
+"""Tests for the crash-safe file writes"""
+
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from atomic_io import atomic_path, atomic_write, file_lock, read_complete_lines
+
+def leftovers(directory):
+    """Temporary files left in a directory"""
+    return [path.name for path in directory.iterdir() if path.name.startswith('.')]
+
+def test_atomic_write_replaces_the_file(tmp_path):
+    path = tmp_path / 'data.json'
+    path.write_text('old')
+    
+    with atomic_write(path) as f:
+        f.write('new')
+        # The target is only replaced when the block exits
+        assert path.read_text() == 'old'
+    
+    assert path.read_text() == 'new'
+    assert leftovers(tmp_path) == []
+
+def test_atomic_write_keeps_the_old_contents_on_error(tmp_path):
+    path = tmp_path / 'data.json'
+    path.write_text('old')
+    
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as f:
+            f.write('partial')
+            raise RuntimeError('interrupted')
+    
+    assert path.read_text() == 'old'
+    assert leftovers(tmp_path) == []
+
+def test_atomic_write_creates_missing_directories(tmp_path):
+    path = tmp_path / 'cache' / 'ab' / 'entry.body'
+    
+    with atomic_write(path, 'wb') as f:
+        f.write(b'\x00\x01')
+    
+    assert path.read_bytes() == b'\x00\x01'
+
+def test_atomic_path_renames_what_was_written_there(tmp_path):
+    path = tmp_path / 'series_id=UNRATE' / 'data.parquet'
+    
+    with atomic_path(path, suffix='.parquet') as tmp:
+        assert tmp.endswith('.parquet') and not path.exists()
+        with open(tmp, 'w') as f:
+            f.write('table')
+    assert path.read_text() == 'table'
+    
+    with pytest.raises(RuntimeError):
+        with atomic_path(path) as tmp:
+            with open(tmp, 'w') as f:
+                f.write('partial')
+            raise RuntimeError('interrupted')
+    assert path.read_text() == 'table'
+    assert leftovers(path.parent) == []
+
+@pytest.mark.parametrize('contents, kept', [
+    (b'header\nrow 1\nrow', b'header\nrow 1\n'),
+    (b'header\nrow 1\n', b'header\nrow 1\n'),
+    (b'partial header', b''),
+    (b'', b''),
+])
+def test_read_complete_lines(tmp_path, contents, kept):
+    path = tmp_path / 'fred_data.csv'
+    path.write_bytes(contents)
+    
+    assert read_complete_lines(path) == kept
+    # Reading never changes the file
+    assert path.read_bytes() == contents
+
+def test_file_lock_serializes_writers(tmp_path):
+    path = tmp_path / 'fred_data.csv'
+    events = []
+    
+    def writer(name):
+        with file_lock(path):
+            events.append(f"{name} start")
+            time.sleep(0.05)
+            events.append(f"{name} end")
+    threads = [threading.Thread(target=writer, args=(name,)) for name in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    first, second = events[0].split()[0], events[2].split()[0]
+    assert events == [f"{first} start", f"{first} end", f"{second} start", f"{second} end"]
+    assert (tmp_path / 'fred_data.csv.lock').exists()
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+def test_replacements_keep_the_file_permissions(tmp_path):
+    path = tmp_path / 'fred_data.csv'
+    path.write_text('old')
+    path.chmod(0o640)
+    
+    with atomic_write(path) as f:
+        f.write('new')
+    assert mode(path) == 0o640
+    
+    with atomic_path(path) as tmp:
+        with open(tmp, 'w') as f:
+            f.write('newer')
+    assert mode(path) == 0o640
+
+def test_new_files_get_the_umask_permissions(tmp_path):
+    umask = os.umask(0o022)
+    try:
+        with atomic_write(tmp_path / 'written.json') as f:
+            f.write('{}')
+        with atomic_path(tmp_path / 'renamed.parquet') as tmp:
+            with open(tmp, 'w') as f:
+                f.write('table')
+    finally:
+        os.umask(umask)
+    
+    # Not the owner-only mode mkstemp creates files with
+    assert mode(tmp_path / 'written.json') == 0o644
+    assert mode(tmp_path / 'renamed.parquet') == 0o644
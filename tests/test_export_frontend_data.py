@@ -0,0 +1,139 @@
+"""Tests for the incremental frontend data export"""
+
+import json
+
+import pandas as pd
+import pytest
+
+import export_frontend_data as exporter
+from export_frontend_data import MANIFEST_FILENAME, export_frontend_data, manifest_files
+from fred_store import open_store
+
+QUESTIONS_TS = """
+export const questions = [
+  { id: 'home-hunt', title: 'Home', fredSeries: ['MORTGAGE30US', 'HOUST'] },
+  { id: 'job-jolt', title: 'Jobs', fredSeries: ['UNRATE'] },
+];
+"""
+
+def monthly(series_id, values):
+    dates = pd.date_range('2022-01-01', periods=len(values), freq='MS').strftime('%Y-%m-%d')
+    return pd.DataFrame({'series_id': series_id, 'date': dates, 'value': values, 'last_updated': 'x'})
+
+def write_store(path, unrate_shift=0.0):
+    pd.concat([
+        monthly('MORTGAGE30US', [3.5 + 0.1 * i for i in range(30)]),
+        monthly('HOUST', [1400 + 10 * i for i in range(30)]),
+        monthly('UNRATE', [4.0 - 0.05 * i + unrate_shift for i in range(30)])
+    ]).to_csv(path, index=False)
+
+@pytest.fixture
+def export(tmp_path):
+    csv_file = tmp_path / 'fred_data.csv'
+    questions_file = tmp_path / 'questions.ts'
+    questions_file.write_text(QUESTIONS_TS, encoding='utf-8')
+    output_dir = tmp_path / 'public'
+    
+    def run(unrate_shift=0.0, full=False, changed_series=None):
+        write_store(csv_file, unrate_shift)
+        return export_frontend_data(open_store(csv_file), output_dir, questions_file,
+                                    changed_series=changed_series, full=full)
+    run.output_dir = output_dir
+    return run
+
+def read(output_dir, filename):
+    return json.loads((output_dir / filename).read_text(encoding='utf-8'))
+
+def test_export_rescores_only_questions_with_changed_series(export):
+    assert export()['rescored'] == ['home-hunt', 'job-jolt']
+    assert export()['rescored'] == []
+    
+    incremental = export(unrate_shift=0.5)
+    assert incremental['rescored'] == ['job-jolt']
+    
+    # The carried-over scores and history are what a full export writes
+    full = export(unrate_shift=0.5, full=True)
+    assert full['rescored'] == ['home-hunt', 'job-jolt']
+    for key in ('observations', 'scores', 'history'):
+        assert incremental[key] == full[key]
+    assert incremental['shards'] == full['shards']
+
+def test_export_writes_one_shard_per_question(export):
+    shards = export()['shards']
+    
+    # Question pages are the only pages that load a shard
+    assert list(shards) == ['question']
+    assert {question_id: entry['series'] for question_id, entry in shards['question'].items()} == {
+        'home-hunt': ['HOUST', 'MORTGAGE30US'], 'job-jolt': ['UNRATE']
+    }
+    payload = read(export.output_dir, shards['question']['job-jolt']['file'])
+    assert list(payload['series']) == ['UNRATE']
+
+def test_export_trusts_the_content_hash_over_reported_series(export):
+    export()
+    
+    # Written again with the same rows (e.g. by a --force refresh)
+    assert export(changed_series={'HOUST'})['rescored'] == []
+    # Changed without being reported
+    assert export(unrate_shift=0.5, changed_series=set())['rescored'] == ['job-jolt']
+
+def test_history_records_the_days_each_score_changes():
+    indicators = pd.DataFrame({
+        'question': ['job-jolt'] * 4 + ['home-hunt'] * 2,
+        'series_id': ['UNRATE', 'UNRATE', 'PAYEMS', 'PAYEMS', 'HOUST', 'HOUST'],
+        'date': ['2024-01-01', '2024-02-01', '2024-01-01', '2024-02-01', '2024-01-01', '2024-01-02'],
+        'score': [1, 1, 2, 3, 1, 2]
+    })
+    questions = pd.DataFrame({
+        'question': ['job-jolt', 'job-jolt', 'job-jolt', 'home-hunt'],
+        'date': ['2024-01-01', '2024-02-01', '2024-03-01', '2024-01-01'],
+        'score': [2, 2, 3, 1]
+    })
+    
+    history = exporter.build_history_payload(indicators, questions)['questions']
+    
+    # Days since the epoch, delta-coded; unchanged scores are left out
+    january = 19723
+    assert history['job-jolt']['days'] == [january, 60]
+    assert history['job-jolt']['scores'] == [2, 3]
+    assert history['job-jolt']['series'] == {
+        'PAYEMS': {'days': [january, 31], 'scores': [2, 3]},
+        'UNRATE': {'days': [january], 'scores': [1]}
+    }
+    assert history['home-hunt']['series'] == {'HOUST': {'days': [january, 1], 'scores': [1, 2]}}
+
+def test_export_keeps_previous_files_for_one_generation(export):
+    first = export()
+    second = export(unrate_shift=0.5)
+    first_only = set(manifest_files(first)) - set(manifest_files(second))
+    assert first_only
+    
+    # A client holding the first manifest can still load its files
+    for filename in first_only:
+        assert (export.output_dir / filename).exists()
+        assert (export.output_dir / f"{filename}.gz").exists()
+    
+    third = export(unrate_shift=1.0)
+    for filename in first_only - set(manifest_files(third)):
+        assert not (export.output_dir / filename).exists()
+        assert not (export.output_dir / f"{filename}.gz").exists()
+    for filename in manifest_files(second) + manifest_files(third):
+        assert (export.output_dir / filename).exists()
+    
+    assert read(export.output_dir, MANIFEST_FILENAME)['scores'] == third['scores']
+
+def test_export_without_brotli_keeps_brotli_siblings(export, monkeypatch):
+    export()
+    # Written by an earlier export that had brotli
+    current = manifest_files(read(export.output_dir, MANIFEST_FILENAME))
+    for filename in current:
+        (export.output_dir / f"{filename}.br").write_bytes(b'br')
+    stale = export.output_dir / 'fred_scores.000000000000.json.br'
+    stale.write_bytes(b'br')
+    
+    monkeypatch.setattr(exporter, 'COMPRESSORS', {'.gz': exporter.COMPRESSORS['.gz']})
+    export()
+    
+    for filename in current:
+        assert (export.output_dir / f"{filename}.br").exists()
+    assert not stale.exists()
@@ -0,0 +1,157 @@
+"""Tests for FredApiClient and AsyncFredApiClient against a local stand-in for the FRED API"""
+
+import json
+import threading
+import time
+
+import pytest
+
+SERIES = {'seriess': [{'id': 'UNRATE', 'title': 'Unemployment Rate', 'last_updated': '2024-05-03 07:44:02-05'}]}
+
+@pytest.fixture
+def client(refresh_fred_data, fred_server):
+    client = refresh_fred_data.FredApiClient('test-key', pool_size=2)
+    client.base_url = fred_server.url
+    yield client
+    client.close()
+
+def test_requests_reuse_one_pooled_connection(client, fred_server):
+    fred_server.responses['series'] = SERIES
+    
+    for _ in range(3):
+        assert client.get_series_metadata('UNRATE')['title'] == 'Unemployment Rate'
+    
+    assert client.connection_stats() == {'requests': 3, 'opened': 1, 'reused': 2}
+    assert all('api_key=test-key' in path for path, _ in fred_server.requests)
+
+def test_connection_stats_before_any_request(client):
+    assert client.connection_stats() == {'requests': 0, 'opened': 0, 'reused': 0}
+
+def test_failed_requests_are_counted(client, fred_server):
+    # Nothing is registered, so the server answers 404
+    assert client.get_series_metadata('UNRATE') == {}
+    
+    assert client.connection_stats()['requests'] == 1
+
+OBSERVATIONS = {'observations': [{'date': '2024-04-01', 'value': '3.9'}, {'date': '2024-05-01', 'value': '.'}]}
+
+@pytest.fixture
+def async_client(refresh_fred_data, client):
+    pytest.importorskip('aiohttp')
+    client.rate_limiter = refresh_fred_data.TokenBucketRateLimiter(1000, 100)
+    return refresh_fred_data.AsyncFredApiClient(client, max_concurrency=2)
+
+def fetch_all(refresh_fred_data, async_client, series_ids, needs_metadata):
+    fetched = {}
+    
+    def on_fetched(series_id, data_points, metadata):
+        fetched[series_id] = (data_points, metadata, threading.current_thread())
+    
+    requests = [refresh_fred_data.FetchRequest(series_id) for series_id in series_ids]
+    async_client.fetch_all(requests, needs_metadata, on_fetched)
+    return fetched
+
+def test_async_client_fetches_observations_and_metadata(refresh_fred_data, async_client, fred_server):
+    fred_server.responses['series/observations'] = OBSERVATIONS
+    fred_server.responses['series'] = SERIES
+    # Metadata for UNRATE up front, for PAYEMS once its observations are in, never for GDP
+    asked = []
+    
+    def needs_metadata(series_id, latest_date):
+        asked.append((series_id, latest_date))
+        return series_id == 'UNRATE' or (series_id == 'PAYEMS' and latest_date is not None)
+    
+    fetched = fetch_all(refresh_fred_data, async_client, ['UNRATE', 'PAYEMS', 'GDP'], needs_metadata)
+    
+    assert sorted(fetched) == ['GDP', 'PAYEMS', 'UNRATE']
+    data_points, metadata, thread = fetched['UNRATE']
+    assert data_points.date_strings().tolist() == ['2024-04-01', '2024-05-01']
+    assert metadata['title'] == 'Unemployment Rate'
+    assert fetched['PAYEMS'][1]['title'] == 'Unemployment Rate'
+    assert fetched['GDP'][1] is None
+    # Results are handed over on the calling thread, the single writer
+    assert {thread for _, _, thread in fetched.values()} == {threading.current_thread()}
+    assert sorted(asked, key=str) == [('GDP', '2024-05-01'), ('GDP', None), ('PAYEMS', '2024-05-01'),
+                                      ('PAYEMS', None), ('UNRATE', None)]
+    
+    endpoints = sorted(path.split('?')[0].rsplit('/fred/', 1)[1] for path, _ in fred_server.requests)
+    assert endpoints == ['series', 'series', 'series/observations', 'series/observations', 'series/observations']
+    assert all('api_key=test-key' in path for path, _ in fred_server.requests)
+
+def test_async_client_bounds_requests_in_flight(refresh_fred_data, async_client, fred_server):
+    in_flight = [0, 0]
+    lock = threading.Lock()
+    
+    def slow_observations(headers):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return 200, {}, json.dumps(OBSERVATIONS).encode('utf-8')
+    
+    fred_server.responses['series/observations'] = slow_observations
+    fetched = fetch_all(refresh_fred_data, async_client, [f"S{i}" for i in range(6)], lambda *args: False)
+    
+    assert len(fetched) == 6
+    assert in_flight[1] == 2
+
+def test_async_client_shares_the_response_cache(refresh_fred_data, async_client, fred_server, tmp_path):
+    fred_server.responses['series/observations'] = OBSERVATIONS
+    async_client.client.cache = refresh_fred_data.ResponseCache(tmp_path / 'http')
+    
+    for _ in range(2):
+        requests = [refresh_fred_data.FetchRequest('UNRATE', cache_ttl=3600)]
+        async_client.fetch_all(requests, lambda *args: False, lambda *args: None)
+    
+    assert len(fred_server.requests) == 1
+    assert async_client.client.cache.stats == {'hits': 1, 'revalidated': 0, 'misses': 1}
+    # The blocking client serves the entry the async client stored
+    assert len(async_client.client.get_series_observations('UNRATE', cache_ttl=3600)) == 2
+    assert len(fred_server.requests) == 1
+
+def test_async_client_failed_requests_return_no_data(refresh_fred_data, async_client, fred_server):
+    # Nothing is registered, so the server answers 404
+    fetched = fetch_all(refresh_fred_data, async_client, ['UNRATE'], lambda *args: True)
+    
+    data_points, metadata, _ = fetched['UNRATE']
+    assert len(data_points) == 0
+    assert metadata == {}
+
+def rate_limited(times, payload, retry_after='0'):
+    """Response function answering 429 the first `times` requests, then the payload"""
+    calls = []
+    
+    def respond(headers):
+        calls.append(headers)
+        if len(calls) <= times:
+            return 429, {'Retry-After': retry_after}, b'{"error_message": "Too Many Requests"}'
+        return 200, {}, json.dumps(payload).encode('utf-8')
+    return respond
+
+def test_rate_limited_requests_are_retried_after_a_backoff(client, fred_server, monkeypatch):
+    fred_server.responses['series'] = rate_limited(2, SERIES, retry_after='7')
+    backoffs = []
+    monkeypatch.setattr(client.rate_limiter, 'backoff', backoffs.append)
+    
+    assert client.get_series_metadata('UNRATE')['title'] == 'Unemployment Rate'
+    assert backoffs == [7.0, 7.0]
+    assert len(fred_server.requests) == 3
+
+def test_rate_limit_retries_give_up(refresh_fred_data, client, fred_server):
+    fred_server.responses['series/observations'] = rate_limited(10, OBSERVATIONS)
+    client.rate_limiter = refresh_fred_data.TokenBucketRateLimiter(1000, 100)
+    
+    assert len(client.get_series_observations('UNRATE')) == 0
+    assert len(fred_server.requests) == refresh_fred_data.RATE_LIMIT_RETRIES + 1
+
+def test_async_client_retries_rate_limited_requests(refresh_fred_data, async_client, fred_server, monkeypatch):
+    fred_server.responses['series/observations'] = rate_limited(1, OBSERVATIONS, retry_after='3')
+    backoffs = []
+    monkeypatch.setattr(async_client.client.rate_limiter, 'backoff', backoffs.append)
+    
+    fetched = fetch_all(refresh_fred_data, async_client, ['UNRATE'], lambda series_id, latest_date: False)
+    
+    assert len(fetched['UNRATE'][0]) == 2
+    assert backoffs == [3.0]
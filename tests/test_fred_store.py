@@ -0,0 +1,253 @@
+"""Tests for the observation store backends and the per-series index"""
+
+import pandas as pd
+import pytest
+
+from fred_store import SeriesIndex, SeriesSummary, open_store
+
+def rows(series_id, dates, values):
+    return pd.DataFrame({'series_id': series_id, 'date': dates, 'value': values})
+
+def test_from_frame_summarizes_each_series():
+    index = SeriesIndex.from_frame(pd.concat([
+        rows('UNRATE', ['2024-02-01', '2024-01-01'], [3.9, 3.7]),
+        rows('PAYEMS', ['2024-01-01'], ['.'])
+    ]))
+    
+    assert len(index) == 2
+    assert index.get('UNRATE') == SeriesSummary('2024-02-01', 2, 3.9)
+    assert index.get('PAYEMS') == SeriesSummary('2024-01-01', 1, None)
+    assert index.last_date('GDP') is None
+
+def test_update_appends_rows():
+    index = SeriesIndex.from_frame(rows('UNRATE', ['2024-01-01', '2024-02-01'], [3.7, 3.9]))
+    index.update(rows('UNRATE', ['2024-03-01', '2024-04-01'], [3.8, 3.9]))
+    
+    assert index.get('UNRATE') == SeriesSummary('2024-04-01', 4, 3.9)
+
+def test_update_without_upsert_counts_repeated_dates():
+    index = SeriesIndex.from_frame(rows('UNRATE', ['2024-01-01', '2024-02-01'], [3.7, 3.9]))
+    index.update(rows('UNRATE', ['2024-01-01', '2024-02-01', '2024-03-01'], [3.7, 3.9, 3.8]))
+    
+    # An append-only store now holds the first two dates twice
+    assert index.get('UNRATE').row_count == 5
+    assert index.last_date('UNRATE') == '2024-03-01'
+
+def test_update_with_upsert_only_counts_new_dates():
+    index = SeriesIndex.from_frame(rows('UNRATE', ['2024-01-01', '2024-02-01'], [3.7, 3.9]))
+    index.update(rows('UNRATE', ['2024-01-01', '2024-02-01', '2024-03-01'], [3.6, 4.0, 3.8]), upsert=True)
+    
+    assert index.get('UNRATE') == SeriesSummary('2024-03-01', 3, 3.8)
+
+def test_update_with_upsert_of_revisions_keeps_last_date():
+    index = SeriesIndex.from_frame(rows('UNRATE', ['2024-01-01', '2024-02-01'], [3.7, 3.9]))
+    index.update(rows('UNRATE', ['2024-01-01'], [3.6]), upsert=True)
+    
+    # A revision of an older date changes neither the count nor the newest observation
+    assert index.get('UNRATE') == SeriesSummary('2024-02-01', 2, 3.9)
+
+def test_update_adds_new_series():
+    index = SeriesIndex()
+    index.update(pd.concat([rows('UNRATE', ['2024-01-01'], [3.7]), rows('PAYEMS', ['2024-01-01'], [158000])]),
+                 upsert=True)
+    
+    assert 'UNRATE' in index and 'PAYEMS' in index
+    assert index.get('PAYEMS') == SeriesSummary('2024-01-01', 1, 158000.0)
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    store = open_store(tmp_path / 'fred_data.sqlite')
+    yield store
+    store.close()
+
+def stored_values(store):
+    df = store.load()
+    return {(series_id, date): value for series_id, date, value in zip(df['series_id'], df['date'], df['value'])}
+
+def test_sqlite_upsert_can_be_repeated(sqlite_store):
+    batch = rows('UNRATE', ['2024-01-01', '2024-02-01'], [3.7, 3.9])
+    sqlite_store.append(batch)
+    sqlite_store.append(batch)
+    
+    assert stored_values(sqlite_store) == {('UNRATE', '2024-01-01'): 3.7, ('UNRATE', '2024-02-01'): 3.9}
+    assert sqlite_store.supports_upsert
+
+def test_sqlite_upsert_overwrites_revised_values(sqlite_store):
+    sqlite_store.append(rows('UNRATE', ['2024-01-01', '2024-02-01'], [3.7, 3.9]).assign(last_updated='first'))
+    sqlite_store.append(rows('UNRATE', ['2024-02-01', '2024-03-01'], [4.0, '.']).assign(last_updated='second'))
+    
+    stored = sqlite_store.load()
+    assert stored['date'].tolist() == ['2024-01-01', '2024-02-01', '2024-03-01']
+    assert stored['value'].tolist()[:2] == [3.7, 4.0]
+    # FRED's '.' for a missing value is stored as NULL
+    assert pd.isna(stored['value'].iloc[2])
+    assert stored['last_updated'].tolist() == ['first', 'second', 'second']
+
+def test_sqlite_writes_outside_a_transaction_commit_at_once(sqlite_store, tmp_path):
+    sqlite_store.append(rows('UNRATE', ['2024-01-01'], [3.7]))
+    
+    # Visible through a second connection before the store is closed
+    other = open_store(tmp_path / 'fred_data.sqlite')
+    assert stored_values(other) == {('UNRATE', '2024-01-01'): 3.7}
+    other.close()
+
+def test_sqlite_transaction_rolls_back_on_error(sqlite_store):
+    sqlite_store.append(rows('UNRATE', ['2024-01-01'], [3.7]))
+    
+    with pytest.raises(RuntimeError):
+        with sqlite_store.transaction():
+            sqlite_store.append(rows('UNRATE', ['2024-01-01', '2024-02-01'], [9.9, 3.9]))
+            # Nested blocks join the outer transaction
+            with sqlite_store.transaction():
+                sqlite_store.append(rows('PAYEMS', ['2024-01-01'], [157000]))
+            raise RuntimeError('interrupted')
+    
+    assert stored_values(sqlite_store) == {('UNRATE', '2024-01-01'): 3.7}
+
+def test_sqlite_load_filters(sqlite_store):
+    sqlite_store.append(pd.concat([
+        rows('UNRATE', ['2024-01-01', '2024-02-01', '2024-03-01'], [3.7, 3.9, 3.8]),
+        rows('PAYEMS', ['2024-01-01'], [157000])
+    ]))
+    
+    loaded = sqlite_store.load(series_ids=['UNRATE'], start_date='2024-02-01', end_date='2024-02-29',
+                               columns=['date', 'value'])
+    assert loaded.values.tolist() == [['2024-02-01', 3.9]]
+    with pytest.raises(ValueError, match='Unknown observation columns'):
+        sqlite_store.load(columns=['title'])
+
+def test_sqlite_replace_series_inside_a_transaction(sqlite_store):
+    sqlite_store.append(pd.concat([
+        rows('MEHOINUSA672N', ['2021-01-01', '2022-01-01'], [70000, 74000]),
+        rows('UNRATE', ['2024-01-01'], [3.7])
+    ]))
+    
+    with pytest.raises(RuntimeError):
+        with sqlite_store.transaction():
+            sqlite_store.replace_series('MEHOINUSA672N', rows('MEHOINUSA672N', ['2022-01-01'], [74500]))
+            raise RuntimeError('interrupted')
+    assert len(stored_values(sqlite_store)) == 3
+    
+    with sqlite_store.transaction():
+        sqlite_store.replace_series('MEHOINUSA672N', rows('MEHOINUSA672N', ['2022-01-01', '2023-01-01'],
+                                                           [74500, 80000]))
+    assert stored_values(sqlite_store) == {
+        ('MEHOINUSA672N', '2022-01-01'): 74500, ('MEHOINUSA672N', '2023-01-01'): 80000,
+        ('UNRATE', '2024-01-01'): 3.7
+    }
+
+@pytest.fixture
+def csv_store(tmp_path, monkeypatch):
+    """CSV store holding three series, recording the appended rows and replaced series of each rewrite"""
+    store = open_store(tmp_path / 'fred_data.csv')
+    store.append(pd.concat([
+        rows('GDP', ['2023-10-01', '2024-01-01'], [27900, 28000]),
+        rows('MEHOINUSA672N', ['2022-01-01'], [74000]),
+        rows('UNRATE', ['2024-01-01'], [3.7])
+    ]))
+    
+    store.rewrites = []
+    rewrite = store._rewrite
+    
+    def recording_rewrite(appends, replacements):
+        store.rewrites.append((sum(len(df) for df in appends), sorted(replacements)))
+        rewrite(appends, replacements)
+    
+    monkeypatch.setattr(store, '_rewrite', recording_rewrite)
+    return store
+
+def test_csv_replacements_are_written_together_when_the_transaction_ends(csv_store):
+    before = stored_values(csv_store)
+    
+    with csv_store.transaction():
+        csv_store.replace_series('GDP', rows('GDP', ['2024-01-01'], [28100]))
+        csv_store.replace_series('MEHOINUSA672N', rows('MEHOINUSA672N', ['2023-01-01'], [80000]))
+        assert stored_values(csv_store) == before
+    
+    assert csv_store.rewrites == [(0, ['GDP', 'MEHOINUSA672N'])]
+    assert stored_values(csv_store) == {
+        ('GDP', '2024-01-01'): 28100, ('MEHOINUSA672N', '2023-01-01'): 80000, ('UNRATE', '2024-01-01'): 3.7
+    }
+
+def test_csv_replacements_are_dropped_when_the_transaction_fails(csv_store):
+    before = stored_values(csv_store)
+    
+    with pytest.raises(RuntimeError):
+        with csv_store.transaction():
+            csv_store.replace_series('GDP', rows('GDP', ['2024-01-01'], [28100]))
+            csv_store.append(rows('UNRATE', ['2024-02-01'], [3.9]))
+            raise RuntimeError('interrupted')
+    
+    assert csv_store.rewrites == []
+    assert stored_values(csv_store) == before
+    
+    # Nothing held back by the failed transaction leaks into the next write
+    csv_store.append(rows('UNRATE', ['2024-03-01'], [3.8]))
+    assert csv_store.rewrites == [(1, [])]
+    assert len(stored_values(csv_store)) == len(before) + 1
+
+def test_csv_replacement_outside_a_transaction_is_written_at_once(csv_store):
+    csv_store.replace_series('GDP', rows('GDP', ['2024-01-01'], [28100]))
+    
+    assert csv_store.rewrites == [(0, ['GDP'])]
+    assert stored_values(csv_store)[('GDP', '2024-01-01')] == 28100
+
+def test_csv_appends_are_written_in_one_rewrite_when_the_transaction_ends(csv_store):
+    before = stored_values(csv_store)
+    
+    with csv_store.transaction():
+        csv_store.append(rows('UNRATE', ['2024-02-01'], [3.9]))
+        csv_store.append(rows('PAYEMS', ['2024-01-01', '2024-02-01'], [157000, 157300]))
+        csv_store.replace_series('GDP', rows('GDP', ['2024-01-01'], [28100]))
+        assert stored_values(csv_store) == before
+    
+    assert csv_store.rewrites == [(3, ['GDP'])]
+    assert stored_values(csv_store) == {
+        ('MEHOINUSA672N', '2022-01-01'): 74000, ('UNRATE', '2024-01-01'): 3.7, ('UNRATE', '2024-02-01'): 3.9,
+        ('PAYEMS', '2024-01-01'): 157000, ('PAYEMS', '2024-02-01'): 157300, ('GDP', '2024-01-01'): 28100
+    }
+    assert csv_store.transactional
+
+def test_csv_torn_last_row_is_skipped_by_readers_and_dropped_by_the_next_write(csv_store):
+    with open(csv_store.path, 'ab') as f:
+        f.write(b'UNRATE,2024-02-01,3.')
+    torn = csv_store.path.read_bytes()
+    before = len(stored_values(csv_store))
+    
+    # Reading leaves the file alone, so a reader never races a writer
+    assert len(stored_values(csv_store)) == before
+    assert csv_store.path.read_bytes() == torn
+    
+    csv_store.append(rows('UNRATE', ['2024-02-01'], [3.9]))
+    assert stored_values(csv_store)[('UNRATE', '2024-02-01')] == 3.9
+    assert csv_store.path.read_bytes().endswith(b'\n')
+
+@pytest.mark.parametrize('filename', ['fred_data.sqlite', 'fred_data.csv'])
+def test_series_index_summarizes_each_series(tmp_path, filename):
+    store = open_store(tmp_path / filename)
+    assert len(store.series_index()) == 0
+    
+    store.append(pd.concat([
+        rows('UNRATE', ['2024-01-01', '2024-02-01'], [3.7, 3.9]),
+        rows('PAYEMS', ['2023-12-01', '2024-01-01'], [157000, '.'])
+    ]))
+    store.append(rows('UNRATE', ['2024-03-01'], [3.8]))
+    
+    index = store.series_index()
+    assert len(index) == 2
+    assert index.get('UNRATE') == SeriesSummary('2024-03-01', 3, 3.8)
+    assert index.get('PAYEMS') == SeriesSummary('2024-01-01', 2, None)
+    store.close()
+
+def test_parquet_append_replaces_repeated_dates(tmp_path):
+    pytest.importorskip('pyarrow')
+    store = open_store(tmp_path / 'fred_data.parquet')
+    store.append(rows('UNRATE', ['2024-01-01', '2024-02-01'], [3.7, 3.9]).assign(last_updated='first'))
+    store.append(rows('UNRATE', ['2024-02-01', '2024-03-01'], [4.0, 3.8]).assign(last_updated='second'))
+    store.append(rows('UNRATE', ['2024-03-01'], [3.9]))
+    
+    stored = store.load()
+    assert stored['date'].tolist() == ['2024-01-01', '2024-02-01', '2024-03-01']
+    assert stored['value'].tolist() == [3.7, 4.0, 3.9]
+    assert stored['last_updated'].tolist()[:2] == ['first', 'second']
+    assert store.supports_upsert
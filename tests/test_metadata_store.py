@@ -0,0 +1,55 @@
+"""Tests for deciding when stored series metadata is fetched again"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from metadata_store import SeriesMetadataStore
+
+UNRATE = {'title': 'Unemployment Rate', 'observation_end': '2024-05-01', 'last_updated': '2024-06-07 07:44:02-05'}
+TODAY = date(2024, 7, 1)
+
+@pytest.fixture
+def store(tmp_path):
+    store = SeriesMetadataStore(tmp_path / 'fred_series_metadata.json')
+    store.update('UNRATE', UNRATE)
+    return store
+
+def test_missing_metadata_is_fetched(store):
+    assert store.needs_refresh('PAYEMS')
+    assert not store.needs_refresh('UNRATE')
+
+def test_metadata_is_fetched_again_after_the_interval(store):
+    store._entries['UNRATE']['fetched_at'] = (datetime.now() - timedelta(days=8)).isoformat()
+    assert store.needs_refresh('UNRATE')
+    
+    store._entries['UNRATE']['fetched_at'] = 'yesterday'
+    assert store.needs_refresh('UNRATE')
+
+def test_observations_past_observation_end_mean_fred_has_updated(store):
+    assert not store.needs_refresh('UNRATE', '2024-05-01')
+    assert store.needs_refresh('UNRATE', '2024-06-01')
+
+@pytest.mark.parametrize('release_dates, expected', [
+    # The July release may only have revised existing months, which observation_end cannot tell
+    (['2024-06-07', '2024-07-01'], True),
+    # Released the day FRED last updated the series, so the stored copy already covers it
+    (['2024-05-03', '2024-06-07'], False),
+    # Not out yet
+    (['2024-06-07', '2024-07-05'], False),
+    ([], False),
+])
+def test_a_release_since_last_updated_makes_metadata_stale(store, release_dates, expected):
+    assert store.needs_refresh('UNRATE', '2024-05-01', release_dates, today=TODAY) == expected
+
+def test_releases_without_a_stored_last_updated_are_ignored(store):
+    store.update('PAYEMS', {'title': 'All Employees'})
+    
+    assert not store.needs_refresh('PAYEMS', release_dates=['2024-06-07'], today=TODAY)
+
+def test_saved_metadata_is_loaded_back(store, tmp_path):
+    store.save()
+    
+    reloaded = SeriesMetadataStore(tmp_path / 'fred_series_metadata.json')
+    assert reloaded.get('UNRATE') == UNRATE
+    assert not reloaded.needs_refresh('UNRATE')
@@ -0,0 +1,69 @@
+"""Tests for converting a legacy wide CSV into the normalized store"""
+
+import pandas as pd
+
+from fred_store import OBSERVATION_COLUMNS, SERIES_METADATA_COLUMNS, is_legacy_wide_csv, series_metadata_path
+from migrate_csv_store import migrate_csv_store
+
+def wide_row(series_id, date, value, fred_title, last_updated='2024-05-01T10:00:00'):
+    return {
+        'series_id': series_id, 'date': date, 'value': value, 'last_updated': last_updated,
+        'name': f"{series_id} name", 'description': f"{series_id} description", 'category': 'Jobs',
+        'units': 'Percent', 'update_frequency': 'monthly',
+        'yay_message': 'Yay', 'meh_message': 'Meh', 'nay_message': 'Nay',
+        'fred_title': fred_title, 'fred_units': 'Percent', 'fred_notes': 'Notes'
+    }
+
+def write_wide_csv(path):
+    pd.DataFrame([
+        wide_row('UNRATE', '2024-01-01', 3.7, 'Unemployment Rate'),
+        wide_row('UNRATE', '2024-02-01', 3.9, 'Unemployment Rate'),
+        wide_row('PAYEMS', '2024-01-01', 157000, 'All Employees'),
+        # Written again by a later run, with a revised value and newer metadata
+        wide_row('UNRATE', '2024-02-01', 3.8, 'Unemployment Rate (revised)', '2024-05-02T10:00:00'),
+    ]).to_csv(path, index=False)
+
+def test_migrate_splits_observations_and_metadata(tmp_path):
+    csv_file = tmp_path / 'fred_data.csv'
+    write_wide_csv(csv_file)
+    
+    assert migrate_csv_store(str(csv_file))
+    
+    observations = pd.read_csv(csv_file, dtype={'date': str})
+    assert list(observations.columns) == OBSERVATION_COLUMNS
+    assert not is_legacy_wide_csv(csv_file)
+    # The duplicate row collapses to the one written last
+    assert observations[['series_id', 'date', 'value']].values.tolist() == [
+        ['PAYEMS', '2024-01-01', 157000.0], ['UNRATE', '2024-01-01', 3.7], ['UNRATE', '2024-02-01', 3.8]
+    ]
+    
+    metadata = pd.read_csv(series_metadata_path(csv_file), keep_default_na=False).set_index('series_id')
+    assert list(metadata.reset_index().columns) == SERIES_METADATA_COLUMNS
+    assert metadata.loc['UNRATE', 'fred_title'] == 'Unemployment Rate (revised)'
+    assert metadata.loc['PAYEMS', 'name'] == 'PAYEMS name'
+
+def test_migrate_to_another_file_with_a_backup(tmp_path):
+    csv_file = tmp_path / 'fred_data.csv'
+    write_wide_csv(csv_file)
+    original = csv_file.read_bytes()
+    output = tmp_path / 'normalized' / 'fred_data.csv'
+    output.parent.mkdir()
+    
+    assert migrate_csv_store(str(csv_file), str(output), backup=True)
+    
+    assert csv_file.read_bytes() == original
+    assert (tmp_path / 'fred_data_wide_backup.csv').read_bytes() == original
+    assert len(pd.read_csv(output)) == 3
+    assert series_metadata_path(output).exists()
+
+def test_migrate_leaves_normalized_files_alone(tmp_path):
+    csv_file = tmp_path / 'fred_data.csv'
+    write_wide_csv(csv_file)
+    migrate_csv_store(str(csv_file))
+    normalized = csv_file.read_bytes()
+    
+    assert migrate_csv_store(str(csv_file))
+    assert csv_file.read_bytes() == normalized
+
+def test_migrate_missing_file(tmp_path):
+    assert not migrate_csv_store(str(tmp_path / 'missing.csv'))
@@ -0,0 +1,72 @@
+"""Tests for the mood score backfill"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mood_history import backfill_mood_history
+from mood_scoring import score_questions
+
+QUESTIONS = {
+    'home-hunt': ['MORTGAGE30US', 'HOUST', 'MEHOINUSA672N'],
+    'nest-egg': ['DGS10', 'PSAVERT'],
+    'job-jolt': ['UNRATE', 'PAYEMS']
+}
+FREQUENCIES = {
+    'MORTGAGE30US': 'weekly', 'HOUST': 'monthly', 'MEHOINUSA672N': 'annually',
+    'DGS10': 'daily', 'PSAVERT': 'monthly', 'UNRATE': 'monthly', 'PAYEMS': 'monthly'
+}
+
+def series(series_id, dates, rng, low, high):
+    return pd.DataFrame({
+        'series_id': series_id,
+        'date': pd.DatetimeIndex(dates).strftime('%Y-%m-%d'),
+        'value': rng.uniform(low, high, len(dates)).round(2)
+    })
+
+@pytest.fixture(scope='module')
+def observations():
+    rng = np.random.default_rng(23)
+    return pd.concat([
+        series('MORTGAGE30US', pd.date_range('2021-01-07', '2024-06-27', freq='W-THU'), rng, 5.5, 7.5),
+        series('HOUST', pd.date_range('2021-01-01', '2024-05-01', freq='MS'), rng, 1200, 1600),
+        series('MEHOINUSA672N', pd.date_range('2018-01-01', '2023-01-01', freq='YS'), rng, 70000, 80000),
+        series('DGS10', pd.bdate_range('2022-06-01', '2024-06-28'), rng, 1.5, 5),
+        series('PSAVERT', pd.date_range('2023-09-01', '2024-05-01', freq='MS'), rng, 3, 7),
+        series('UNRATE', pd.date_range('2021-01-01', '2024-05-01', freq='MS'), rng, 3.4, 4.2)
+    ], ignore_index=True)
+
+def test_backfill_matches_scoring_as_of_each_date(observations):
+    indicators, questions = backfill_mood_history(observations, QUESTIONS, FREQUENCIES)
+    rng = np.random.default_rng(0)
+    
+    for row in questions.iloc[rng.choice(len(questions), 40, replace=False)].itertuples():
+        as_of = pd.Timestamp(row.date).date()
+        scored = score_questions(observations, {row.question: QUESTIONS[row.question]}, FREQUENCIES, as_of=as_of)
+        question = scored['questions'][row.question]
+        assert row.score == pytest.approx(question['score'], abs=1e-4), f"{row.question} {as_of}"
+        assert row.mood == question['mood']
+        
+        states = indicators[(indicators['question'] == row.question) & (indicators['date'] == row.date)]
+        expected = {indicator['series']: indicator['score'] for indicator in question['indicators']}
+        for state in states.itertuples():
+            assert state.score == expected[state.series_id], f"{row.question} {state.series_id} {as_of}"
+
+def test_backfill_has_a_row_per_observation_date(observations):
+    indicators, questions = backfill_mood_history(observations, QUESTIONS, FREQUENCIES)
+    
+    home_hunt = questions[questions['question'] == 'home-hunt']
+    home_hunt_dates = observations[observations['series_id'].isin(QUESTIONS['home-hunt'])]['date'].unique()
+    assert sorted(pd.DatetimeIndex(home_hunt['date']).strftime('%Y-%m-%d')) == sorted(home_hunt_dates)
+    
+    # Series without data never appear, and series count as Meh until they have enough observations
+    assert 'PAYEMS' not in set(indicators['series_id'])
+    first_dgs10 = indicators[indicators['series_id'] == 'DGS10'].iloc[:3]
+    assert (first_dgs10['score'] == 0).all() and first_dgs10['change'].isna().all()
+
+def test_backfill_of_no_observations():
+    empty = pd.DataFrame(columns=['series_id', 'date', 'value'])
+    indicators, questions = backfill_mood_history(empty, QUESTIONS, FREQUENCIES)
+    
+    assert indicators.empty and questions.empty
+    assert list(questions.columns) == ['question', 'date', 'score', 'mood']
@@ -0,0 +1,191 @@
+"""Tests for the mood score rule table and the precomputed question scores"""
+
+from datetime import date
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mood_scoring import DEFAULT_RULES_FILE, compile_rules, load_rule_table, score_questions
+
+# (question, series, current, year-ago and previous value, expected score), on and around the thresholds
+EXPECTED_SCORES = [
+    # Point change from a year earlier: Yay at -0.5 or less, Nay at +0.5 or more
+    ('home-hunt', 'MORTGAGE30US', 6.5, 7.0, 6.9, 1),
+    ('home-hunt', 'MORTGAGE30US', 6.75, 7.0, 6.9, 0),
+    ('home-hunt', 'MORTGAGE30US', 7.5, 7.0, 7.6, -1),
+    ('job-jolt', 'UNRATE', 3.5, 4.0, 3.5, 1),
+    ('job-jolt', 'UNRATE', 4.25, 4.0, 4.25, 0),
+    ('job-jolt', 'UNRATE', 4.5, 4.0, 4.5, -1),
+    # Percent change from a year earlier, with strict thresholds
+    ('home-hunt', 'CSUSHPINSA', 99.0, 100.0, 101.0, 1),
+    ('home-hunt', 'CSUSHPINSA', 100.0, 100.0, 99.0, 0),
+    ('home-hunt', 'CSUSHPINSA', 102.0, 100.0, 101.0, 0),
+    ('home-hunt', 'CSUSHPINSA', 103.0, 100.0, 101.0, -1),
+    ('home-hunt', 'HOUST', 1060.0, 1000.0, 1100.0, 1),
+    ('home-hunt', 'HOUST', 1050.0, 1000.0, 1100.0, 0),
+    ('home-hunt', 'HOUST', 940.0, 1000.0, 900.0, -1),
+    ('car-cost', 'DAUTOSAAR', 101.0, 100.0, 102.0, 1),
+    ('car-cost', 'DAUTOSAAR', 100.0, 100.0, 102.0, 0),
+    ('tuition-tracker', 'SLOAS', 1700.0, 1700.0, 1650.0, 0),
+    ('tuition-tracker', 'SLOAS', 1717.0, 1700.0, 1717.0, -1),
+    ('health-bill', 'DHLCRC1Q027SBEA', 105.0, 100.0, 104.0, 0),
+    ('health-bill', 'DHLCRC1Q027SBEA', 103.0, 100.0, 104.0, 1),
+    ('paycheck-power', 'CES0500000003', 31.08, 30.0, 31.0, 1),
+    ('paycheck-power', 'CES0500000003', 29.7, 30.0, 31.0, -1),
+    # PAYEMS compares with the month before; the year-ago value does not matter
+    ('job-jolt', 'PAYEMS', 158250.0, 155000.0, 158000.0, 1),
+    ('job-jolt', 'PAYEMS', 158150.0, 155000.0, 158000.0, 0),
+    ('job-jolt', 'PAYEMS', 158050.0, 155000.0, 158000.0, -1),
+    ('job-jolt', 'PAYEMS', 158300.0, 159000.0, 158000.0, 1),
+    # Levels
+    ('job-jolt', 'JTSQUR', 2.6, 2.0, 2.4, 1),
+    ('job-jolt', 'JTSQUR', 2.5, 3.0, 2.4, 0),
+    ('job-jolt', 'JTSQUR', 1.9, 1.0, 2.4, -1),
+    ('rainy-day', 'PSAVERT', 6.5, 3.0, 6.0, 1),
+    ('rainy-day', 'PSAVERT', 4.0, 8.0, 6.0, 0),
+    ('rainy-day', 'PSAVERT', 3.5, 8.0, 6.0, -1),
+    # Between 3% and 4% (inclusive) is Yay, outside 2% to 4% is Nay
+    ('nest-egg', 'DGS10', 3.0, 5.0, 3.0, 1),
+    ('nest-egg', 'DGS10', 4.0, 5.0, 4.0, 1),
+    ('nest-egg', 'DGS10', 2.5, 5.0, 2.5, 0),
+    ('nest-egg', 'DGS10', 2.0, 5.0, 2.0, 0),
+    ('nest-egg', 'DGS10', 4.5, 3.5, 4.5, -1),
+    ('nest-egg', 'DGS10', 1.5, 3.5, 1.5, -1),
+]
+
+def test_rule_table_has_a_rule_per_question_and_series():
+    rules = load_rule_table()
+    
+    assert len(rules) == 48
+    assert len({(rule.question, rule.series_id) for rule in rules}) == 48
+    assert len({rule.question for rule in rules}) == 10
+
+@pytest.mark.parametrize('question, series_id, current, year_ago, previous, expected', EXPECTED_SCORES)
+def test_rule_scores(question, series_id, current, year_ago, previous, expected):
+    rules = compile_rules()
+    i = next(i for i, rule in enumerate(rules.rules) if (rule.question, rule.series_id) == (question, series_id))
+    values = np.zeros(len(rules))
+    
+    scores, _ = rules.evaluate(values + current, values + year_ago, values + previous)
+    
+    assert scores[i] == expected
+
+@pytest.mark.parametrize('current, year_ago, previous, change, expected', [
+    (6.5, 7.0, 6.8, 'point', -0.5),
+    (103.0, 100.0, 101.0, 'yoy_pct', 3.0),
+    (4.2, 3.0, 4.0, 'level', 4.2),
+    (158250.0, 155000.0, 158100.0, 'monthly_delta', 150.0),
+])
+def test_measures_by_change_type(current, year_ago, previous, change, expected):
+    rules = compile_rules()
+    i = next(i for i, rule in enumerate(rules.rules) if rule.change == change)
+    values = np.zeros(len(rules))
+    measures = rules.measures(values + current, values + year_ago, values + previous)
+    
+    assert measures[i] == pytest.approx(expected)
+
+def test_missing_values_score_meh():
+    rules = compile_rules()
+    missing = np.full(len(rules), np.nan)
+    scores, measures = rules.evaluate(missing, missing, missing)
+    
+    assert not scores.any()
+    assert np.isnan(measures).all()
+
+def test_evaluate_shapes_agree():
+    rules = compile_rules()
+    rng = np.random.default_rng(7)
+    current, year_ago, previous = rng.uniform(0.5, 10, size=(3, len(rules), 5))
+    
+    scores_2d, measures_2d = rules.evaluate(current, year_ago, previous)
+    for column in range(5):
+        scores_1d, measures_1d = rules.evaluate(current[:, column], year_ago[:, column], previous[:, column])
+        np.testing.assert_array_equal(scores_2d[:, column], scores_1d)
+        np.testing.assert_allclose(measures_2d[:, column], measures_1d)
+    
+    # Flat values tagged with their rule
+    rule_index = np.repeat(np.arange(len(rules)), 5)
+    scores_flat, _ = rules.evaluate(current.ravel(), year_ago.ravel(), previous.ravel(), rule_index)
+    np.testing.assert_array_equal(scores_flat, scores_2d.ravel())
+
+def test_for_questions_keeps_only_their_rules():
+    rules = compile_rules().for_questions(['job-jolt'])
+    
+    assert {rule.question for rule in rules.rules} == {'job-jolt'}
+    assert rules.series_ids == sorted(rule.series_id for rule in rules.rules)
+
+def write_table(tmp_path, rules, version=1):
+    path = tmp_path / 'mood_rules.json'
+    path.write_text(json.dumps({'version': version, 'rules': rules}), encoding='utf-8')
+    return path
+
+VALID_RULE = {'question': 'job-jolt', 'series': 'UNRATE', 'change': 'point', 'yay': ['<=', -0.3], 'nay': ['>=', 0.3]}
+
+def test_load_rule_table_reads_conditions(tmp_path):
+    between = dict(VALID_RULE, series='DGS10', change='level', yay=['between', 3, 4], nay=['outside', 2, 4])
+    rules = load_rule_table(write_table(tmp_path, [VALID_RULE, between]))
+    
+    assert rules[0].yay == ('<=', -0.3)
+    assert rules[1].nay == ('outside', 2.0, 4.0)
+
+@pytest.mark.parametrize('rules, version, message', [
+    ([VALID_RULE], 2, 'version'),
+    ([{key: value for key, value in VALID_RULE.items() if key != 'nay'}], 1, 'missing nay'),
+    ([dict(VALID_RULE, change='qoq_pct')], 1, 'unknown change type'),
+    ([VALID_RULE, dict(VALID_RULE, yay=['<', 0])], 1, 'duplicate rule'),
+    ([dict(VALID_RULE, yay=['~=', 0])], 1, 'operator'),
+    ([dict(VALID_RULE, yay=['between', 3])], 1, 'takes 2 threshold'),
+    ([dict(VALID_RULE, nay=['>', True])], 1, 'must be numbers'),
+    ([dict(VALID_RULE, nay='> 0.3')], 1, 'condition must be'),
+])
+def test_load_rule_table_rejects_bad_tables(tmp_path, rules, version, message):
+    with pytest.raises(ValueError, match=message):
+        load_rule_table(write_table(tmp_path, rules, version))
+
+def test_default_rule_table_is_the_repo_table():
+    assert DEFAULT_RULES_FILE.name == 'mood_rules.json'
+    assert DEFAULT_RULES_FILE.exists()
+
+def monthly(series_id, start, values):
+    dates = pd.date_range(start, periods=len(values), freq='MS').strftime('%Y-%m-%d')
+    return pd.DataFrame({'series_id': series_id, 'date': dates, 'value': values})
+
+JOB_OBSERVATIONS = pd.concat([
+    monthly('UNRATE', '2023-01-01', [4.0] * 12 + [3.5] * 6),
+    monthly('PAYEMS', '2024-01-01', [158000 + 250 * i for i in range(5)]),
+    monthly('JTSQUR', '2024-04-01', [2.1, 2.2])
+])
+JOB_QUESTION = {'job-jolt': ['UNRATE', 'PAYEMS', 'JTSQUR', 'CPIAUCSL']}
+FREQUENCIES = {'UNRATE': 'monthly', 'PAYEMS': 'monthly', 'JTSQUR': 'monthly'}
+
+def test_score_questions_averages_indicator_scores():
+    scores = score_questions(JOB_OBSERVATIONS, JOB_QUESTION, FREQUENCIES, as_of=date(2024, 7, 1))
+    question = scores['questions']['job-jolt']
+    indicators = {indicator['series']: indicator for indicator in question['indicators']}
+    
+    assert indicators['UNRATE']['score'] == 1
+    assert indicators['UNRATE']['previous_date'] == '2023-06-01'
+    assert indicators['UNRATE']['change'] == pytest.approx(-0.5)
+    assert indicators['UNRATE']['change_kind'] == 'point'
+    # Compared with the month before, so a year of history is not needed
+    assert indicators['PAYEMS']['score'] == 1
+    assert indicators['PAYEMS']['change'] == pytest.approx(250)
+    assert indicators['PAYEMS']['previous_date'] == '2024-04-01'
+    assert indicators['JTSQUR']['status'] == 'no data'
+    assert indicators['CPIAUCSL']['status'] == 'no rule'
+    
+    assert question['score'] == 0.5
+    assert question['mood'] == 'Yay!'
+    assert (question['good_count'], question['neutral_count'], question['bad_count']) == (2, 2, 0)
+
+def test_score_questions_as_of_uses_the_data_available_then():
+    scores = score_questions(JOB_OBSERVATIONS, JOB_QUESTION, FREQUENCIES, as_of=date(2023, 12, 31))
+    indicators = {indicator['series']: indicator for indicator in scores['questions']['job-jolt']['indicators']}
+    
+    assert scores['as_of'] == '2023-12-31'
+    assert indicators['UNRATE']['date'] == '2023-12-01'
+    assert indicators['UNRATE']['status'] == 'insufficient for trend'
+    assert indicators['PAYEMS']['status'] == 'no data'
+    assert scores['questions']['job-jolt']['mood'] == 'Meh'
@@ -0,0 +1,75 @@
+"""Tests for observation batches and the streaming observations parser"""
+
+import json
+
+import numpy as np
+import pytest
+
+from observations import ObservationBatch, ObservationStreamParser, parse_observation_stream
+
+OBSERVATIONS = [
+    {'realtime_start': '2024-05-01', 'realtime_end': '2024-05-01', 'date': '2023-12-01', 'value': '3.7'},
+    {'realtime_start': '2024-05-01', 'realtime_end': '2024-05-01', 'date': '2024-01-01', 'value': '.'},
+    {'realtime_start': '2024-05-01', 'realtime_end': '2024-05-01', 'date': '2024-02-01', 'value': '-0.25'},
+    {'realtime_start': '2024-05-01', 'realtime_end': '2024-05-01', 'date': '2024-03-01', 'value': '1e3'},
+]
+
+# Fields before the array that mention observations, as a real response has
+BODY = json.dumps({
+    'realtime_start': '2024-05-01',
+    'units': 'lin',
+    'notes': 'observations: "observations" [sic]',
+    'count': len(OBSERVATIONS),
+    'observations': OBSERVATIONS,
+    'trailing': {'observations': []}
+}, indent=1).encode('utf-8')
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def assert_expected(batch: ObservationBatch):
+    assert batch.date_strings().tolist() == ['2023-12-01', '2024-01-01', '2024-02-01', '2024-03-01']
+    np.testing.assert_array_equal(batch.values, [3.7, np.nan, -0.25, 1000.0])
+
+def test_from_records_matches_stream():
+    assert_expected(ObservationBatch.from_records(OBSERVATIONS))
+    assert_expected(parse_observation_stream([BODY]))
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 16, 64, 1024])
+def test_stream_parses_any_chunking(size):
+    # Chunk edges fall inside the key, the objects and the numbers
+    assert_expected(parse_observation_stream(chunked(BODY, size)))
+
+def test_stream_decodes_multibyte_characters_split_across_chunks():
+    body = json.dumps({'title': 'Índice — €', 'observations': OBSERVATIONS[:1]}, ensure_ascii=False)
+    batch = parse_observation_stream(chunked(body.encode('utf-8'), 1))
+    
+    assert batch.date_strings().tolist() == ['2023-12-01']
+
+def test_stream_with_no_observations():
+    batch = parse_observation_stream(chunked(b'{"count": 0, "observations": []}', 5))
+    
+    assert len(batch) == 0
+    assert batch.last_date is None
+
+def test_stream_ignores_data_after_the_array():
+    parser = ObservationStreamParser()
+    parser.feed(b'{"observations": [{"date": "2024-01-01", "value": "1"}]')
+    parser.feed(b', "observations": [{"date": "2025-01-01", "value": "2"}]}')
+    
+    assert parser.close().date_strings().tolist() == ['2024-01-01']
+
+@pytest.mark.parametrize('body', [
+    b'{"count": 1, "observ',
+    b'{"observations": [{"date": "2024-01-01", "value": "1"}',
+    b'{"observations": [{"date": "2024-01-01", "val'
+])
+def test_stream_cut_short_raises(body):
+    with pytest.raises(ValueError):
+        parse_observation_stream(chunked(body, 4))
+
+def test_after_keeps_later_observations():
+    batch = ObservationBatch.from_records(OBSERVATIONS)
+    
+    assert batch.after('2024-01-01').date_strings().tolist() == ['2024-02-01', '2024-03-01']
+    assert len(batch.after('2024-03-01')) == 0
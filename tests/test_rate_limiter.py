@@ -0,0 +1,124 @@
+"""Tests for the token-bucket rate limiter, on a fake clock"""
+
+import threading
+from email.utils import formatdate
+
+import pytest
+
+from rate_limiter import DEFAULT_RETRY_AFTER_SECONDS, TokenBucketRateLimiter, retry_after_seconds
+
+class FakeClock:
+    """Clock that only moves when told to, or when the limiter sleeps"""
+    
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+        self.sleeps = []
+    
+    def __call__(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+def limiter(clock, rate=2.0, burst=3, state_file=None):
+    return TokenBucketRateLimiter(rate, burst, state_file, clock=clock, sleep=clock.sleep)
+
+def test_burst_then_one_request_per_token(clock):
+    bucket = limiter(clock)
+    
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Later requests reserve future slots, half a second apart at 2 tokens/s
+    assert [bucket.reserve() for _ in range(3)] == [0.5, 1.0, 1.5]
+
+def test_bucket_refills_up_to_the_burst(clock):
+    bucket = limiter(clock)
+    for _ in range(3):
+        bucket.reserve()
+    
+    clock.now += 1.0
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.5]
+    
+    clock.now += 60.0
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.0, 0.5]
+
+def test_negative_reservations_are_paid_back_before_new_slots(clock):
+    bucket = limiter(clock, rate=1.0, burst=1)
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 1.0, 2.0, 3.0]
+    
+    # After 2s, two of the three reserved slots have passed; the next one is after the third
+    clock.now += 2.0
+    assert bucket.reserve() == 2.0
+
+def test_acquire_sleeps_until_the_reserved_slot(clock):
+    bucket = limiter(clock, rate=4.0, burst=1)
+    
+    for _ in range(3):
+        bucket.acquire()
+    
+    assert clock.sleeps == [0.25, 0.25]
+
+def test_backoff_holds_every_caller_back(clock):
+    bucket = limiter(clock)
+    
+    bucket.backoff(10.0)
+    
+    assert bucket.reserve() == 10.5
+    clock.now += 20.0
+    assert bucket.reserve() == 0.0
+
+def test_backoff_keeps_later_reservations(clock):
+    bucket = limiter(clock, rate=1.0, burst=1)
+    for _ in range(6):
+        bucket.reserve()
+    
+    bucket.backoff(2.0)
+    
+    assert bucket.reserve() == 6.0
+
+def test_limiters_sharing_a_state_file_share_one_bucket(clock, tmp_path):
+    state_file = tmp_path / 'rate_limit.json'
+    first = limiter(clock, state_file=state_file)
+    second = limiter(clock, state_file=state_file)
+    
+    assert [first.reserve(), second.reserve(), first.reserve()] == [0.0, 0.0, 0.0]
+    assert second.reserve() == 0.5
+    
+    second.backoff(10.0)
+    assert first.reserve() == 10.5
+
+def test_shared_bucket_does_not_hold_the_thread_lock(clock, tmp_path):
+    bucket = limiter(clock, state_file=tmp_path / 'rate_limit.json')
+    waits = []
+    
+    # Another thread of this process is inside the limiter; the file lock alone serializes callers
+    with bucket._lock:
+        thread = threading.Thread(target=lambda: waits.append(bucket.reserve()))
+        thread.start()
+        thread.join(timeout=5)
+    
+    assert waits == [0.0]
+
+def test_unreadable_state_file_starts_a_full_bucket(clock, tmp_path):
+    state_file = tmp_path / 'rate_limit.json'
+    state_file.write_text('not json')
+    
+    assert [limiter(clock, state_file=state_file).reserve() for _ in range(4)] == [0.0, 0.0, 0.0, 0.5]
+
+@pytest.mark.parametrize('rate, burst', [(0, 1), (-1.0, 1), (1.0, 0)])
+def test_invalid_settings(rate, burst):
+    with pytest.raises(ValueError):
+        TokenBucketRateLimiter(rate, burst)
+
+def test_retry_after_seconds():
+    now = 1_700_000_000.0
+    
+    assert retry_after_seconds('12', now) == 12.0
+    assert retry_after_seconds(formatdate(now + 30, usegmt=True), now) == 30.0
+    assert retry_after_seconds(formatdate(now - 30, usegmt=True), now) == 0.0
+    assert retry_after_seconds(None, now) == DEFAULT_RETRY_AFTER_SECONDS
+    assert retry_after_seconds('soon', now) == DEFAULT_RETRY_AFTER_SECONDS
@@ -0,0 +1,230 @@
+"""Tests for the refresh pipeline: fetching metrics concurrently, storing them from a single writer, resuming runs"""
+
+import json
+import threading
+
+import pytest
+
+from run_journal import WRITTEN, RunJournal
+
+OBSERVATIONS = {'observations': [{'date': '2024-04-01', 'value': '3.9'}, {'date': '2024-05-01', 'value': '4.0'}]}
+SERIES = {'seriess': [{'id': 'UNRATE', 'title': 'Unemployment Rate', 'last_updated': '2024-06-07 07:44:02-05'}]}
+
+def metric(refresh_fred_data, series_id, update_frequency='monthly'):
+    return refresh_fred_data.MetricInfo(series_id, f"{series_id} name", 'Description', 'Jobs', 'Percent',
+                                        update_frequency, 'Yay', 'Meh', 'Nay')
+
+@pytest.fixture
+def data_manager(refresh_fred_data, tmp_path):
+    schema_file = tmp_path / 'schema.json'
+    schema_file.write_text(json.dumps({'metrics_to_track': []}))
+    return refresh_fred_data.FredDataManager(str(tmp_path / 'data' / 'fred_data.csv'), str(schema_file))
+
+@pytest.fixture
+def fred_client(refresh_fred_data, fred_server):
+    fred_server.responses['series/observations'] = OBSERVATIONS
+    fred_server.responses['series'] = SERIES
+    client = refresh_fred_data.FredApiClient('test-key', rate_limiter=refresh_fred_data.TokenBucketRateLimiter(1000, 100))
+    client.base_url = fred_server.url
+    yield client
+    client.close()
+
+def stored_rows(data_manager):
+    df = data_manager.store.load()
+    return sorted(zip(df['series_id'], df['date'], df['value']))
+
+def record_writer_threads(data_manager, monkeypatch):
+    """Names of the threads that write observations or metadata"""
+    writers = set()
+    
+    def on_writer_thread(method):
+        def wrapper(*args, **kwargs):
+            writers.add(threading.current_thread().name)
+            return method(*args, **kwargs)
+        return wrapper
+    monkeypatch.setattr(data_manager.store, 'append', on_writer_thread(data_manager.store.append))
+    monkeypatch.setattr(data_manager.metadata_store, 'update', on_writer_thread(data_manager.metadata_store.update))
+    return writers
+
+def test_update_metrics_with_workers_writes_from_the_calling_thread(refresh_fred_data, data_manager, fred_client,
+                                                                     monkeypatch):
+    metrics = [metric(refresh_fred_data, series_id) for series_id in ('UNRATE', 'PAYEMS', 'JTSQUR', 'ICSA')]
+    writers = record_writer_threads(data_manager, monkeypatch)
+    fetchers = set()
+    fetch_metric = data_manager.fetch_metric
+    
+    def record_fetcher(*args, **kwargs):
+        fetchers.add(threading.current_thread().name)
+        return fetch_metric(*args, **kwargs)
+    monkeypatch.setattr(data_manager, 'fetch_metric', record_fetcher)
+    results = []
+    
+    counts = refresh_fred_data.update_metrics_with_workers(data_manager, metrics, fred_client, workers=3,
+                                                           on_result=lambda m, success: results.append(m.id))
+    
+    assert counts == (4, 0)
+    assert sorted(results) == ['ICSA', 'JTSQUR', 'PAYEMS', 'UNRATE']
+    assert len(stored_rows(data_manager)) == 8
+    # Metadata of never-seen series was fetched by the workers and stored by the writer
+    assert data_manager.metadata_store.get('ICSA')['title'] == 'Unemployment Rate'
+    assert fetchers and all(name.startswith('fred-worker') for name in fetchers)
+    assert writers == {threading.current_thread().name}
+
+def test_update_metrics_with_workers_counts_failed_fetches(refresh_fred_data, data_manager, fred_client,
+                                                           monkeypatch):
+    metrics = [metric(refresh_fred_data, 'UNRATE'), metric(refresh_fred_data, 'PAYEMS'), metric(refresh_fred_data, 'ICSA')]
+    fetch_metric = data_manager.fetch_metric
+    
+    def fetch_some(metric_info, *args, **kwargs):
+        if metric_info.id == 'PAYEMS':
+            return None
+        if metric_info.id == 'ICSA':
+            raise RuntimeError('worker crashed')
+        return fetch_metric(metric_info, *args, **kwargs)
+    monkeypatch.setattr(data_manager, 'fetch_metric', fetch_some)
+    results = []
+    
+    counts = refresh_fred_data.update_metrics_with_workers(data_manager, metrics, fred_client, workers=2,
+                                                           on_result=lambda m, success: results.append((m.id, success)))
+    
+    assert counts == (1, 2)
+    assert sorted(results) == [('ICSA', False), ('PAYEMS', False), ('UNRATE', True)]
+    assert {series_id for series_id, _, _ in stored_rows(data_manager)} == {'UNRATE'}
+
+def test_stored_metadata_is_not_fetched_again(refresh_fred_data, data_manager, fred_client, fred_server):
+    data_manager.metadata_store.update('UNRATE', {'title': 'Unemployment Rate'})
+    
+    counts = refresh_fred_data.update_metrics_with_workers(data_manager, [metric(refresh_fred_data, 'UNRATE')],
+                                                           fred_client, workers=2)
+    
+    assert counts == (1, 0)
+    assert not any(path.startswith('/fred/series?') for path, _ in fred_server.requests)
+
+def test_update_metrics_async_stores_every_metric(refresh_fred_data, data_manager, fred_client, monkeypatch):
+    pytest.importorskip('aiohttp')
+    metrics = [metric(refresh_fred_data, series_id) for series_id in ('UNRATE', 'PAYEMS', 'JTSQUR')]
+    writers = record_writer_threads(data_manager, monkeypatch)
+    results = []
+    
+    async_client = refresh_fred_data.AsyncFredApiClient(fred_client, max_concurrency=3)
+    counts = refresh_fred_data.update_metrics_async(data_manager, metrics, async_client,
+                                                    on_result=lambda m, success: results.append((m.id, success)))
+    
+    assert counts == (3, 0)
+    assert sorted(results) == [('JTSQUR', True), ('PAYEMS', True), ('UNRATE', True)]
+    assert stored_rows(data_manager) == [
+        (series_id, date, value) for series_id in ('JTSQUR', 'PAYEMS', 'UNRATE')
+        for date, value in (('2024-04-01', 3.9), ('2024-05-01', 4.0))
+    ]
+    # Metadata of never-seen series is fetched alongside the observations
+    assert data_manager.metadata_store.get('PAYEMS')['title'] == 'Unemployment Rate'
+    assert data_manager.changed_series == {'UNRATE', 'PAYEMS', 'JTSQUR'}
+    assert writers == {threading.current_thread().name}
+
+def test_update_metrics_async_counts_failed_requests(refresh_fred_data, data_manager, fred_client, monkeypatch):
+    pytest.importorskip('aiohttp')
+    metrics = [metric(refresh_fred_data, 'UNRATE'), metric(refresh_fred_data, 'PAYEMS')]
+    
+    def build_fetch_request(metric_info, force_update=False):
+        if metric_info.id == 'PAYEMS':
+            raise ValueError('bad schema entry')
+        return refresh_fred_data.FetchRequest(metric_info.id)
+    monkeypatch.setattr(data_manager, 'build_fetch_request', build_fetch_request)
+    
+    async_client = refresh_fred_data.AsyncFredApiClient(fred_client, max_concurrency=2)
+    
+    assert refresh_fred_data.update_metrics_async(data_manager, metrics, async_client) == (1, 1)
+    assert {series_id for series_id, _, _ in stored_rows(data_manager)} == {'UNRATE'}
+
+@pytest.fixture
+def refresh_cli(refresh_fred_data, fred_server, tmp_path, monkeypatch):
+    """Run the refresh script's main() against the local API, recording the exports it makes"""
+    fred_server.responses['series/observations'] = OBSERVATIONS
+    fred_server.responses['series'] = SERIES
+    schema_file = tmp_path / 'schema.json'
+    schema_file.write_text(json.dumps({'metrics_to_track': [
+        {'id': series_id, 'name': f"{series_id} name", 'description': 'Description', 'category': 'jobs',
+         'units': 'Percent', 'update_frequency': 'monthly', 'yay_message': 'Yay', 'meh_message': 'Meh',
+         'nay_message': 'Nay'}
+        for series_id in ('UNRATE', 'PAYEMS')
+    ]}))
+    monkeypatch.setenv('FRED_API_KEY', 'test-key')
+    
+    class LocalFredApiClient(refresh_fred_data.FredApiClient):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.base_url = fred_server.url
+    monkeypatch.setattr(refresh_fred_data, 'FredApiClient', LocalFredApiClient)
+    
+    exports = []
+    
+    def export_frontend_data(store, export_dir, questions_file, rules_file, changed_series):
+        if getattr(export_frontend_data, 'crash', False):
+            raise RuntimeError('export interrupted')
+        exports.append(sorted(changed_series))
+        return {'rescored': [], 'sizes': {}}
+    monkeypatch.setattr(refresh_fred_data, 'export_frontend_data', export_frontend_data)
+    monkeypatch.setattr(refresh_fred_data, 'format_size_report', lambda sizes: [])
+    
+    def run(*args):
+        monkeypatch.setattr('sys.argv', [
+            'refresh_fred_data.py', '--csv-file', str(tmp_path / 'data' / 'fred_data.csv'),
+            '--schema-file', str(schema_file), '--export-dir', str(tmp_path / 'public'), *args
+        ])
+        return refresh_fred_data.main()
+    
+    run.export = export_frontend_data
+    run.exports = exports
+    run.journal_path = tmp_path / 'data' / 'fred_refresh_journal.json'
+    return run
+
+def observation_requests(fred_server):
+    return sorted(path.split('series_id=')[1].split('&')[0] for path, _ in fred_server.requests
+                  if path.startswith('/fred/series/observations'))
+
+def test_resume_redoes_an_export_that_crashed(refresh_cli, fred_server):
+    refresh_cli.export.crash = True
+    assert refresh_cli() == 1
+    assert observation_requests(fred_server) == ['PAYEMS', 'UNRATE']
+    
+    refresh_cli.export.crash = False
+    fred_server.requests.clear()
+    assert refresh_cli('--resume') == 0
+    
+    # Every series was committed, so only the export is redone
+    assert observation_requests(fred_server) == []
+    assert refresh_cli.exports == [['PAYEMS', 'UNRATE']]
+    
+    assert refresh_cli('--resume') == 0
+    assert refresh_cli.exports == [['PAYEMS', 'UNRATE']]
+
+def test_resume_updates_the_series_an_interrupted_run_did_not_finish(refresh_cli, fred_server):
+    assert refresh_cli('--metrics', 'UNRATE') == 0
+    # A run that died after committing UNRATE, before it got to PAYEMS
+    journal = RunJournal(refresh_cli.journal_path)
+    journal.start(['UNRATE', 'PAYEMS'], {'force': True})
+    journal.record_rows('UNRATE', 2, '2024-04-01', '2024-05-01')
+    journal.mark('UNRATE', WRITTEN)
+    journal.commit_written()
+    fred_server.requests.clear()
+    
+    assert refresh_cli('--resume') == 0
+    
+    assert observation_requests(fred_server) == ['PAYEMS']
+    # The interrupted run's rows are exported along with the resumed ones
+    assert refresh_cli.exports[-1] == ['PAYEMS', 'UNRATE']
+    assert RunJournal(refresh_cli.journal_path).finished
+
+def test_resume_without_a_journal_fails(refresh_cli):
+    assert refresh_cli('--resume') == 1
+
+def test_metadata_is_due_after_a_release_from_the_calendar(refresh_fred_data, data_manager, tmp_path):
+    data_manager.metadata_store.update('UNRATE', {'observation_end': '2024-05-01', 'last_updated': '2024-05-03'})
+    assert not data_manager.metadata_due('UNRATE', '2024-05-01')
+    
+    calendar = refresh_fred_data.ReleaseCalendar(tmp_path / 'fred_release_calendar.json')
+    calendar.set_series_release('UNRATE', {'id': 50})
+    calendar.set_release_dates('50', ['2024-05-03', '2024-06-07'])
+    data_manager.release_calendar = calendar
+    
+    assert data_manager.metadata_due('UNRATE', '2024-05-01')
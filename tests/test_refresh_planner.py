@@ -0,0 +1,97 @@
+"""Tests for the refresh planner's release window and the release calendar"""
+
+from datetime import date
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from fred_store import SeriesIndex
+from metadata_store import SeriesMetadataStore
+from refresh_planner import CALENDAR_CACHE_TTL_SECONDS, ReleaseCalendar, RefreshPlanner, earliest_next_release
+
+@pytest.mark.parametrize('last_date, frequency, expected', [
+    # Daily and weekly observations are dated when they are taken
+    ('2024-03-01', 'daily', '2024-03-02'),
+    ('2024-12-31', 'daily', '2025-01-01'),
+    ('2024-03-01', 'weekly', '2024-03-08'),
+    ('2024-12-27', 'Weekly', '2025-01-03'),
+    # Monthly, quarterly and annual ones at the start of their period, which has to end first
+    ('2024-01-01', 'monthly', '2024-03-01'),
+    ('2024-11-01', 'monthly', '2025-01-01'),
+    ('2024-01-31', 'monthly', '2024-03-29'),
+    ('2024-01-01', 'quarterly', '2024-07-01'),
+    ('2024-10-01', 'Quarterly', '2025-04-01'),
+    ('2023-01-01', 'annually', '2025-01-01'),
+    ('2024-02-29', 'annual', '2026-02-28'),
+])
+def test_earliest_next_release(last_date, frequency, expected):
+    assert earliest_next_release(last_date, frequency) == expected
+
+def test_earliest_next_release_unknown_frequency():
+    assert earliest_next_release('2024-01-01', 'biweekly') is None
+
+@pytest.fixture
+def planner(tmp_path):
+    index = SeriesIndex.from_frame(pd.DataFrame({
+        'series_id': ['UNRATE', 'GDP', 'DGS10'],
+        'date': ['2024-04-01', '2024-01-01', '2024-05-10'],
+        'value': [3.9, 28000.0, 4.5]
+    }))
+    metadata = SeriesMetadataStore(tmp_path / 'fred_series_metadata.json')
+    metadata.update('GDP', {'observation_end': '2024-04-01', 'last_updated': '2024-06-27'})
+    return RefreshPlanner(index, metadata, today=date(2024, 5, 15))
+
+def metric(series_id, frequency):
+    return SimpleNamespace(id=series_id, update_frequency=frequency)
+
+def test_plan_skips_series_until_their_period_has_ended(planner):
+    # The May figure cannot be out before June 1st
+    plan = planner.plan_metric(metric('UNRATE', 'monthly'))
+    
+    assert not plan.fetch
+    assert plan.next_check == '2024-06-01'
+
+def test_plan_fetches_once_the_window_opens(planner):
+    assert planner.plan_metric(metric('DGS10', 'daily')).fetch
+
+def test_plan_fetches_when_fred_has_newer_observations(planner):
+    # The quarterly window is still closed, but FRED's metadata already lists the next quarter
+    plan = planner.plan_metric(metric('GDP', 'quarterly'))
+    
+    assert plan.fetch
+    assert '2024-04-01' in plan.reason
+
+def test_plan_fetches_unknown_and_forced_series(planner):
+    assert planner.plan_metric(metric('PAYEMS', 'monthly')).fetch
+    assert planner.plan_metric(metric('UNRATE', 'biweekly')).fetch
+    assert planner.plan_metric(metric('UNRATE', 'monthly'), force_update=True).fetch
+
+class CalendarClient:
+    """Stand-in for FredApiClient recording the calendar requests and their cache TTLs"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def get_series_release(self, series_id, cache_ttl=None):
+        self.calls.append(('series/release', series_id, cache_ttl))
+        return {'id': 50, 'name': 'Employment Situation'}
+    
+    def get_release_dates(self, release_id, cache_ttl=None):
+        self.calls.append(('release/dates', release_id, cache_ttl))
+        return ['2024-06-07', '2024-05-03']
+
+def test_calendar_update_fetches_each_release_once_with_a_cache_ttl(tmp_path):
+    calendar = ReleaseCalendar(tmp_path / 'fred_release_calendar.json')
+    client = CalendarClient()
+    
+    assert calendar.update(client, ['UNRATE', 'PAYEMS']) == 3
+    assert client.calls == [
+        ('series/release', 'UNRATE', CALENDAR_CACHE_TTL_SECONDS),
+        ('series/release', 'PAYEMS', CALENDAR_CACHE_TTL_SECONDS),
+        ('release/dates', '50', CALENDAR_CACHE_TTL_SECONDS),
+    ]
+    assert calendar.release_dates('PAYEMS') == ['2024-05-03', '2024-06-07']
+    
+    # Nothing is stale yet
+    assert calendar.update(client, ['UNRATE', 'PAYEMS']) == 0
@@ -0,0 +1,123 @@
+"""Tests for the on-disk response cache and how FredApiClient serves and revalidates from it"""
+
+import json
+import threading
+from datetime import date
+
+import pytest
+
+from response_cache import ResponseCache, cache_ttl_for_frequency
+
+PARAMS = {'series_id': 'UNRATE', 'api_key': 'secret', 'file_type': 'json'}
+SERIES = {'seriess': [{'id': 'UNRATE', 'title': 'Unemployment Rate'}]}
+LAST_MODIFIED = 'Fri, 03 May 2024 12:44:02 GMT'
+
+def test_key_ignores_the_api_key(tmp_path):
+    cache = ResponseCache(tmp_path)
+    
+    assert cache.key('series', PARAMS) == cache.key('series', dict(PARAMS, api_key='other'))
+    assert cache.key('series', PARAMS) != cache.key('series', dict(PARAMS, series_id='PAYEMS'))
+    assert cache.key('series', PARAMS) != cache.key('series/observations', PARAMS)
+
+def test_store_and_lookup(tmp_path):
+    cache = ResponseCache(tmp_path)
+    assert cache.lookup('series', PARAMS) is None
+    
+    cache.store('series', PARAMS, b'{"seriess": []}', etag='"v1"', last_modified=LAST_MODIFIED)
+    entry = cache.lookup('series', PARAMS)
+    
+    assert entry.read_body() == b'{"seriess": []}'
+    assert entry.conditional_headers() == {'If-None-Match': '"v1"', 'If-Modified-Since': LAST_MODIFIED}
+    assert not any('secret' in path.read_text() for path in tmp_path.rglob('*.meta.json'))
+
+def test_entries_expire_after_their_ttl(tmp_path):
+    entry = ResponseCache(tmp_path).store('series', PARAMS, b'{}')
+    
+    assert entry.is_fresh(60)
+    assert not entry.is_fresh(None)
+    entry.fetched_at -= 120
+    assert not entry.is_fresh(60)
+
+def test_counts_from_many_threads_add_up(tmp_path):
+    cache = ResponseCache(tmp_path)
+    
+    def count():
+        for _ in range(10_000):
+            cache.count('hits')
+    threads = [threading.Thread(target=count) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert cache.stats == {'hits': 40_000, 'revalidated': 0, 'misses': 0}
+
+def test_ttl_by_update_frequency():
+    assert cache_ttl_for_frequency('Daily') < cache_ttl_for_frequency('monthly') < cache_ttl_for_frequency('annual')
+    assert cache_ttl_for_frequency('biweekly') is None
+
+@pytest.fixture
+def cached_client(refresh_fred_data, fred_server, tmp_path):
+    def make(cache_only=False):
+        cache = ResponseCache(tmp_path / 'http', cache_only=cache_only)
+        client = refresh_fred_data.FredApiClient('test-key', cache=cache)
+        client.base_url = fred_server.url
+        return client
+    return make
+
+def validated_response(validator_header, request_header, value):
+    """Answer 304 when the request carries the validator, otherwise the series with it"""
+    def respond(headers):
+        if headers.get(request_header) == value:
+            return 304, {}, b''
+        return 200, {validator_header: value}, json.dumps(SERIES).encode('utf-8')
+    return respond
+
+def test_fresh_entries_are_served_without_a_request(cached_client, fred_server):
+    fred_server.responses['series'] = SERIES
+    client = cached_client()
+    
+    for _ in range(3):
+        assert client.get_series_metadata('UNRATE', cache_ttl=3600) == SERIES['seriess'][0]
+    
+    assert len(fred_server.requests) == 1
+    assert client.cache.stats == {'hits': 2, 'revalidated': 0, 'misses': 1}
+
+@pytest.mark.parametrize('validator_header, request_header, value', [
+    ('ETag', 'If-None-Match', '"v1"'),
+    ('Last-Modified', 'If-Modified-Since', LAST_MODIFIED),
+])
+def test_stale_entries_are_revalidated(cached_client, fred_server, validator_header, request_header, value):
+    fred_server.responses['series'] = validated_response(validator_header, request_header, value)
+    client = cached_client()
+    
+    assert client.get_series_metadata('UNRATE') == SERIES['seriess'][0]
+    # Without a TTL every lookup is revalidated, and a 304 serves the cached body
+    assert client.get_series_metadata('UNRATE') == SERIES['seriess'][0]
+    
+    assert [headers.get(request_header) for _, headers in fred_server.requests] == [None, value]
+    assert client.cache.stats == {'hits': 0, 'revalidated': 1, 'misses': 1}
+
+def test_cache_only_never_touches_the_network(cached_client, fred_server):
+    fred_server.responses['series'] = SERIES
+    cached_client().get_series_metadata('UNRATE')
+    client = cached_client(cache_only=True)
+    
+    # Served even though the entry would have to be revalidated
+    assert client.get_series_metadata('UNRATE') == SERIES['seriess'][0]
+    assert client.get_series_metadata('PAYEMS') == {}
+    
+    assert len(fred_server.requests) == 1
+    assert client.cache.stats == {'hits': 1, 'revalidated': 0, 'misses': 1}
+
+def test_release_dates_are_cached_all_year(cached_client, fred_server):
+    fred_server.responses['release/dates'] = {'release_dates': [{'date': '2024-05-03'}, {'date': '2024-06-07'}]}
+    client = cached_client()
+    
+    assert client.get_release_dates('50', cache_ttl=3600, today=date(2024, 3, 1)) == ['2024-05-03', '2024-06-07']
+    # A later day asks for the same window, so the fresh entry is reused
+    assert client.get_release_dates('50', cache_ttl=3600, today=date(2024, 11, 30)) == ['2024-05-03', '2024-06-07']
+    
+    assert len(fred_server.requests) == 1
+    assert 'realtime_start=2023-01-01' in fred_server.requests[0][0]
+    assert client.cache.stats == {'hits': 1, 'revalidated': 0, 'misses': 1}
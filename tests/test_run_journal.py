@@ -0,0 +1,80 @@
+"""Tests for the run journal that lets an interrupted refresh be resumed"""
+
+from run_journal import DONE, FAILED, PENDING, WRITTEN, RunJournal
+
+def interrupted_journal(path):
+    """Journal of a run that died after writing UNRATE and PAYEMS, with only UNRATE committed"""
+    journal = RunJournal(path)
+    journal.start(['UNRATE', 'PAYEMS', 'GDP', 'ICSA'], {'force': True})
+    journal.record_rows('UNRATE', 2, '2024-04-01', '2024-05-01')
+    journal.mark('UNRATE', WRITTEN)
+    journal.mark('ICSA', FAILED)
+    journal.commit_written()
+    journal.record_rows('PAYEMS', 2, '2024-04-01', '2024-05-01')
+    journal.mark('PAYEMS', WRITTEN)
+    journal.record_rows('GDP', 1, '2024-01-01', '2024-01-01', 'replace')
+    journal.mark('GDP', WRITTEN)
+    return journal
+
+def test_a_new_run_replaces_the_previous_journal(tmp_path):
+    path = tmp_path / 'fred_refresh_journal.json'
+    interrupted_journal(path)
+    
+    journal = RunJournal(path)
+    journal.start(['UNRATE'])
+    
+    assert RunJournal(path).summary() == {PENDING: 1}
+    assert journal.options == {}
+
+def test_the_journal_is_saved_after_every_change(tmp_path):
+    path = tmp_path / 'fred_refresh_journal.json'
+    interrupted_journal(path)
+    
+    reloaded = RunJournal(path)
+    assert reloaded.exists and not reloaded.finished
+    assert reloaded.options == {'force': True}
+    assert reloaded.summary() == {DONE: 1, WRITTEN: 2, FAILED: 1}
+
+def test_resume_retries_every_series_that_was_not_committed(tmp_path):
+    journal = interrupted_journal(tmp_path / 'fred_refresh_journal.json')
+    
+    journal.resume()
+    
+    assert journal.unfinished() == ['PAYEMS', 'GDP', 'ICSA']
+    assert journal.written_series() == ['UNRATE']
+    # Rows written before the interruption are forgotten along with the status
+    assert journal.data['series']['PAYEMS']['writes'] == []
+
+def test_resume_keeps_durable_appends(tmp_path):
+    journal = interrupted_journal(tmp_path / 'fred_refresh_journal.json')
+    
+    journal.resume(appends_are_durable=True)
+    
+    # PAYEMS only appended rows, which are on disk; GDP's replacement was held back
+    assert journal.unfinished() == ['GDP', 'ICSA']
+    assert journal.written_series() == ['UNRATE', 'PAYEMS']
+
+def test_a_run_only_finishes_after_its_export(tmp_path):
+    path = tmp_path / 'fred_refresh_journal.json'
+    journal = RunJournal(path)
+    journal.start(['UNRATE'])
+    journal.record_rows('UNRATE', 2, '2024-04-01', '2024-05-01')
+    journal.mark('UNRATE', WRITTEN)
+    
+    journal.commit_written()
+    assert journal.unfinished() == [] and not RunJournal(path).finished
+    
+    journal.finish()
+    assert RunJournal(path).finished
+    
+    journal.resume()
+    assert not journal.finished
+
+def test_unreadable_journal_is_ignored(tmp_path):
+    path = tmp_path / 'fred_refresh_journal.json'
+    path.write_text('{"series": ')
+    
+    journal = RunJournal(path)
+    
+    assert not journal.exists and not journal.finished
+    assert journal.unfinished() == [] and journal.written_series() == []